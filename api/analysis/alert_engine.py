@@ -0,0 +1,349 @@
+import os
+import time
+import uuid
+import asyncio
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Optional
+from pydantic import BaseModel
+from fastapi import APIRouter, Query, HTTPException, Depends
+from api.app.redis_config import redis_client, async_redis_client
+from api.app.serialization import dumps, loads
+from api.app.cache import current_generation, bump_generation
+from api.app.logger import get_logger
+from api.app.metrics import counter, histogram
+from api.app.session import SessionClaims, require_session
+from api.app.subscribers import ALERT_DEMAND_KEY, topic
+from api.app.option_chain import LAST_GOOD_EXPIRIES_KEY
+from api.analysis.strike_series import strike_id
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ FastAPI Router
+router = APIRouter()
+
+# ✅ Redis Keys
+#   alerts:chain:{security_id}:{expiry} → {alert_id: alert JSON}  (what a tracker loads per chain)
+#   alerts:owner:{owner}                → {alert_id: alert JSON}  (listing / deleting)
+#   alerts:fired:{owner}                → recent triggered events, newest first
+CHAIN_KEY = "alerts:chain:{}:{}"
+OWNER_KEY = "alerts:owner:{}"
+FIRED_KEY = "alerts:fired:{}"
+ALERT_CHANNEL = "alerts"  # ✅ Messages are "owner|event JSON"
+FIRED_KEEP = int(os.getenv("ALERT_FIRED_KEEP", 100))
+FEED_QUEUE_SIZE = 64
+
+# ✅ Condition inputs: per-strike leg values, or chain-level values when strike is omitted
+STRIKE_FIELDS = {
+    "ce_oi": ("ce", "oi"), "pe_oi": ("pe", "oi"),
+    "ce_ltp": ("ce", "last_price"), "pe_ltp": ("pe", "last_price"),
+    "ce_iv": ("ce", "implied_volatility"), "pe_iv": ("pe", "implied_volatility"),
+    "ce_volume": ("ce", "volume"), "pe_volume": ("pe", "volume"),
+}
+CHAIN_FIELDS = ("pcr", "spot", "ce_oi_total", "pe_oi_total")
+OPERATORS = ("above", "below", "crosses_above", "crosses_below")
+
+# ✅ Metrics
+ALERTS_TRIGGERED = counter("alerts_triggered_total", "Alerts fired and delivered", ("field",))
+ALERT_EVAL_LATENCY = histogram("alert_evaluation_seconds", "Alert evaluation time per chain snapshot")
+
+
+def _generation_name(security_id, expiry):
+    return f"alerts:{security_id}:{expiry}"
+
+
+# ✅ Registry (API side)
+class AlertRequest(BaseModel):
+    security_id: int
+    expiry: str
+    field: str
+    op: str
+    threshold: float
+    strike: Optional[float] = None  # ✅ Required for per-strike fields, omitted for chain fields
+
+
+def register_alert(request: AlertRequest, owner: str) -> dict:
+    if request.op not in OPERATORS:
+        raise HTTPException(status_code=400, detail=f"op must be one of {', '.join(OPERATORS)}")
+    if request.field in STRIKE_FIELDS:
+        if request.strike is None:
+            raise HTTPException(status_code=400, detail=f"{request.field} needs a strike")
+    elif request.field in CHAIN_FIELDS:
+        if request.strike is not None:
+            raise HTTPException(status_code=400, detail=f"{request.field} is chain-level; omit strike")
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown field: {request.field}")
+    # ✅ Alerts are evaluated on tracker snapshots only: refuse chains the tracker will never poll
+    polled = _polled_expiries(request.security_id)
+    if polled is None:
+        raise HTTPException(status_code=409, detail=f"{request.security_id} is not tracked; add it via /add-tracked-scrip/ first")
+    if polled and request.expiry not in polled:
+        raise HTTPException(status_code=409, detail=f"Only the tracked expiries can carry alerts: {', '.join(polled)}")
+
+    alert = {"id": uuid.uuid4().hex[:12], "created_at": time.time(), "owner": owner, **request.dict()}
+    body = dumps(alert)
+    pipe = redis_client.pipeline()
+    pipe.hset(CHAIN_KEY.format(request.security_id, request.expiry), alert["id"], body)
+    pipe.hset(OWNER_KEY.format(owner), alert["id"], body)
+    pipe.hincrby(ALERT_DEMAND_KEY, topic(request.security_id, request.expiry), 1)  # ✅ Chain polled while alerts exist
+    pipe.execute()
+    bump_generation(_generation_name(request.security_id, request.expiry))  # ✅ Owning tracker reloads this chain
+    return alert
+
+
+def _polled_expiries(security_id):
+    """Expiries the tracker polls for this scrip (nearest & next): None if untracked, [] if not yet known."""
+    from api.analysis.oca_live_tracker import tracked_scrips  # ✅ Lazy: the tracker imports this module
+    prefix = f"{security_id}:"
+    scrip = next((scrip for scrip in tracked_scrips() if scrip.startswith(prefix)), None)
+    if scrip is None:
+        return None
+    raw = redis_client.get(LAST_GOOD_EXPIRIES_KEY.format(security_id, scrip[len(prefix):]))
+    return loads(raw)[:2] if raw else []
+
+
+def delete_alert(owner: str, alert_id: str) -> bool:
+    raw = redis_client.hget(OWNER_KEY.format(owner), alert_id)
+    if raw is None:
+        return False
+    alert = loads(raw)
+    pipe = redis_client.pipeline()
+    pipe.hdel(CHAIN_KEY.format(alert["security_id"], alert["expiry"]), alert_id)
+    pipe.hdel(OWNER_KEY.format(owner), alert_id)
+    removed = pipe.execute()[0]
+    if removed:  # ✅ Not already fired (deliver() released its demand)
+        redis_client.hincrby(ALERT_DEMAND_KEY, topic(alert["security_id"], alert["expiry"]), -1)
+    bump_generation(_generation_name(alert["security_id"], alert["expiry"]))
+    return True
+
+
+# ✅ Threshold book for one (strike, field): thresholds kept sorted per operator, so a tick
+#    fires a contiguous slice found by bisect — O(log n + fired), not O(alerts)
+class _Book:
+    __slots__ = ("last", "thresholds", "alerts")
+
+    def __init__(self):
+        self.last = None
+        self.thresholds = {op: [] for op in OPERATORS}
+        self.alerts = {op: [] for op in OPERATORS}
+
+    def add(self, op, threshold, alert):
+        position = bisect_right(self.thresholds[op], threshold)
+        self.thresholds[op].insert(position, threshold)
+        self.alerts[op].insert(position, alert)
+
+    def _take(self, op, lo, hi):
+        fired = self.alerts[op][lo:hi]
+        if fired:
+            del self.thresholds[op][lo:hi]
+            del self.alerts[op][lo:hi]
+        return fired
+
+    def __bool__(self):
+        return any(self.thresholds.values())
+
+    def evaluate(self, value):
+        """Alerts triggered by moving from `self.last` to `value` (removed from the book)."""
+        last, self.last = self.last, value
+        fired = []
+        if self.thresholds["above"]:
+            fired += self._take("above", 0, bisect_left(self.thresholds["above"], value))
+        if self.thresholds["below"]:
+            fired += self._take("below", bisect_right(self.thresholds["below"], value), len(self.thresholds["below"]))
+        if last is not None and value > last and self.thresholds["crosses_above"]:
+            # ✅ Thresholds in (last, value]
+            levels = self.thresholds["crosses_above"]
+            fired += self._take("crosses_above", bisect_right(levels, last), bisect_right(levels, value))
+        if last is not None and value < last and self.thresholds["crosses_below"]:
+            # ✅ Thresholds in [value, last)
+            levels = self.thresholds["crosses_below"]
+            fired += self._take("crosses_below", bisect_left(levels, value), bisect_left(levels, last))
+        return fired
+
+
+# ✅ Per-chain index: (strike id | None, field) → _Book, rebuilt when the chain's alerts change
+class _ChainAlerts:
+    def __init__(self, security_id, expiry, generation):
+        self.generation = generation
+        self.books = {}
+        for raw in redis_client.hvals(CHAIN_KEY.format(security_id, expiry)):
+            alert = loads(raw)
+            strike = strike_id(alert["strike"]) if alert.get("strike") is not None else None
+            self.books.setdefault((strike, alert["field"]), _Book()).add(alert["op"], alert["threshold"], alert)
+        self.has_chain_fields = any(strike is None for strike, _ in self.books)
+        self.fresh = True  # ✅ First tick after a (re)load checks every book, even on unchanged values
+
+    def carry_last(self, previous):
+        """Keep last-seen values across reloads so a crossing is not missed on the next tick."""
+        for key, book in self.books.items():
+            old = previous.books.get(key)
+            if old is not None:
+                book.last = old.last
+
+    def evaluate(self, option_chain_data):
+        oc = option_chain_data.get("oc", {})
+        by_strike = {strike_id(key): legs for key, legs in oc.items()}
+        chain_values = _chain_values(option_chain_data, oc) if self.has_chain_fields else {}
+
+        force, self.fresh = self.fresh, False
+        fired = []
+        for (strike, field), book in self.books.items():
+            if not book:
+                continue
+            if strike is None:
+                value = chain_values.get(field)
+            else:
+                leg, name = STRIKE_FIELDS[field]
+                value = ((by_strike.get(strike) or {}).get(leg) or {}).get(name)
+            if value is None or (value == book.last and not force):
+                continue  # ✅ Input unchanged (or missing): nothing on this book can fire
+            for alert in book.evaluate(value):
+                fired.append((alert, value))
+        return fired
+
+
+def _chain_values(option_chain_data, oc):
+    ce_oi = sum((legs.get("ce") or {}).get("oi") or 0 for legs in oc.values())
+    pe_oi = sum((legs.get("pe") or {}).get("oi") or 0 for legs in oc.values())
+    return {
+        "spot": option_chain_data.get("last_price"),
+        "ce_oi_total": ce_oi,
+        "pe_oi_total": pe_oi,
+        "pcr": pe_oi / ce_oi if ce_oi else None,
+    }
+
+
+# ✅ Engine (tracker side): evaluate each published snapshot of the chains this process owns
+class AlertEngine:
+    def __init__(self):
+        self._chains = {}
+        self._lock = threading.Lock()
+
+    def _chain(self, security_id, expiry):
+        generation = current_generation(_generation_name(security_id, expiry))  # ✅ Local tier: no Redis call per tick
+        chain = self._chains.get((security_id, expiry))
+        if chain is None or chain.generation != generation:
+            with self._lock:
+                previous = chain
+                chain = _ChainAlerts(security_id, expiry, generation)
+                if previous is not None:
+                    chain.carry_last(previous)
+                self._chains[(security_id, expiry)] = chain
+        return chain
+
+    def on_snapshot(self, security_id, expiry, option_chain_data):
+        """Evaluate and deliver; returns the events delivered by this process."""
+        chain = self._chain(security_id, expiry)
+        if not chain.books:
+            return []
+        started = time.perf_counter()
+        fired = chain.evaluate(option_chain_data)
+        ALERT_EVAL_LATENCY.observe(time.perf_counter() - started)
+        return deliver(security_id, expiry, fired) if fired else []
+
+
+def deliver(security_id, expiry, fired):
+    """Remove fired alerts from the registry, then publish only the ones this call removed.
+
+    HDEL decides ownership, so two trackers overlapping during a lease handoff
+    never deliver the same alert twice.
+    """
+    chain_key = CHAIN_KEY.format(security_id, expiry)
+    pipe = redis_client.pipeline(transaction=False)
+    for alert, _ in fired:
+        pipe.hdel(chain_key, alert["id"])
+        pipe.hdel(OWNER_KEY.format(alert["owner"]), alert["id"])
+    removed = pipe.execute()[::2]
+
+    now = time.time()
+    events = []
+    pipe = redis_client.pipeline(transaction=False)
+    for (alert, value), owned in zip(fired, removed):
+        if not owned:
+            continue
+        event = {"type": "alert", "alert": alert, "value": value, "triggered_at": now}
+        body = dumps(event)
+        fired_key = FIRED_KEY.format(alert["owner"])
+        pipe.publish(ALERT_CHANNEL, f"{alert['owner']}|".encode() + body)
+        pipe.lpush(fired_key, body)
+        pipe.ltrim(fired_key, 0, FIRED_KEEP - 1)
+        pipe.hincrby(ALERT_DEMAND_KEY, topic(security_id, expiry), -1)
+        ALERTS_TRIGGERED.inc(field=alert["field"])
+        events.append(event)
+    if events:
+        pipe.execute()
+        logger.info("🔔 %d alerts triggered on %s %s", len(events), security_id, expiry)
+    return events
+
+
+engine = AlertEngine()
+
+
+# ✅ Per-worker WebSocket fan-out: one pub/sub subscription, events routed by owner
+class AlertFeed:
+    def __init__(self, queue_size=FEED_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._queues = {}  # ✅ owner → set of subscriber queues
+        self._pump_task = None
+
+    def subscribe(self, owner) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues.setdefault(owner, set()).add(queue)
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.ensure_future(self._pump())
+        return queue
+
+    def unsubscribe(self, owner, queue):
+        queues = self._queues.get(owner, set())
+        queues.discard(queue)
+        if not queues:
+            self._queues.pop(owner, None)
+        if not self._queues and self._pump_task:
+            self._pump_task.cancel()
+            self._pump_task = None
+
+    async def _pump(self):
+        while True:
+            pubsub = async_redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(ALERT_CHANNEL)
+                async for message in pubsub.listen():
+                    owner, _, body = message["data"].partition("|")
+                    for queue in list(self._queues.get(owner, ())):
+                        if queue.full():
+                            queue.get_nowait()
+                        queue.put_nowait(body)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # ✅ Redis blip: resubscribe (recent events stay in alerts:fired:{owner})
+                logger.warning("⚠️ Alert feed failed, retrying: %s", e)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+
+feed = AlertFeed()
+
+
+# ✅ API Routes: alerts are per user, so a session is required even when REQUIRE_SESSION is off
+@router.post("/alerts/")
+def create_alert(request: AlertRequest, session: SessionClaims = Depends(require_session)):
+    return register_alert(request, session.anjni_id)
+
+
+@router.get("/alerts/")
+def list_alerts(session: SessionClaims = Depends(require_session)):
+    return {"alerts": [loads(raw) for raw in redis_client.hvals(OWNER_KEY.format(session.anjni_id))]}
+
+
+@router.get("/alerts/fired/")
+def fired_alerts(limit: int = Query(50, ge=1, le=FIRED_KEEP), session: SessionClaims = Depends(require_session)):
+    return {"events": [loads(raw) for raw in redis_client.lrange(FIRED_KEY.format(session.anjni_id), 0, limit - 1)]}
+
+
+@router.delete("/alerts/{alert_id}")
+def remove_alert(alert_id: str, session: SessionClaims = Depends(require_session)):
+    if not delete_alert(session.anjni_id, alert_id):
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return {"message": f"Alert {alert_id} deleted"}
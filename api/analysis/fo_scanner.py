@@ -0,0 +1,301 @@
+import os
+import time
+import asyncio
+import logging
+import requests
+from typing import Optional
+from fractions import Fraction
+import numpy as np
+from fastapi import APIRouter, Query, HTTPException
+from starlette.concurrency import run_in_threadpool
+from api.app import db, dhan_client
+from api.app.redis_config import redis_client
+from api.app.serialization import dumps, loads
+from api.app.contract_index import get_index
+from api.app.dhan_client import UpstreamUnavailable
+from api.app.rate_limit import RateLimiter
+from api.app.logger import get_logger, log_sampled
+from api.app.metrics import counter, gauge
+from api.analysis.market_calendar import seconds_until_open
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ FastAPI Router (screener)
+router = APIRouter()
+
+# ✅ Scanner Settings
+SCANNER_PER_SEC = float(os.getenv("SCANNER_PER_SEC", 1))           # ✅ Share of the Dhan budget left to live tracking
+if SCANNER_PER_SEC <= 0:
+    raise ValueError(f"SCANNER_PER_SEC must be > 0, got {SCANNER_PER_SEC}")
+MIN_SWEEP_SECONDS = float(os.getenv("SCANNER_MIN_SWEEP_SECONDS", 30))  # ✅ Floor between sweep starts
+EMPTY_UNIVERSE_BACKOFF = 300.0                                      # ✅ Scrip master not loaded yet / no F&O rows
+SCANNER_CONCURRENCY = int(os.getenv("SCANNER_CONCURRENCY", 4))
+SCANNER_IV_HISTORY = int(os.getenv("SCANNER_IV_HISTORY", 500))     # ✅ ATM IV samples kept per underlying
+UNUSUAL_VOLUME_RATIO = float(os.getenv("SCANNER_UNUSUAL_VOLUME", 2.0))
+PUBLISH_INTERVAL = 1.0
+SCREENER_KEY = "screener:latest"
+SCREENER_CHANNEL = "screener_updates"
+
+# ✅ scrip_master instrument of the underlying → Dhan UnderlyingSeg
+UNDERLYING_SEGMENTS = {"INDEX": "IDX_I", "EQUITY": "NSE_EQ"}
+UNDERLYING_QUERY = """
+    SELECT sem_trading_symbol, sem_smst_security_id, sem_instrument_name
+    FROM scrip_master
+    WHERE sem_exm_exch_id = 'NSE' AND sem_instrument_name IN ('INDEX', 'EQUITY') AND sem_trading_symbol = ANY(%s);
+"""
+
+# ✅ Per-underlying aggregates (columns of the state matrix) and the metrics derived from them
+RAW = ("spot", "ce_oi", "pe_oi", "prev_oi", "volume", "prev_volume", "atm_iv")
+METRICS = ("pcr", "oi_change_pct", "iv_percentile", "volume_ratio")
+SORTABLE = METRICS + ("atm_iv", "volume")
+
+# ✅ Metrics
+SCANNER_FETCHES = counter("scanner_fetches_total", "Universe scanner chain fetches", ("result",))
+SCANNER_UNIVERSE = gauge("scanner_universe_size", "Option underlyings in the scanner universe")
+
+
+def _legs(option_chain_data):
+    """Chain → (strikes, leg field arrays) with one pass over the strikes."""
+    rows = []
+    for key, legs in option_chain_data.get("oc", {}).items():
+        ce, pe = legs.get("ce") or {}, legs.get("pe") or {}
+        rows.append((
+            float(key),
+            ce.get("oi") or 0, pe.get("oi") or 0,
+            (ce.get("previous_oi") or 0) + (pe.get("previous_oi") or 0),
+            (ce.get("volume") or 0) + (pe.get("volume") or 0),
+            (ce.get("previous_volume") or 0) + (pe.get("previous_volume") or 0),
+            ce.get("implied_volatility") or np.nan, pe.get("implied_volatility") or np.nan,
+        ))
+    return np.array(rows, dtype=np.float64).reshape(-1, 8)
+
+
+def chain_aggregates(option_chain_data) -> Optional[np.ndarray]:
+    """One row of RAW for an underlying, or None for an empty chain."""
+    legs = _legs(option_chain_data)
+    if not len(legs):
+        return None
+    spot = float(option_chain_data.get("last_price") or np.nan)
+    strikes = legs[:, 0]
+    atm = int(np.argmin(np.abs(strikes - spot))) if not np.isnan(spot) else len(strikes) // 2
+    atm_iv = np.nanmean(legs[atm, 6:8]) if not np.isnan(legs[atm, 6:8]).all() else np.nan
+    totals = legs[:, 1:6].sum(axis=0)
+    return np.array([spot, totals[0], totals[1], totals[2], totals[3], totals[4], atm_iv])
+
+
+def _ratio(numerator, denominator):
+    out = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+# ✅ Universe State: one row per underlying, metrics recomputed for every row at once
+class Screener:
+    def __init__(self, underlyings):
+        self.underlyings = underlyings  # ✅ [{"underlying", "security_id", "segment", "instrument", "expiry"}]
+        self.position = {item["underlying"]: row for row, item in enumerate(underlyings)}
+        count = len(underlyings)
+        self.raw = np.full((count, len(RAW)), np.nan)
+        self.updated_at = np.zeros(count)
+        self.iv_history = np.full((count, SCANNER_IV_HISTORY), np.nan)
+        self._iv_cursor = np.zeros(count, dtype=np.int64)
+
+    def update(self, underlying, aggregates):
+        row = self.position[underlying]
+        self.raw[row] = aggregates
+        self.updated_at[row] = time.time()
+        atm_iv = aggregates[RAW.index("atm_iv")]
+        if not np.isnan(atm_iv):
+            self.iv_history[row, self._iv_cursor[row] % SCANNER_IV_HISTORY] = atm_iv
+            self._iv_cursor[row] += 1
+
+    def metrics(self):
+        """Every METRIC for every underlying as (count,) arrays — no per-row Python."""
+        raw = {name: self.raw[:, column] for column, name in enumerate(RAW)}
+        oi = raw["ce_oi"] + raw["pe_oi"]
+        current_iv = raw["atm_iv"][:, None]
+        samples = (~np.isnan(self.iv_history)).sum(axis=1)
+        below = (self.iv_history < current_iv).sum(axis=1)  # ✅ NaN compares False
+        return {
+            "pcr": _ratio(raw["pe_oi"], raw["ce_oi"]),
+            "oi_change_pct": _ratio(oi - raw["prev_oi"], raw["prev_oi"]) * 100,
+            "iv_percentile": _ratio(below.astype(np.float64), samples.astype(np.float64)) * 100,
+            "volume_ratio": _ratio(raw["volume"], raw["prev_volume"]),
+        }
+
+    def rows(self):
+        metrics = self.metrics()
+        rounded = {name: np.round(values, 4).tolist() for name, values in metrics.items()}
+        raw = {name: np.round(self.raw[:, column], 4).tolist() for column, name in enumerate(RAW)}
+        rows = []
+        for row, item in enumerate(self.underlyings):
+            if not self.updated_at[row]:
+                continue
+            entry = dict(item)
+            entry.update({name: _clean(raw[name][row]) for name in ("spot", "atm_iv", "volume")})
+            entry.update({name: _clean(rounded[name][row]) for name in METRICS})
+            entry["unusual_volume"] = bool(metrics["volume_ratio"][row] >= UNUSUAL_VOLUME_RATIO)
+            entry["updated_at"] = round(float(self.updated_at[row]), 3)
+            rows.append(entry)
+        return rows
+
+
+def _clean(value):
+    return None if value != value else value  # ✅ NaN → null
+
+
+# ✅ Universe: every OPTIDX / OPTSTK underlying with its Dhan id, segment and nearest expiry
+def load_universe(exchange="NSE"):
+    index = get_index()
+    options = {underlying: instrument for (exch, underlying), instrument in index.option_underlyings.items() if exch == exchange}
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(UNDERLYING_QUERY, (sorted(options),))
+            found = {symbol.upper(): (security_id, instrument) for symbol, security_id, instrument in cursor.fetchall()}
+    finally:
+        conn.close()
+
+    universe = []
+    for underlying, instrument in sorted(options.items()):
+        expiries = index.expiries(underlying, exchange)
+        if underlying not in found or not expiries:
+            continue
+        security_id, kind = found[underlying]
+        universe.append({
+            "underlying": underlying,
+            "security_id": int(security_id),
+            "segment": UNDERLYING_SEGMENTS[kind],
+            "instrument": instrument,
+            "expiry": expiries[0].isoformat(),
+        })
+    missing = len(options) - len(universe)
+    if missing:
+        logger.warning("⚠️ Scanner skipped %d underlyings without an NSE index/equity row or expiry", missing)
+    SCANNER_UNIVERSE.set(len(universe))
+    return universe
+
+
+def scanner_pace(rate: float):
+    """(limit, window) for RateLimiter with limit / window == rate.
+
+    Below 1/s: one fetch per 1/rate seconds. Otherwise the smallest whole-second
+    window that keeps the limit integral (2.5/s → 5 per 2 s), so fractional
+    rates are neither truncated nor rounded up.
+    """
+    if rate < 1:
+        return 1, 1 / rate
+    fraction = Fraction(rate).limit_denominator(10)
+    return fraction.numerator, fraction.denominator
+
+
+# ✅ Scanner: fetch near-expiry chains within the shared budget, update rows as they arrive
+class UniverseScanner:
+    def __init__(self, universe):
+        self.screener = Screener(universe)
+        self.pace = RateLimiter("scanner", *scanner_pace(SCANNER_PER_SEC))
+        self._last_publish = 0.0
+
+    async def fetch(self, item):
+        payload = {"UnderlyingScrip": item["security_id"], "UnderlyingSeg": item["segment"], "Expiry": item["expiry"]}
+        await self.pace.acquire()  # ✅ Scanner's own share first, then the cluster-wide budget
+        try:
+            option_chain_data = await dhan_client.fetch_data(
+                dhan_client.OPTION_CHAIN_URL, payload, "optionchain_scan", budget=dhan_client.OPTION_CHAIN_BUDGET,
+            )
+        except (UpstreamUnavailable, requests.RequestException) as e:  # ✅ One bad underlying never stops the sweep
+            SCANNER_FETCHES.inc(result="error")
+            log_sampled(logger, logging.WARNING, f"scan:{item['underlying']}", "⚠️ Scan of %s failed: %s", item["underlying"], e)
+            return
+        aggregates = chain_aggregates(option_chain_data or {})
+        if aggregates is None:
+            SCANNER_FETCHES.inc(result="empty")
+            return
+        SCANNER_FETCHES.inc(result="ok")
+        self.screener.update(item["underlying"], aggregates)
+        self.publish()
+
+    def publish(self, force=False):
+        """Write the screener table to Redis (at most once per PUBLISH_INTERVAL)."""
+        now = time.monotonic()
+        if not force and now - self._last_publish < PUBLISH_INTERVAL:
+            return
+        self._last_publish = now
+        body = dumps({"updated_at": time.time(), "rows": self.screener.rows()})
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(SCREENER_KEY, body)
+        pipe.publish(SCREENER_CHANNEL, "1")
+        pipe.execute()
+
+    async def sweep(self):
+        slots = asyncio.Semaphore(SCANNER_CONCURRENCY)
+
+        async def bounded(item):
+            async with slots:
+                await self.fetch(item)
+
+        started = time.monotonic()
+        await asyncio.gather(*(bounded(item) for item in self.screener.underlyings))
+        self.publish(force=True)
+        logger.info("✅ Scanned %d underlyings in %.0f s", len(self.screener.underlyings), time.monotonic() - started)
+
+
+async def run_scanner():
+    """Sweep the whole universe continuously while the market is open (run one instance)."""
+    scanner = None
+    while True:
+        closed_for = seconds_until_open()
+        if closed_for > 0:
+            await asyncio.sleep(min(closed_for, 60))
+            continue
+        if dhan_client.BREAKER.open_for() > 0:
+            await asyncio.sleep(dhan_client.BREAKER.open_for())
+            continue
+        started = time.monotonic()
+        try:
+            universe = await run_in_threadpool(load_universe)  # ✅ Follows scrip master reloads / expiry rollover
+        except Exception as e:
+            logger.error("❌ Scanner universe unavailable: %s", e)
+            await asyncio.sleep(60)
+            continue
+        if not universe:
+            logger.warning("⚠️ Scanner universe is empty, retrying in %.0f s", EMPTY_UNIVERSE_BACKOFF)
+            await asyncio.sleep(EMPTY_UNIVERSE_BACKOFF)
+            continue
+        if scanner is None or [item["underlying"] for item in universe] != [item["underlying"] for item in scanner.screener.underlyings]:
+            scanner = UniverseScanner(universe)
+        else:
+            scanner.screener.underlyings = universe  # ✅ Same rows; keep IV history, refresh expiries
+        await scanner.sweep()
+        # ✅ Fast-failing / skipped sweeps must not hammer Postgres and Redis in a tight loop
+        await asyncio.sleep(max(MIN_SWEEP_SECONDS - (time.monotonic() - started), 0))
+
+
+# ✅ API Route: latest screener table, sorted / filtered on request
+@router.get("/screener/")
+def screener(
+    sort: str = Query("volume_ratio", description=f"One of {', '.join(SORTABLE)}"),
+    ascending: bool = Query(False),
+    limit: int = Query(50, ge=1, le=500),
+    instrument: Optional[str] = Query(None, description="OPTIDX or OPTSTK"),
+    unusual_volume: bool = Query(False, description="Only underlyings with unusual volume"),
+):
+    if sort not in SORTABLE:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SORTABLE)}")
+    raw = redis_client.get(SCREENER_KEY)
+    if raw is None:
+        raise HTTPException(status_code=503, detail="Screener has not run yet")
+    table = loads(raw)
+    rows = [
+        row for row in table["rows"]
+        if (instrument is None or row["instrument"] == instrument.upper()) and (not unusual_volume or row["unusual_volume"])
+    ]
+    with_value = [row for row in rows if row[sort] is not None]
+    with_value.sort(key=lambda row: row[sort], reverse=not ascending)
+    ranked = with_value + [row for row in rows if row[sort] is None]  # ✅ Unknown values last
+    return {"updated_at": table["updated_at"], "count": len(rows), "rows": ranked[:limit]}
+
+
+if __name__ == "__main__":
+    asyncio.run(run_scanner())
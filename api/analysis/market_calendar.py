@@ -0,0 +1,60 @@
+import os
+from datetime import datetime, date, time, timedelta
+from zoneinfo import ZoneInfo
+
+# ✅ NSE F&O session (IST)
+IST = ZoneInfo("Asia/Kolkata")
+MARKET_OPEN = time(9, 15)
+MARKET_CLOSE = time(15, 30)
+PRE_OPEN = time(9, 0)  # ✅ Start polling during pre-open so the first tick is warm
+
+# ✅ Exchange holidays: MARKET_HOLIDAYS="2025-02-26,2025-03-14" and/or MARKET_HOLIDAYS_FILE (one ISO date per line)
+def _load_holidays():
+    holidays = set()
+    for item in os.getenv("MARKET_HOLIDAYS", "").split(","):
+        if item.strip():
+            holidays.add(date.fromisoformat(item.strip()))
+    path = os.getenv("MARKET_HOLIDAYS_FILE")
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    holidays.add(date.fromisoformat(line.split(",")[0]))
+    return holidays
+
+
+HOLIDAYS = _load_holidays()
+
+
+def now_ist():
+    return datetime.now(IST)
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in HOLIDAYS
+
+
+def is_market_open(now: datetime = None, include_pre_open=True) -> bool:
+    now = (now or now_ist()).astimezone(IST)
+    start = PRE_OPEN if include_pre_open else MARKET_OPEN
+    return is_trading_day(now.date()) and start <= now.time() < MARKET_CLOSE
+
+
+def next_open(now: datetime = None, include_pre_open=True) -> datetime:
+    """Start of the next session (today's if it has not started yet)."""
+    now = (now or now_ist()).astimezone(IST)
+    start = PRE_OPEN if include_pre_open else MARKET_OPEN
+    day = now.date()
+    if not (is_trading_day(day) and now.time() < start):
+        day += timedelta(days=1)
+        while not is_trading_day(day):
+            day += timedelta(days=1)
+    return datetime.combine(day, start, tzinfo=IST)
+
+
+def seconds_until_open(now: datetime = None) -> float:
+    now = now or now_ist()
+    if is_market_open(now):
+        return 0.0
+    return (next_open(now) - now.astimezone(IST)).total_seconds()
@@ -1,107 +1,194 @@
-import os
+import time
 import asyncio
-import json
+import logging
 import requests
-from dotenv import load_dotenv
 from fastapi import APIRouter, Query, HTTPException
+from starlette.concurrency import run_in_threadpool
 from api.app.redis_config import redis_client
+from api.app import dhan_client
 from api.app.option_database import insert_option_chain  # ✅ Save live updates
 from api.app.dhan_api_input import get_scrip_details  # ✅ Fetch alias directly
+from api.app.snapshot_stream import append_snapshot
+from api.analysis.strike_series import append_chain, forget_writers
+from api.analysis.alert_engine import engine as alert_engine
+from api.app.serialization import dumps
+from api.app.cache import get_cache
 from api.app.option_chain import fetch_expiry_list  # ✅ Fetch expiry dynamically
+from api.app.dhan_client import UpstreamUnavailable
+from api.app.logger import get_logger, log_sampled
+from api.analysis.market_calendar import seconds_until_open
+from api.analysis.poll_scheduler import ChainPollState, PollPolicy, POLLS_SKIPPED, POLL_INTERVAL, SUBSCRIBER_RECHECK, demand
+from api.app.metrics import CACHE_WRITES, LIVE_PUBLISHES
 
-# ✅ Load environment variables
-load_dotenv(dotenv_path="api/app/.env")
+# ✅ API URLs (credentials & keep-alive session live in dhan_client)
+OPTION_CHAIN_URL = dhan_client.OPTION_CHAIN_URL
 
-# ✅ Fetch credentials from .env
-ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
-CLIENT_ID = os.getenv("CLIENT_ID")
+# ✅ FastAPI Router for Managing Tracked Scrips
+router = APIRouter()
 
-# ✅ API URLs
-OPTION_CHAIN_URL = "https://api.dhan.co/v2/optionchain"
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ Tracked scrip set: Redis is the source of truth, each process keeps a local copy until it changes
+TRACKED_SCRIPS_KEY = "tracked_scrips"
+tracked_cache = get_cache("tracked_scrips", redis_ttl=None, local_ttl=30)
+
+
+def tracked_scrips() -> frozenset:
+    """`{"security_id:exchange_segment", ...}` from the local tier, refreshed on add/remove anywhere."""
+    return tracked_cache.get("all", loader=lambda: frozenset(
+        scrip.decode() if isinstance(scrip, bytes) else scrip for scrip in redis_client.smembers(TRACKED_SCRIPS_KEY)
+    ))
+
+# ✅ Live Pipeline: cache → stream → publish → persist (shared with the replay engine)
+def publish_live_chain(security_id: int, expiry: str, underlying_symbol: str, option_chain_data: dict,
+                       timestamp=None, persist_table="option_data", evaluate_alerts=True):
+    """Push one chain snapshot through every live consumer. `persist_table=None` skips the database;
+    `evaluate_alerts=False` (replays) keeps historical data from firing users' live alerts."""
+    # ✅ One round-trip: latest key (30 s TTL) + capped snapshot stream + strike rings + live publish
+    payload = dumps(option_chain_data)  # ✅ Encoded once; every reader gets these bytes
+    redis_key = f"live_option_chain:{security_id}:{expiry}"
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.setex(redis_key, 30, payload)
+    append_snapshot(pipe, security_id, expiry, payload)
+    append_chain(pipe, security_id, expiry, option_chain_data, timestamp)  # ✅ Per-strike intraday rings
+    pipe.publish("option_chain_live", payload)
+    pipe.execute()
+    CACHE_WRITES.inc(cache="live_option_chain")
+    LIVE_PUBLISHES.inc()
+    logger.debug("✅ Live Data Cached & Streamed: %s", redis_key)
+
+    # ✅ Alerts whose inputs changed in this snapshot (delivered via Redis → WebSocket)
+    if evaluate_alerts:
+        try:
+            alert_engine.on_snapshot(security_id, expiry, option_chain_data)
+        except Exception as e:  # ✅ A broken alert must never stop the live pipeline
+            log_sampled(logger, logging.ERROR, f"alerts:{security_id}", "❌ Alert evaluation failed for %s %s: %s", security_id, expiry, e)
 
-# ✅ Headers for API requests
-HEADERS = {
-    "access-token": ACCESS_TOKEN,
-    "client-id": CLIENT_ID,
-    "Content-Type": "application/json",
-}
+    # ✅ Save to TimescaleDB for historical analysis
+    if persist_table:
+        insert_option_chain(underlying_symbol, expiry, option_chain_data, timestamp=timestamp, table=persist_table)
 
-# ✅ FastAPI Router for Managing Tracked Scrips
-router = APIRouter()
 
 # ✅ Function to Fetch Live Option Chain Data
-async def fetch_live_option_chain(security_id: int, exchange_segment: str, expiry: str, retries=5, delay=3):
-    """Fetch real-time option chain data and push to Redis."""
+async def fetch_live_option_chain(security_id: int, exchange_segment: str, expiry: str, deadline=None):
+    """Fetch real-time option chain data and push to Redis. Returns the chain, or None on failure.
+
+    Paced by the shared upstream budget and guarded by the shared breaker, so
+    an outage costs one fast failure per poll instead of a retry storm.
+    """
     payload = {
         "UnderlyingScrip": security_id,
         "UnderlyingSeg": exchange_segment,
         "Expiry": expiry
     }
 
-    print(f"\n📌 DEBUG: Fetching Live Data for {security_id} ({exchange_segment}) - Expiry {expiry}")
-    print(json.dumps(payload, indent=4))
-
-    for attempt in range(retries):
-        try:
-            response = requests.post(OPTION_CHAIN_URL, headers=HEADERS, json=payload)
-            response.raise_for_status()
-            option_chain_data = response.json().get("data", {})
-
-            if not option_chain_data:
-                print(f"⚠️ No live data for {security_id}-{exchange_segment} Expiry: {expiry}")
-                return
+    logger.debug("📌 Fetching Live Data for %s (%s) - Expiry %s: %s", security_id, exchange_segment, expiry, payload)
 
-            # ✅ Fetch alias from `dhan_api_input.py`
-            scrip_details = get_scrip_details(security_id, "NSE", "I")
-            underlying_symbol = scrip_details.get("alias", f"Scrip-{security_id}")
+    try:
+        option_chain_data = await dhan_client.fetch_data(
+            OPTION_CHAIN_URL, payload, "optionchain_live", deadline, budget=dhan_client.OPTION_CHAIN_BUDGET,
+        )
+    except (UpstreamUnavailable, requests.RequestException) as e:
+        log_sampled(
+            logger, logging.ERROR, f"error:{security_id}:{expiry}",
+            "❌ Error fetching live option chain for %s-%s Expiry: %s: %s",
+            security_id, exchange_segment, expiry, e,
+        )
+        return None
 
-            print(f"✅ Using Alias as Underlying Symbol: {underlying_symbol}")
+    if not option_chain_data:
+        log_sampled(
+            logger, logging.WARNING, f"empty:{security_id}:{expiry}",
+            "⚠️ No live data for %s-%s Expiry: %s", security_id, exchange_segment, expiry,
+        )
+        return {}
 
-            # ✅ Cache live data in Redis (Expires in 30 sec)
-            redis_key = f"live_option_chain:{security_id}:{expiry}"
-            redis_client.setex(redis_key, 30, json.dumps(option_chain_data))
-            print(f"✅ Live Data Cached in Redis: {redis_key}")
+    # ✅ Alias lookup, Redis publish and DB insert all block: run them off the loop so lease renewals stay on time
+    await run_in_threadpool(_publish_fetched, security_id, expiry, option_chain_data)
 
-            # ✅ Save to TimescaleDB for historical analysis
-            insert_option_chain(underlying_symbol, expiry, option_chain_data)
+    return option_chain_data
 
-            # ✅ Publish data for real-time processing
-            redis_client.publish("option_chain_live", json.dumps(option_chain_data))
 
-            return  # ✅ Exit on success
+def _publish_fetched(security_id: int, expiry: str, option_chain_data: dict):
+    # ✅ Fetch alias from `dhan_api_input.py`
+    scrip_details = get_scrip_details(security_id, "NSE", "I")
+    underlying_symbol = scrip_details.get("alias", f"Scrip-{security_id}")
 
-        except requests.exceptions.RequestException as e:
-            if response.status_code == 429:
-                print(f"⚠️ Rate limit hit for {security_id}-{exchange_segment} Expiry: {expiry}, retrying in {delay} sec...")
-                await asyncio.sleep(delay)
-                delay *= 2  # ✅ Exponential backoff
-            else:
-                print(f"❌ Error fetching live option chain for {security_id}-{exchange_segment} Expiry: {expiry}: {e}")
-                break
+    logger.debug("✅ Using Alias as Underlying Symbol: %s", underlying_symbol)
 
-    print(f"❌ Failed to fetch option chain for {security_id}-{exchange_segment} Expiry: {expiry} after {retries} retries.")
+    publish_live_chain(security_id, expiry, underlying_symbol, option_chain_data)
 
 
 # ✅ Function to Track Real-Time Market Data
-async def track_option_chain(security_id: int, exchange_segment: str):
-    """Continuously track live option chain data for the nearest & monthly expiry."""
-    expiry_list = await fetch_expiry_list(security_id, exchange_segment)
+async def track_option_chain(security_id: int, exchange_segment: str, policy: PollPolicy = None, fence=None):
+    """Track the nearest & next expiry, polling each only while the market is open and someone watches it.
+
+    Each chain's cadence comes from `PollPolicy`: hot chains (many WebSocket
+    subscribers) poll every POLL_MIN_INTERVAL, quiet chains back off while
+    their snapshots stay unchanged, and unwatched chains are skipped.
+    `fence` (async, → bool) is awaited before every fetch; tracking stops as
+    soon as it returns False (the coordinator's lease on this scrip is gone).
+    """
+    policy = policy or PollPolicy()
+    forget_writers(security_id)  # ✅ A previous lease owner may have advanced the strike rings
+    try:
+        expiry_list = await fetch_expiry_list(security_id, exchange_segment)
+    except UpstreamUnavailable:  # ✅ The coordinator restarts this task on its next heartbeat
+        return
     if not expiry_list:
-        print(f"⚠️ No expiries found for {security_id}-{exchange_segment}, stopping tracking.")
+        logger.warning("⚠️ No expiries found for %s-%s, stopping tracking.", security_id, exchange_segment)
         return
 
+    states = {expiry: ChainPollState() for expiry in expiry_list[:2]}  # ✅ Track nearest & next expiry
+
     while True:
-        for expiry in expiry_list[:2]:  # ✅ Track nearest & next expiry
-            await fetch_live_option_chain(security_id, exchange_segment, expiry)
-            await asyncio.sleep(3)  # ✅ Poll every 3 seconds (adjust based on API limits)
+        # ✅ Outside trading hours: sleep (in chunks, so holiday/calendar edits are picked up)
+        closed_for = seconds_until_open()
+        if closed_for > 0:
+            POLLS_SKIPPED.inc(len(states), reason="market_closed")
+            log_sampled(logger, logging.INFO, f"closed:{security_id}", "⏸️ Market closed, pausing %s for %.0f s", security_id, closed_for)
+            await asyncio.sleep(min(closed_for, 60))
+            continue
+
+        # ✅ Upstream is recovering: leave it alone until the cooldown ends
+        open_for = dhan_client.BREAKER.open_for()
+        if open_for > 0:
+            POLLS_SKIPPED.inc(len(states), reason="circuit_open")
+            log_sampled(logger, logging.WARNING, f"breaker:{security_id}", "⏸️ Dhan circuit open, pausing %s for %.0f s", security_id, open_for)
+            await asyncio.sleep(open_for)
+            continue
+
+        for expiry, state in states.items():
+            if time.monotonic() < state.next_due:
+                continue
+
+            state.subscribers = demand.get(security_id, expiry)
+            interval = policy.interval(state.subscribers, state.unchanged_streak)
+            if interval is None:
+                POLLS_SKIPPED.inc(reason="no_subscribers")
+                state.next_due = time.monotonic() + SUBSCRIBER_RECHECK
+                continue
+
+            if fence is not None and not await fence():
+                return
+            state.observe(await fetch_live_option_chain(security_id, exchange_segment, expiry))
+
+            interval = policy.interval(state.subscribers, state.unchanged_streak)
+            POLL_INTERVAL.set(interval, chain=f"{security_id}:{expiry}")
+            state.next_due = time.monotonic() + interval
+
+        next_due = min(state.next_due for state in states.values())
+        await asyncio.sleep(max(next_due - time.monotonic(), 0.25))
 
 
 # ✅ API Route to Add Security for Tracking
 @router.post("/add-tracked-scrip/")
 async def add_tracked_scrip(security_id: int, exchange_segment: str):
     """Add a scrip to live tracking list (Stored in Redis)."""
-    redis_client.sadd("tracked_scrips", f"{security_id}:{exchange_segment}")
-    print(f"✅ Added {security_id}-{exchange_segment} to live tracking")
+    redis_client.sadd(TRACKED_SCRIPS_KEY, f"{security_id}:{exchange_segment}")
+    tracked_cache.invalidate("all")
+    logger.info("✅ Added %s-%s to live tracking", security_id, exchange_segment)
     return {"message": f"{security_id}-{exchange_segment} added for live tracking"}
 
 
@@ -109,26 +196,17 @@ async def add_tracked_scrip(security_id: int, exchange_segment: str):
 @router.post("/remove-tracked-scrip/")
 async def remove_tracked_scrip(security_id: int, exchange_segment: str):
     """Remove a scrip from live tracking list (Stored in Redis)."""
-    redis_client.srem("tracked_scrips", f"{security_id}:{exchange_segment}")
-    print(f"✅ Removed {security_id}-{exchange_segment} from live tracking")
+    redis_client.srem(TRACKED_SCRIPS_KEY, f"{security_id}:{exchange_segment}")
+    tracked_cache.invalidate("all")
+    logger.info("✅ Removed %s-%s from live tracking", security_id, exchange_segment)
     return {"message": f"{security_id}-{exchange_segment} removed from live tracking"}
 
 
 # ✅ Run Live Tracker for Dynamic Scrips
 async def run_live_tracker():
-    """Continuously track scrips added by users dynamically."""
-    while True:
-        tracked_scrips = redis_client.smembers("tracked_scrips")
-        tasks = []
-
-        for scrip in tracked_scrips:
-            security_id, exchange_segment = scrip.decode().split(":")
-            tasks.append(track_option_chain(int(security_id), exchange_segment))
-
-        if tasks:
-            await asyncio.gather(*tasks)
-
-        await asyncio.sleep(10)  # ✅ Refresh tracked scrips every 10 seconds
+    """Continuously track scrips added by users, sharded across every running tracker process."""
+    from api.analysis.tracker_coordinator import TrackerCoordinator  # ✅ Lazy: coordinator imports this module
+    await TrackerCoordinator().run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,239 @@
+import os
+import shutil
+import argparse
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+from api.app import db
+from api.app.logger import get_logger
+from api.analysis.market_calendar import IST, MARKET_CLOSE, is_trading_day, now_ist
+
+# ✅ pyarrow is only needed by the archive job and backtests, not by the API
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow import fs
+except ImportError:
+    pa = None
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ Archive Settings
+ARCHIVE_ROOT = os.getenv("OPTION_ARCHIVE_ROOT", "data/option_archive")
+ARCHIVE_LOOKBACK_DAYS = int(os.getenv("OPTION_ARCHIVE_LOOKBACK_DAYS", 7))  # ✅ Nightly job back-fills missed days
+EXPORT_BATCH_ROWS = 100_000     # ✅ Rows per server-side cursor fetch (bounded memory)
+ROW_GROUP_ROWS = 128 * 1024     # ✅ Smaller groups = finer statistics pruning
+DICTIONARY_COLUMNS = ["underlying", "expiry", "strike"]
+SUCCESS_MARKER = "_SUCCESS"
+
+DOUBLE_COLUMNS = [
+    "strike", "ce_iv", "pe_iv", "ce_price", "pe_price",
+    "ce_delta", "pe_delta", "ce_theta", "pe_theta", "ce_gamma", "pe_gamma", "ce_vega", "pe_vega",
+    "ce_top_ask_price", "pe_top_ask_price", "ce_top_bid_price", "pe_top_bid_price",
+    "ce_previous_close_price", "pe_previous_close_price",
+]
+INT_COLUMNS = [
+    "ce_oi", "pe_oi", "ce_top_ask_quantity", "pe_top_ask_quantity", "ce_top_bid_quantity", "pe_top_bid_quantity",
+    "ce_previous_oi", "pe_previous_oi", "ce_previous_volume", "pe_previous_volume", "volume",
+]
+COLUMNS = ["timestamp", "underlying", "expiry"] + DOUBLE_COLUMNS + INT_COLUMNS
+
+# ✅ Sorted by (underlying, expiry, strike, timestamp) so each file streams out in one pass
+#    and row-group min/max statistics on expiry/strike are tight
+EXPORT_QUERY = f"""
+    SELECT {", ".join(COLUMNS)}
+    FROM option_data
+    WHERE timestamp >= %s AND timestamp < %s
+    ORDER BY underlying, expiry, strike, timestamp;
+"""
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the Parquet archive (pip install pyarrow)")
+
+
+def archive_schema():
+    _require_pyarrow()
+    return pa.schema(
+        [("timestamp", pa.timestamp("us", tz="UTC")), ("underlying", pa.string()), ("expiry", pa.date32())]
+        + [(name, pa.float64()) for name in DOUBLE_COLUMNS]
+        + [(name, pa.int64()) for name in INT_COLUMNS]
+    )
+
+
+def day_dir(day: date, root=ARCHIVE_ROOT) -> str:
+    return os.path.join(root, f"date={day.isoformat()}")
+
+
+def partition_path(day: date, underlying: str, root=ARCHIVE_ROOT) -> str:
+    return os.path.join(day_dir(day, root), f"underlying={underlying}", "part-0.parquet")
+
+
+def is_archived(day: date, root=ARCHIVE_ROOT) -> bool:
+    return os.path.exists(os.path.join(day_dir(day, root), SUCCESS_MARKER))
+
+
+def _to_batch(rows, schema):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+    )
+
+
+# ✅ Streaming Parquet writer per underlying (written to a temp name, renamed when complete)
+class _PartitionWriter:
+    def __init__(self, day, underlying, schema, root):
+        self.underlying = underlying
+        self.path = partition_path(day, underlying, root)
+        self.tmp_path = self.path + ".tmp"
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.writer = pq.ParquetWriter(
+            self.tmp_path, schema,
+            compression="zstd",
+            use_dictionary=DICTIONARY_COLUMNS,
+            write_statistics=True,
+        )
+        self.rows = 0
+
+    def write(self, batch):
+        self.writer.write_batch(batch, row_group_size=ROW_GROUP_ROWS)
+        self.rows += batch.num_rows
+
+    def commit(self):
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+# ✅ Export One Closed Day
+def export_day(day: date, root=ARCHIVE_ROOT, batch_size=EXPORT_BATCH_ROWS):
+    """Write `day` (IST) to root/date=YYYY-MM-DD/underlying=<alias>/part-0.parquet. Returns {underlying: rows}."""
+    schema = archive_schema()
+    target = day_dir(day, root)
+    if os.path.isdir(target) and not is_archived(day, root):
+        shutil.rmtree(target)  # ✅ Leftovers from an interrupted run
+
+    start = datetime.combine(day, time.min, tzinfo=IST)
+    end = start + timedelta(days=1)
+    counts = {}
+    writer = None
+
+    conn = db.direct_connection()  # ✅ Off the API pool: a long export never starves request handlers
+    try:
+        with conn.cursor(name=f"archive_{day:%Y%m%d}") as cursor:  # ✅ Server-side cursor streams rows
+            cursor.itersize = batch_size
+            cursor.execute(EXPORT_QUERY, (start, end))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for underlying, group in groupby(rows, key=lambda row: row[1]):
+                    if writer is None or writer.underlying != underlying:
+                        if writer is not None:
+                            writer.commit()
+                            counts[writer.underlying] = writer.rows
+                        writer = _PartitionWriter(day, underlying, schema, root)
+                    writer.write(_to_batch(list(group), schema))
+        if writer is not None:
+            writer.commit()
+            counts[writer.underlying] = writer.rows
+            writer = None
+        conn.commit()
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        raise
+    finally:
+        conn.close()
+
+    os.makedirs(target, exist_ok=True)
+    with open(os.path.join(target, SUCCESS_MARKER), "w") as f:
+        f.write(f"{sum(counts.values())}\n")
+    logger.info("✅ Archived %s: %d rows across %d underlyings", day, sum(counts.values()), len(counts))
+    return counts
+
+
+def closed_days(lookback=ARCHIVE_LOOKBACK_DAYS, now: datetime = None):
+    """Trading days in the lookback window whose session has ended."""
+    now = (now or now_ist()).astimezone(IST)
+    last = now.date() if now.time() >= MARKET_CLOSE else now.date() - timedelta(days=1)
+    days = [last - timedelta(days=offset) for offset in range(lookback)]
+    return sorted(day for day in days if is_trading_day(day))
+
+
+# ✅ Nightly Job
+def export_pending(root=ARCHIVE_ROOT, lookback=ARCHIVE_LOOKBACK_DAYS):
+    """Archive every closed trading day in the lookback window that is not archived yet."""
+    for day in closed_days(lookback):
+        if is_archived(day, root):
+            continue
+        try:
+            export_day(day, root)
+        except Exception as e:
+            logger.error("❌ Archive export failed for %s: %s", day, e)
+
+
+def schedule_export(scheduler, hour=20, minute=0):
+    """Add the nightly export to an APScheduler scheduler (after the close, before the 08:30 scrip refresh)."""
+    scheduler.add_job(export_pending, "cron", hour=hour, minute=minute, timezone=IST, id="parquet_archive", replace_existing=True)
+    logger.info("✅ Parquet archive scheduled (daily %02d:%02d IST)", hour, minute)
+
+
+# ✅ Reader API (backtests / research — never touches Postgres)
+def archive_files(underlying: str, start: date, end: date = None, root=ARCHIVE_ROOT):
+    end = end or start
+    files = []
+    day = start
+    while day <= end:
+        path = partition_path(day, underlying, root)
+        if os.path.exists(path):
+            files.append(path)
+        day += timedelta(days=1)
+    return files
+
+
+def read_history(underlying: str, start, end=None, expiry=None, min_strike=None, max_strike=None, columns=None, root=ARCHIVE_ROOT):
+    """Archived rows for one underlying between two dates (inclusive) as a pyarrow Table.
+
+    Files are memory-mapped; expiry / strike filters are evaluated against
+    row-group statistics first, so non-matching row groups are never read.
+    """
+    schema = archive_schema()
+    start = date.fromisoformat(start) if isinstance(start, str) else start
+    end = date.fromisoformat(end) if isinstance(end, str) else end
+    files = archive_files(underlying, start, end, root)
+    if not files:
+        empty = schema.empty_table()
+        return empty.select(columns) if columns else empty
+
+    condition = None
+    if expiry is not None:
+        expiry = date.fromisoformat(expiry) if isinstance(expiry, str) else expiry
+        condition = ds.field("expiry") == expiry
+    if min_strike is not None:
+        clause = ds.field("strike") >= float(min_strike)
+        condition = clause if condition is None else condition & clause
+    if max_strike is not None:
+        clause = ds.field("strike") <= float(max_strike)
+        condition = clause if condition is None else condition & clause
+
+    dataset = ds.dataset(files, schema=schema, format="parquet", filesystem=fs.LocalFileSystem(use_mmap=True))
+    return dataset.to_table(columns=columns, filter=condition)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parquet archive of option_data")
+    parser.add_argument("--day", help="Export one day (YYYY-MM-DD); default: every pending closed day")
+    parser.add_argument("--root", default=ARCHIVE_ROOT)
+    args = parser.parse_args()
+
+    if args.day:
+        export_day(date.fromisoformat(args.day), args.root)
+    else:
+        export_pending(args.root)
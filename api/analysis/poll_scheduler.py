@@ -0,0 +1,84 @@
+import os
+import time
+from dataclasses import dataclass, field
+from api.app.subscribers import subscriber_counts, topic, ALL_CHAINS
+from api.app.metrics import counter, gauge
+
+# ✅ Polling Policy Settings
+POLL_MIN_INTERVAL = float(os.getenv("POLL_MIN_INTERVAL", 3))        # ✅ Fastest cadence (Dhan: 1 req / 3 s per chain)
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", 24))       # ✅ Slowest cadence for a watched but quiet chain
+POLL_HOT_SUBSCRIBERS = int(os.getenv("POLL_HOT_SUBSCRIBERS", 10))   # ✅ This many viewers always get the fastest cadence
+POLL_IDLE_INTERVAL = float(os.getenv("POLL_IDLE_INTERVAL", 0))      # ✅ 0 = skip unwatched chains; >0 = slow poll for history
+SUBSCRIBER_RECHECK = float(os.getenv("POLL_SUBSCRIBER_RECHECK", 5))  # ✅ How soon a skipped chain is looked at again
+DEMAND_CACHE_SECONDS = 2.0
+
+# ✅ Metrics
+POLLS_SKIPPED = counter("tracker_polls_skipped_total", "Chain polls skipped", ("reason",))
+POLL_INTERVAL = gauge("tracker_poll_interval_seconds", "Current poll interval per chain", ("chain",))
+
+
+def chain_fingerprint(option_chain_data) -> int:
+    """Cheap change detector over the fields the UI shows (price, OI, volume per leg)."""
+    if not option_chain_data:
+        return 0
+    parts = [option_chain_data.get("last_price")]
+    for strike, legs in option_chain_data.get("oc", {}).items():
+        ce = legs.get("ce", {})
+        pe = legs.get("pe", {})
+        parts.append((strike, ce.get("last_price"), ce.get("oi"), ce.get("volume"),
+                      pe.get("last_price"), pe.get("oi"), pe.get("volume")))
+    return hash(tuple(parts))
+
+
+@dataclass
+class ChainPollState:
+    next_due: float = 0.0
+    unchanged_streak: int = 0
+    fingerprint: int = None
+    subscribers: int = 0
+
+    def observe(self, option_chain_data):
+        """Track how many consecutive polls returned an identical chain."""
+        if option_chain_data is None:
+            return
+        fingerprint = chain_fingerprint(option_chain_data)
+        if fingerprint == self.fingerprint:
+            self.unchanged_streak += 1
+        else:
+            self.unchanged_streak = 0
+        self.fingerprint = fingerprint
+
+
+@dataclass
+class PollPolicy:
+    min_interval: float = POLL_MIN_INTERVAL
+    max_interval: float = POLL_MAX_INTERVAL
+    hot_subscribers: int = POLL_HOT_SUBSCRIBERS
+    idle_interval: float = POLL_IDLE_INTERVAL
+
+    def interval(self, subscribers: int, unchanged_streak: int):
+        """Seconds until the next poll, or None to skip the chain for now."""
+        if subscribers <= 0:
+            return self.idle_interval or None
+        if subscribers >= self.hot_subscribers:
+            return self.min_interval
+        # ✅ Back off 3 → 6 → 12 → 24 s while the chain keeps coming back unchanged
+        return min(self.min_interval * 2 ** min(unchanged_streak, 4), self.max_interval)
+
+
+# ✅ Cluster-wide subscriber counts, shared by every chain task in this process
+@dataclass
+class DemandCache:
+    ttl: float = DEMAND_CACHE_SECONDS
+    _counts: dict = field(default_factory=dict)
+    _fetched_at: float = float("-inf")
+
+    def get(self, security_id, expiry) -> int:
+        now = time.monotonic()
+        if now - self._fetched_at > self.ttl:
+            self._counts = subscriber_counts()
+            self._fetched_at = now
+        return self._counts.get(topic(security_id, expiry), 0) + self._counts.get(ALL_CHAINS, 0)
+
+
+demand = DemandCache()
@@ -0,0 +1,220 @@
+import time
+import asyncio
+import argparse
+from dataclasses import dataclass
+from datetime import date, datetime
+from api.app import db
+from api.app.logger import get_logger
+from api.app.metrics import counter, gauge
+from api.analysis.market_calendar import IST
+from api.analysis.oca_live_tracker import publish_live_chain
+from api.analysis.parquet_archive import COLUMNS, read_history
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ Replay Settings
+REPLAY_TABLE = "option_data_replay"  # ✅ Never write replays back into recorded market data
+FETCH_ROWS = 50_000
+
+# ✅ Metrics
+REPLAYED_SNAPSHOTS = counter("replay_snapshots_total", "Snapshots pushed through the live pipeline by replays")
+REPLAY_LAG = gauge("replay_lag_seconds", "Wall-clock seconds a replay is behind its schedule")
+
+# ✅ option_data column suffix → Dhan leg field
+LEG_FIELDS = {
+    "oi": "oi",
+    "implied_volatility": "iv",
+    "last_price": "price",
+    "top_ask_price": "top_ask_price",
+    "top_ask_quantity": "top_ask_quantity",
+    "top_bid_price": "top_bid_price",
+    "top_bid_quantity": "top_bid_quantity",
+    "previous_close_price": "previous_close_price",
+    "previous_oi": "previous_oi",
+    "previous_volume": "previous_volume",
+}
+GREEKS = ("delta", "theta", "gamma", "vega")
+
+DB_QUERY = f"""
+    SELECT {", ".join(COLUMNS)}
+    FROM option_data
+    WHERE underlying = %s AND expiry = %s AND timestamp >= %s AND timestamp < %s
+    ORDER BY timestamp, strike;
+"""
+
+
+def rows_to_chain(rows):
+    """Rebuild a Dhan-shaped chain from option_data rows of one snapshot.
+
+    option_data keeps only CE+PE volume combined, so per-leg volume is not reconstructed.
+    """
+    oc = {}
+    for row in rows:
+        legs = {}
+        for leg in ("ce", "pe"):
+            data = {field: row[f"{leg}_{column}"] for field, column in LEG_FIELDS.items()}
+            data["greeks"] = {greek: row[f"{leg}_{greek}"] for greek in GREEKS}
+            legs[leg] = data
+        oc[f"{row['strike']:.6f}"] = legs
+    return {"oc": oc}
+
+
+def _group_snapshots(rows):
+    """Rows ordered by timestamp → (timestamp, [rows]) per snapshot (one insert shares one now())."""
+    current, group = None, []
+    for row in rows:
+        if group and row["timestamp"] != current:
+            yield current, group
+            group = []
+        current = row["timestamp"]
+        group.append(row)
+    if group:
+        yield current, group
+
+
+# ✅ Sources: (timestamp, chain) in time order
+def db_snapshots(underlying: str, expiry: str, start: datetime, end: datetime):
+    """Stream snapshots from option_data through a server-side cursor (unpooled connection)."""
+    def rows():
+        conn = db.direct_connection()
+        try:
+            with conn.cursor(name="replay_source") as cursor:
+                cursor.itersize = FETCH_ROWS
+                cursor.execute(DB_QUERY, (underlying, expiry, start, end))
+                for row in cursor:
+                    yield dict(zip(COLUMNS, row))
+        finally:
+            conn.close()
+
+    for timestamp, group in _group_snapshots(rows()):
+        yield timestamp, rows_to_chain(group)
+
+
+def archive_snapshots(underlying: str, expiry: str, start: datetime, end: datetime):
+    """Snapshots from the Parquet archive (no database access at all)."""
+    table = read_history(underlying, start.astimezone(IST).date(), end.astimezone(IST).date(), expiry=expiry)
+    table = table.sort_by([("timestamp", "ascending"), ("strike", "ascending")])
+    rows = (row for row in table.to_pylist() if start <= row["timestamp"] < end)
+    for timestamp, group in _group_snapshots(rows):
+        yield timestamp, rows_to_chain(group)
+
+
+# ✅ Deterministic Clock: simulated time only moves with snapshot timestamps
+class ReplayClock:
+    """Paces a replay against the wall clock. `speed=None` replays as fast as possible.
+
+    The schedule is anchored to the first snapshot, so slow publishes show up as
+    lag instead of silently stretching the replay.
+    """
+
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self.now = None
+        self._sim_start = None
+        self._wall_start = None
+        self.lag = 0.0
+
+    async def advance(self, timestamp: datetime):
+        if self._sim_start is None:
+            self._sim_start, self._wall_start = timestamp, time.monotonic()
+        elif self.speed:
+            due = self._wall_start + (timestamp - self._sim_start).total_seconds() / self.speed
+            delay = due - time.monotonic()
+            self.lag = max(-delay, 0.0)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)  # ✅ Let WebSocket / analytics consumers run between snapshots
+        self.now = timestamp
+
+
+@dataclass
+class ReplayResult:
+    snapshots: int = 0
+    sim_start: datetime = None
+    sim_end: datetime = None
+    wall_seconds: float = 0.0
+    max_lag: float = 0.0
+
+    @property
+    def speedup(self):
+        if not self.snapshots or not self.wall_seconds or self.sim_start is None:
+            return None
+        return (self.sim_end - self.sim_start).total_seconds() / self.wall_seconds
+
+
+# ✅ Replay Engine
+class ReplayEngine:
+    """Feed recorded snapshots through `publish_live_chain` — the tracker's cache, stream,
+    publish and persistence path — at 1x, Nx, or maximum speed.
+
+    Publish under a spare `security_id` when live tracking runs at the same time,
+    otherwise replayed frames reach real subscribers of that chain. Alerts are
+    never evaluated on replayed frames.
+    """
+
+    def __init__(self, security_id: int, underlying: str, expiry: str, source, speed=1.0, persist_table=REPLAY_TABLE):
+        self.security_id = security_id
+        self.underlying = underlying
+        self.expiry = expiry
+        self.source = source
+        self.clock = ReplayClock(speed)
+        self.persist_table = persist_table
+
+    async def run(self, limit=None) -> ReplayResult:
+        result = ReplayResult()
+        started = time.monotonic()
+        for timestamp, chain in self.source:
+            await self.clock.advance(timestamp)
+            chain["timestamp"] = timestamp.isoformat()  # ✅ Consumers see simulated, not wall, time
+            publish_live_chain(
+                self.security_id, self.expiry, self.underlying, chain,
+                timestamp=timestamp, persist_table=self.persist_table, evaluate_alerts=False,
+            )
+            REPLAYED_SNAPSHOTS.inc()
+            REPLAY_LAG.set(self.clock.lag)
+
+            result.snapshots += 1
+            result.sim_start = result.sim_start or timestamp
+            result.sim_end = timestamp
+            result.max_lag = max(result.max_lag, self.clock.lag)
+            if limit and result.snapshots >= limit:
+                break
+
+        result.wall_seconds = time.monotonic() - started
+        logger.info(
+            "✅ Replayed %d snapshots of %s %s in %.1f s (%sx, max lag %.2f s)",
+            result.snapshots, self.underlying, self.expiry, result.wall_seconds,
+            f"{result.speedup:.0f}" if result.speedup else "-", result.max_lag,
+        )
+        return result
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=IST)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded option chains through the live pipeline")
+    parser.add_argument("--security-id", type=int, required=True, help="Security id to publish under")
+    parser.add_argument("--underlying", required=True, help="Alias stored in option_data, e.g. NIFTY")
+    parser.add_argument("--expiry", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--start", required=True, help="ISO time (IST if no offset)")
+    parser.add_argument("--end", required=True, help="ISO time (IST if no offset)")
+    parser.add_argument("--speed", default="1", help="1, 10, ... or 'max'")
+    parser.add_argument("--source", choices=("db", "archive"), default="archive")
+    parser.add_argument("--no-persist", action="store_true", help=f"Skip writing to {REPLAY_TABLE}")
+    parser.add_argument("--limit", type=int, help="Stop after N snapshots")
+    args = parser.parse_args()
+
+    start, end = _parse_time(args.start), _parse_time(args.end)
+    expiry = date.fromisoformat(args.expiry).isoformat()
+    load = db_snapshots if args.source == "db" else archive_snapshots
+    engine = ReplayEngine(
+        args.security_id, args.underlying, expiry, load(args.underlying, expiry, start, end),
+        speed=None if args.speed == "max" else float(args.speed),
+        persist_table=None if args.no_persist else REPLAY_TABLE,
+    )
+    asyncio.run(engine.run(limit=args.limit))
@@ -0,0 +1,258 @@
+import os
+import math
+import struct
+import threading
+from datetime import date, datetime, time
+from typing import Optional
+import numpy as np
+from fastapi import APIRouter, Query, HTTPException
+from api.app.redis_config import redis_client, binary_redis_client
+from api.app.serialization import dumps, raw_object, RawJSONResponse
+from api.app.logger import get_logger
+from api.app.metrics import counter, gauge
+from api.analysis.market_calendar import IST, now_ist
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ FastAPI Router
+router = APIRouter()
+
+# ✅ Ring Settings: one preallocated ring per (session, security_id, expiry, strike)
+CAPACITY = int(os.getenv("STRIKE_SERIES_CAPACITY", 7500))   # ✅ 09:15–15:30 at a 3 s cadence
+SERIES_TTL = int(os.getenv("STRIKE_SERIES_TTL", 36 * 3600))  # ✅ Today's session, plus slack for late charts
+MAX_POINTS = 5000
+CHAIN_KEY = "series:{}:{}:{}"  # ✅ session, security_id, expiry → {"count": snapshots written}
+
+# ✅ Fixed-size little-endian records: a slot's byte offset is slot × size, so writes and
+#    reads are SETRANGE / GETRANGE of exactly the bytes involved
+RECORD = np.dtype([
+    ("ts", "<u4"),  # ✅ ms since the session's IST midnight
+    ("ce_oi", "<i8"), ("ce_ltp", "<f4"), ("ce_iv", "<f4"),
+    ("pe_oi", "<i8"), ("pe_ltp", "<f4"), ("pe_iv", "<f4"),
+])
+RECORD_STRUCT = struct.Struct("<Iqffqff")
+TIMESTAMP = np.dtype("<u4")
+TIMESTAMP_STRUCT = struct.Struct("<I")
+FIELDS = RECORD.names[1:]
+
+# ✅ Metrics
+SERIES_APPENDS = counter("strike_series_appends_total", "Chain snapshots written to strike series rings")
+SERIES_ALLOCATED = gauge("strike_series_allocated_bytes", "Ring bytes preallocated in Redis by this process's current-session writers")
+
+
+def strike_id(strike) -> str:
+    """"24000.000000" and 24000.0 name the same ring."""
+    return f"{float(strike):g}"
+
+
+def session_start(session: date) -> datetime:
+    return datetime.combine(session, time.min, tzinfo=IST)
+
+
+def _keys(session: date, security_id, expiry):
+    chain = CHAIN_KEY.format(session.isoformat(), security_id, expiry)
+    return chain, f"{chain}:ts", f"{chain}:strikes"
+
+
+def _number(value, default):
+    return default if value is None else value
+
+
+# ✅ Writer side (tracker / replay): one per chain per session
+class _ChainWriter:
+    def __init__(self, security_id, expiry, session: date):
+        self.session = session
+        self.base = session_start(session)
+        self.chain_key, self.ts_key, self.strikes_key = _keys(session, security_id, expiry)
+        self.strike_prefix = f"{self.chain_key}:k:"
+        self.allocated = 0
+        # ✅ Resume where the previous lease owner stopped (writers are rebuilt on every lease acquisition)
+        self.count = int(redis_client.hget(self.chain_key, "count") or 0)
+        self.strikes = set(redis_client.smembers(self.strikes_key))
+
+    def _allocate(self, pipe, key, size):
+        """Write the ring's last byte: Redis zero-fills the rest, so memory is fixed up front."""
+        pipe.setrange(key, size - 1, b"\0")
+        pipe.expire(key, SERIES_TTL)
+        self.allocated += size
+        SERIES_ALLOCATED.inc(size)
+
+    def close(self):
+        SERIES_ALLOCATED.dec(self.allocated)
+        self.allocated = 0
+
+    def append(self, pipe, option_chain_data, timestamp: datetime):
+        offset = int((timestamp - self.base).total_seconds() * 1000)
+        slot = self.count % CAPACITY
+        if self.count == 0:
+            self._allocate(pipe, self.ts_key, CAPACITY * TIMESTAMP.itemsize)
+        pipe.setrange(self.ts_key, slot * TIMESTAMP.itemsize, TIMESTAMP_STRUCT.pack(offset))
+
+        for key, legs in option_chain_data.get("oc", {}).items():
+            strike = strike_id(key)
+            ring = self.strike_prefix + strike
+            if strike not in self.strikes:
+                self._allocate(pipe, ring, CAPACITY * RECORD.itemsize)
+                pipe.sadd(self.strikes_key, strike)
+                self.strikes.add(strike)
+            values = [offset]
+            for leg in ("ce", "pe"):
+                data = legs.get(leg) or {}
+                values += [
+                    int(_number(data.get("oi"), 0)),
+                    float(_number(data.get("last_price"), math.nan)),
+                    float(_number(data.get("implied_volatility"), math.nan)),
+                ]
+            pipe.setrange(ring, slot * RECORD.itemsize, RECORD_STRUCT.pack(*values))
+
+        self.count += 1
+        pipe.hset(self.chain_key, "count", self.count)
+        pipe.expire(self.chain_key, SERIES_TTL)
+        pipe.expire(self.strikes_key, SERIES_TTL)
+        SERIES_APPENDS.inc()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def append_chain(pipe, security_id, expiry, option_chain_data, timestamp: datetime = None):
+    """Queue one snapshot's per-strike samples on `pipe` (executed with the live publish)."""
+    timestamp = (timestamp or now_ist()).astimezone(IST)
+    session = timestamp.date()
+    with _writers_lock:
+        writer = _writers.get((security_id, expiry))
+        if writer is None or writer.session != session:
+            if writer is not None:
+                writer.close()  # ✅ Session rolled over: yesterday's rings are left to expire
+            writer = _writers[(security_id, expiry)] = _ChainWriter(security_id, expiry, session)
+    writer.append(pipe, option_chain_data, timestamp)
+
+
+def forget_writers(security_id):
+    """Drop this process's cached ring positions for a scrip.
+
+    Called whenever a tracker (re)acquires the scrip: another process may have
+    appended in between, so `count` and the strike set must be re-read from
+    Redis rather than resumed from a stale local copy.
+    """
+    with _writers_lock:
+        for key in [key for key in _writers if key[0] == security_id]:
+            _writers.pop(key).close()
+
+
+# ✅ Reader side (chart endpoint)
+def _slot_ranges(first, stop):
+    """Logical sample indexes [first, stop) → contiguous ring slot ranges (two when wrapped)."""
+    head, length = first % CAPACITY, stop - first
+    if head + length <= CAPACITY:
+        return [(head, head + length)]
+    return [(head, CAPACITY), (0, head + length - CAPACITY)]
+
+
+def _joined(arrays):
+    return arrays[0] if len(arrays) == 1 else np.concatenate(arrays)  # ✅ Copy only when the ring wrapped
+
+
+def read_strike(security_id, expiry, strike, session: date = None, start: datetime = None, end: datetime = None):
+    """Samples of one strike as a structured array (fields: RECORD), oldest first, or None.
+
+    Timestamps are located on the chain's small timestamp ring first; only the
+    matching records of the strike's ring are fetched, and they are viewed in
+    place (`np.frombuffer`) rather than decoded.
+    """
+    session = session or now_ist().date()
+    chain_key, ts_key, _ = _keys(session, security_id, expiry)
+    pipe = binary_redis_client.pipeline(transaction=False)
+    pipe.hget(chain_key, "count")
+    pipe.get(ts_key)
+    count, ts_raw = pipe.execute()
+    count = int(count or 0)
+    if not count or not ts_raw:
+        return None
+
+    first = max(count - CAPACITY, 0)
+    ring = np.frombuffer(ts_raw, dtype=TIMESTAMP)
+    timestamps = _joined([ring[a:b] for a, b in _slot_ranges(first, count)])
+
+    base = session_start(session)
+    lo = 0 if start is None else int(np.searchsorted(timestamps, (start - base).total_seconds() * 1000, "left"))
+    hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, (end - base).total_seconds() * 1000, "right"))
+    if lo >= hi:
+        return np.empty(0, dtype=RECORD)
+
+    strike_key = f"{chain_key}:k:{strike_id(strike)}"
+    pipe = binary_redis_client.pipeline(transaction=False)
+    for a, b in _slot_ranges(first + lo, first + hi):
+        pipe.getrange(strike_key, a * RECORD.itemsize, b * RECORD.itemsize - 1)
+    chunks = pipe.execute()
+    if not any(chunks):
+        return None
+    records = _joined([np.frombuffer(chunk, dtype=RECORD) for chunk in chunks])
+
+    # ✅ A strike missing from a snapshot keeps an older record in that slot
+    present = records["ts"] == timestamps[lo:hi]
+    return records if present.all() else records[present]
+
+
+def downsample(records, points: Optional[int]):
+    """Every n-th sample (a strided view, no copy), always ending on the latest one."""
+    if not points or len(records) <= points:
+        return records
+    step = -(-len(records) // points)
+    return records[(len(records) - 1) % step::step]
+
+
+def _column(values) -> bytes:
+    if values.dtype.kind == "f":
+        # ✅ float32 → 2 dp; NaN (missing leg / price) → null
+        return dumps([None if math.isnan(value) else value for value in np.round(values.astype(np.float64), 2).tolist()])
+    return dumps(values.tolist())
+
+
+def _parse_time(value: Optional[str], session: date) -> Optional[datetime]:
+    """"HH:MM[:SS]" on the session day, or a full ISO timestamp (IST if no offset)."""
+    if not value:
+        return None
+    try:
+        if "T" in value or "-" in value:
+            parsed = datetime.fromisoformat(value)
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=IST)
+        return datetime.combine(session, time.fromisoformat(value), tzinfo=IST)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid time: {value}")
+
+
+# ✅ API Route: intraday series of one strike straight from the rings (no Postgres)
+@router.get("/option-chain/series/")
+def strike_series(
+    security_id: int = Query(..., description="Security ID of the underlying"),
+    expiry: str = Query(..., description="Expiry date (YYYY-MM-DD)"),
+    strike: float = Query(..., description="Strike price"),
+    fields: Optional[str] = Query(None, description=f"Comma-separated subset of {', '.join(FIELDS)}"),
+    session: Optional[date] = Query(None, description="Session date (default: today, IST)"),
+    start: Optional[str] = Query(None, description="HH:MM or ISO time"),
+    end: Optional[str] = Query(None, description="HH:MM or ISO time"),
+    points: Optional[int] = Query(None, ge=2, le=MAX_POINTS, description="Downsample to at most this many samples"),
+):
+    """Timestamps (epoch ms) plus one array per field for a single strike."""
+    names = [name.strip() for name in fields.split(",") if name.strip()] if fields else list(FIELDS)
+    unknown = [name for name in names if name not in FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    session = session or now_ist().date()
+    records = read_strike(security_id, expiry, strike, session, _parse_time(start, session), _parse_time(end, session))
+    if records is None:
+        raise HTTPException(status_code=404, detail="No intraday series for this strike")
+    records = downsample(records, points)
+
+    base_ms = int(session_start(session).timestamp() * 1000)
+    return RawJSONResponse(raw_object([
+        ("security_id", dumps(security_id)),
+        ("expiry", dumps(expiry)),
+        ("strike", dumps(float(strike))),
+        ("timestamps", dumps((records["ts"].astype(np.int64) + base_ms).tolist())),
+        *((name, _column(records[name])) for name in names),
+    ]))
@@ -0,0 +1,238 @@
+import os
+import time
+import uuid
+import asyncio
+import hashlib
+import argparse
+import socket
+import multiprocessing
+from bisect import bisect
+from starlette.concurrency import run_in_threadpool
+from api.app.redis_config import redis_client
+from api.app.logger import get_logger
+from api.app.metrics import gauge, counter, TRACKED_SCRIPS
+from api.analysis.oca_live_tracker import track_option_chain, tracked_scrips
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ Coordination Settings
+LEASE_TTL = float(os.getenv("TRACKER_LEASE_TTL", 10))         # ✅ Seconds before a dead node's scrips move
+HEARTBEAT_INTERVAL = float(os.getenv("TRACKER_HEARTBEAT", 3))  # ✅ Must be well below LEASE_TTL
+VIRTUAL_NODES = int(os.getenv("TRACKER_VIRTUAL_NODES", 64))
+
+# ✅ Redis Keys
+NODES_KEY = "tracker:nodes"              # ✅ ZSET node_id → last heartbeat (epoch seconds)
+LEASE_KEY = "tracker:lease:{}"           # ✅ scrip → owning node_id (PX = LEASE_TTL)
+LEADER_KEY = "tracker:leader"            # ✅ node_id of the current leader (PX = LEASE_TTL)
+
+# ✅ Metrics
+OWNED_SCRIPS = gauge("tracker_owned_scrips", "Scrips polled by this tracker process")
+TRACKER_NODES = gauge("tracker_live_nodes", "Tracker processes with a live heartbeat")
+IS_LEADER = gauge("tracker_is_leader", "1 when this process holds the tracker leader lease")
+LEASE_HANDOFFS = counter("tracker_lease_handoffs_total", "Scrip leases acquired or released", ("action",))
+
+# ✅ Compare-and-set scripts: only the holder may renew or release a lease
+_renew = redis_client.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+""")
+_release = redis_client.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+# ✅ Consistent Hash Ring: adding/removing a node only moves ~1/N of the scrips
+class HashRing:
+    def __init__(self, nodes, vnodes=VIRTUAL_NODES):
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(vnodes))
+        self._keys = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, key: str):
+        if not self._keys:
+            return None
+        index = bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._nodes[index]
+
+
+def _parse_scrip(scrip):
+    if isinstance(scrip, bytes):
+        scrip = scrip.decode()
+    security_id, exchange_segment = scrip.split(":")
+    return int(security_id), exchange_segment
+
+
+class TrackerCoordinator:
+    """One per tracker process: heartbeats, shards `tracked_scrips` by consistent hashing,
+    and only polls a scrip while holding its Redis lease (so no two processes fetch it).
+
+    Every poll is fenced on the lease: it is renewed right before the fetch, and a
+    task whose lease could not be renewed within LEASE_TTL is cancelled locally,
+    before a peer can acquire the expired lease.
+    """
+
+    def __init__(self, node_id=None):
+        self.node_id = node_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.tasks = {}  # ✅ scrip → asyncio.Task
+        self.renewed_at = {}  # ✅ scrip → monotonic time the last successful acquire/renew was sent
+        self.is_leader = False
+        self._ttl_ms = int(LEASE_TTL * 1000)
+
+    # 🔹 Membership
+    def heartbeat(self):
+        redis_client.zadd(NODES_KEY, {self.node_id: time.time()})
+
+    def live_nodes(self):
+        return redis_client.zrangebyscore(NODES_KEY, time.time() - LEASE_TTL, "+inf")
+
+    # 🔹 Leader election (leader prunes dead nodes from the membership set)
+    def elect(self):
+        if redis_client.set(LEADER_KEY, self.node_id, nx=True, px=self._ttl_ms):
+            logger.info("👑 %s became tracker leader", self.node_id)
+            self.is_leader = True
+        else:
+            self.is_leader = bool(_renew(keys=[LEADER_KEY], args=[self.node_id, self._ttl_ms]))
+        IS_LEADER.set(1 if self.is_leader else 0)
+        if self.is_leader:
+            removed = redis_client.zremrangebyscore(NODES_KEY, "-inf", time.time() - LEASE_TTL)
+            if removed:
+                logger.info("🧹 Pruned %d dead tracker node(s)", removed)
+
+    # 🔹 Scrip leases (timed from before the Redis call, so local expiry is never later than Redis's)
+    def acquire(self, scrip):
+        sent = time.monotonic()
+        if redis_client.set(LEASE_KEY.format(scrip), self.node_id, nx=True, px=self._ttl_ms):
+            LEASE_HANDOFFS.inc(action="acquire")
+            self.renewed_at[scrip] = sent
+            return True
+        return self.renew(scrip)
+
+    def renew(self, scrip):
+        sent = time.monotonic()
+        if _renew(keys=[LEASE_KEY.format(scrip)], args=[self.node_id, self._ttl_ms]):
+            self.renewed_at[scrip] = sent
+            return True
+        return False
+
+    def lease_valid(self, scrip):
+        sent = self.renewed_at.get(scrip)
+        return sent is not None and time.monotonic() - sent < LEASE_TTL
+
+    async def fence(self, scrip):
+        """Renew `scrip`'s lease right before a poll; False means the poll must not happen."""
+        if scrip not in self.tasks:
+            return False
+        try:
+            held = await run_in_threadpool(self.renew, scrip)
+        except Exception as e:  # ✅ Redis unreachable: poll only while the last renewal is still valid
+            logger.error("❌ Lease renew for %s failed: %s", scrip, e)
+            held = self.lease_valid(scrip)
+        if not held:
+            logger.warning("⚠️ %s lost the lease on %s, stopping its poller", self.node_id, scrip)
+        return held
+
+    def release(self, scrip):
+        if _release(keys=[LEASE_KEY.format(scrip)], args=[self.node_id]):
+            LEASE_HANDOFFS.inc(action="release")
+
+    # 🔹 Task management
+    def _start(self, scrip):
+        security_id, exchange_segment = _parse_scrip(scrip)
+        self.tasks[scrip] = asyncio.ensure_future(
+            track_option_chain(security_id, exchange_segment, fence=lambda: self.fence(scrip))
+        )
+        logger.info("▶️ %s now tracking %s", self.node_id, scrip)
+
+    def _stop(self, scrip):
+        task = self.tasks.pop(scrip, None)
+        if task:
+            task.cancel()
+        self.renewed_at.pop(scrip, None)
+        self.release(scrip)
+        logger.info("⏹️ %s stopped tracking %s", self.node_id, scrip)
+
+    def drop_expired(self):
+        """Cancel tasks whose lease may already have expired in Redis (no release: Redis may be down)."""
+        for scrip in [scrip for scrip in self.tasks if not self.lease_valid(scrip)]:
+            self.tasks.pop(scrip).cancel()
+            self.renewed_at.pop(scrip, None)
+            logger.warning("⏹️ %s dropped %s: lease not renewed within %.0fs", self.node_id, scrip, LEASE_TTL)
+        OWNED_SCRIPS.set(len(self.tasks))
+
+    def reconcile(self):
+        """Bring the running task set in line with ring ownership and held leases."""
+        self.heartbeat()
+        self.elect()
+
+        nodes = self.live_nodes()
+        TRACKER_NODES.set(len(nodes))
+        ring = HashRing(nodes)
+        tracked = tracked_scrips()
+        TRACKED_SCRIPS.set(len(tracked))
+        desired = {scrip for scrip in tracked if ring.owner(scrip) == self.node_id}
+
+        for scrip, task in list(self.tasks.items()):
+            if scrip not in desired or task.done() or not self.renew(scrip):
+                self._stop(scrip)  # ✅ Removed, re-sharded, finished, or lease lost
+
+        for scrip in desired - self.tasks.keys():
+            if self.acquire(scrip):
+                self._start(scrip)
+            # ✅ Otherwise the previous owner still holds it; retry next heartbeat after it releases/expires
+
+        OWNED_SCRIPS.set(len(self.tasks))
+
+    async def run(self):
+        logger.info("✅ Tracker node %s starting (lease %.0fs, heartbeat %.0fs)", self.node_id, LEASE_TTL, HEARTBEAT_INTERVAL)
+        try:
+            while True:
+                try:
+                    self.reconcile()
+                except Exception as e:  # ✅ Redis blip: tasks stay only while their leases are still valid
+                    logger.error("❌ Tracker reconcile failed: %s", e)
+                self.drop_expired()
+                await asyncio.sleep(HEARTBEAT_INTERVAL)
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Hand everything back immediately so peers take over without waiting for lease expiry."""
+        for scrip in list(self.tasks):
+            try:
+                self._stop(scrip)
+            except Exception as e:  # ✅ Unreleased leases still expire after LEASE_TTL
+                logger.error("❌ Releasing %s failed: %s", scrip, e)
+        redis_client.zrem(NODES_KEY, self.node_id)
+        _release(keys=[LEADER_KEY], args=[self.node_id])
+
+
+def _run_node():
+    try:
+        asyncio.run(TrackerCoordinator().run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coordinated live option-chain tracker")
+    parser.add_argument("--processes", type=int, default=1, help="Tracker processes to run on this machine")
+    args = parser.parse_args()
+
+    if args.processes == 1:
+        _run_node()
+    else:
+        workers = [multiprocessing.Process(target=_run_node) for _ in range(args.processes)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
@@ -1,48 +1,77 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-import psycopg2
-from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 import os
 from typing import Optional
 from datetime import datetime
-from dotenv import load_dotenv
+from api.app.db import get_connection
+from api.app.logger import get_logger
+from api.app.session import SessionClaims, issue_session, require_session, revoke_session, revoke_user
+from api.app.password_hashing import verify_password
+from api.app.rate_limit import RateLimiter
 
-load_dotenv()
-
-# Database connection
-conn = psycopg2.connect(
-    dbname=os.getenv("DB_NAME"),
-    user=os.getenv("DB_USER"),
-    password=os.getenv("DB_PASSWORD"),
-    host=os.getenv("DB_HOST"),
-    port=os.getenv("DB_PORT")
-)
-cursor = conn.cursor()
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Login throttling (shared across workers through Redis)
+login_limit_per_id = RateLimiter("login:id", int(os.getenv("LOGIN_RATE_PER_ID", 5)), 60)
+login_limit_global = RateLimiter("login:global", int(os.getenv("LOGIN_RATE_GLOBAL", 20)), 1)
 
 # FastAPI Router
 router = APIRouter()
 
+# Module Logger
+logger = get_logger(__name__)
+
 # Request Model
 class LoginRequest(BaseModel):
     anjni_id: str
     password: str
     activation_code: Optional[str] = None
 
+def fetch_user(anjni_id: str):
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT password_hash, activation_code, is_activated, activation_expiry FROM users WHERE anjni_id = %s", (anjni_id,))
+            return cursor.fetchone()
+    finally:
+        conn.close()
+
+def activate_user(anjni_id: str):
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("UPDATE users SET is_activated = TRUE WHERE anjni_id = %s", (anjni_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def throttle(limiter: RateLimiter, key: str):
+    allowed, reset_in = limiter.hit(key)
+    if not allowed:
+        logger.warning("⚠️ Login throttled (%s) for %s", limiter.name, key)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts, retry later",
+            headers={"Retry-After": str(max(int(reset_in), 1))},
+        )
+
 # Login API
 @router.post("/login")
-def login_user(credentials: LoginRequest):
-    cursor.execute("SELECT password_hash, activation_code, is_activated, activation_expiry FROM users WHERE anjni_id = %s", (credentials.anjni_id,))
-    user = cursor.fetchone()
+async def login_user(credentials: LoginRequest):
+    # Reject bursts before any DB or bcrypt work is spent on them
+    throttle(login_limit_global, "global")
+    throttle(login_limit_per_id, credentials.anjni_id)
+
+    user = await run_in_threadpool(fetch_user, credentials.anjni_id)
 
     if not user:
+        logger.warning("⚠️ Login attempt for unknown ANJNI ID %s", credentials.anjni_id)
         raise HTTPException(status_code=400, detail="Invalid ANJNI ID")
 
     password_hash, stored_activation_code, is_activated, activation_expiry = user
 
-    if not pwd_context.verify(credentials.password, password_hash):
+    # bcrypt runs in its own bounded pool, never in FastAPI's default threadpool
+    if not await verify_password(credentials.password, password_hash):
+        logger.warning("⚠️ Incorrect password for %s", credentials.anjni_id)
         raise HTTPException(status_code=400, detail="Incorrect password")
 
     # If user is not activated, check activation code and expiry
@@ -54,11 +83,29 @@ def login_user(credentials: LoginRequest):
             raise HTTPException(status_code=400, detail="Activation code expired")
 
         # Mark user as activated
-        cursor.execute("UPDATE users SET is_activated = TRUE WHERE anjni_id = %s", (credentials.anjni_id,))
-        conn.commit()
+        await run_in_threadpool(activate_user, credentials.anjni_id)
+        logger.info("✅ Activated %s", credentials.anjni_id)
     else:
         # If already activated, activation code should not be required
         if credentials.activation_code:
             raise HTTPException(status_code=400, detail="Activation code is not required after first login")
 
-    return {"message": "Login successful"}
+    # Issue a signed session token; later requests verify it without DB or bcrypt
+    return {"message": "Login successful", **issue_session(credentials.anjni_id)}
+
+# Logout API (revokes only the presented token)
+@router.post("/logout")
+def logout_user(session: SessionClaims = Depends(require_session)):
+    revoke_session(session)
+    return {"message": "Logged out"}
+
+# Logout Everywhere API (revokes every token issued to this user so far)
+@router.post("/logout-all")
+def logout_all(session: SessionClaims = Depends(require_session)):
+    revoke_user(session.anjni_id)
+    return {"message": "All sessions revoked"}
+
+# Current Session API
+@router.get("/session")
+def current_session(session: SessionClaims = Depends(require_session)):
+    return {"anjni_id": session.anjni_id, "expires_at": session.expires_at}
@@ -0,0 +1,280 @@
+import os
+import uuid
+import logging
+import asyncio
+import functools
+import threading
+import time
+from collections import OrderedDict
+from fastapi import APIRouter
+from api.app.redis_config import redis_client
+from api.app.serialization import dumps, loads
+from api.app.lifecycle import register_warmup, register_shutdown
+from api.app.logger import get_logger, log_sampled
+from api.app.metrics import CACHE_REQUESTS, CACHE_WRITES
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ FastAPI Router (cache statistics)
+router = APIRouter()
+
+# ✅ Cache Settings
+LOCAL_TTL = float(os.getenv("LOCAL_CACHE_TTL", 5))           # ✅ Upper bound on staleness if an invalidation is lost
+LOCAL_MAXSIZE = int(os.getenv("LOCAL_CACHE_MAXSIZE", 1024))  # ✅ Entries per cache per worker
+INVALIDATION_CHANNEL = "cache:invalidate"
+GENERATION_KEY = "cache:generation:{}"
+ALL_KEYS = "*"
+
+# ✅ Generation bumped by csv_loader / index_list after every successful load of
+#    scrip_master, search_table or index_list — results keyed by an older one are never read again
+SCRIP_DATA = "scrip_data"
+
+WORKER_ID = uuid.uuid4().hex[:12]
+MISSING = object()  # ✅ Sentinel: `None` is a cacheable value
+
+
+# ✅ Tier 1: bounded, thread-safe LRU with per-entry TTL (values kept as Python objects)
+class LocalCache:
+    def __init__(self, maxsize=LOCAL_MAXSIZE, ttl=LOCAL_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # ✅ key → (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# ✅ Tier 1 + Tier 2: local LRU in front of Redis, kept coherent through pub/sub
+class TwoTierCache:
+    """Read-through cache shared by every worker.
+
+    `get` checks this worker's LRU, then Redis (`cache:{name}:{key}`, JSON),
+    then the optional loader. Writes and invalidations are broadcast so other
+    workers drop their local copy. With `redis_ttl=None` only the local tier is
+    used (for values whose source of truth already lives in Redis or Postgres).
+    Returned objects are shared — treat them as read-only.
+    """
+
+    def __init__(self, name, redis_ttl=300, local_ttl=LOCAL_TTL, maxsize=LOCAL_MAXSIZE):
+        self.name = name
+        self.redis_ttl = redis_ttl
+        self.local = LocalCache(maxsize, local_ttl)
+        self.stats = {"local_hit": 0, "redis_hit": 0, "miss": 0}
+
+    def _redis_key(self, key):
+        return f"cache:{self.name}:{key}"
+
+    def _count(self, result):
+        self.stats[result] += 1
+        CACHE_REQUESTS.inc(cache=self.name, result=result)
+
+    def get(self, key, loader=None):
+        _ensure_listener()  # ✅ Local entries are only trusted while invalidations are being received
+        key = str(key)
+        value = self.local.get(key)
+        if value is not MISSING:
+            self._count("local_hit")
+            return value
+
+        if self.redis_ttl:
+            raw = redis_client.get(self._redis_key(key))
+            if raw is not None:
+                value = loads(raw)
+                self.local.set(key, value)
+                self._count("redis_hit")
+                return value
+
+        self._count("miss")
+        if loader is None:
+            return MISSING
+        value = loader()
+        if value is not None:
+            self.set(key, value, broadcast=False)  # ✅ First fill: nobody else holds a copy to drop
+        return value
+
+    def set(self, key, value, broadcast=True):
+        key = str(key)
+        self.local.set(key, value)
+        if self.redis_ttl:
+            redis_client.setex(self._redis_key(key), self.redis_ttl, dumps(value))
+            CACHE_WRITES.inc(cache=self.name)
+        if broadcast:
+            _broadcast(self.name, key)
+
+    def invalidate(self, key=ALL_KEYS):
+        """Drop one key (or every key) here, in Redis and in every other worker."""
+        key = str(key)
+        if key == ALL_KEYS:
+            self.local.clear()
+            if self.redis_ttl:
+                for redis_key in redis_client.scan_iter(match=self._redis_key("*"), count=500):
+                    redis_client.delete(redis_key)
+        else:
+            self.local.pop(key)
+            if self.redis_ttl:
+                redis_client.delete(self._redis_key(key))
+        _broadcast(self.name, key)
+
+    def drop_local(self, key):
+        if key == ALL_KEYS:
+            self.local.clear()
+        else:
+            self.local.pop(key)
+
+    def snapshot(self):
+        lookups = sum(self.stats.values())
+        hits = self.stats["local_hit"] + self.stats["redis_hit"]
+        return {**self.stats, "size": len(self.local), "hit_ratio": round(hits / lookups, 4) if lookups else None}
+
+
+# ✅ Registry: one cache object per name per process (like metrics.counter())
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name, **options) -> TwoTierCache:
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = TwoTierCache(name, **options)
+        return _caches[name]
+
+
+# ✅ Generations: one INCR invalidates every result cached under the previous value
+generations = get_cache("generations", redis_ttl=None)
+
+
+def current_generation(name) -> int:
+    return generations.get(name, loader=lambda: int(redis_client.get(GENERATION_KEY.format(name)) or 0))
+
+
+def bump_generation(name) -> int:
+    value = redis_client.incr(GENERATION_KEY.format(name))
+    generations.invalidate(name)
+    logger.info("✅ Cache generation %s → %d", name, value)
+    return value
+
+
+def _default_key(*args, **kwargs):
+    return ":".join(str(part) for part in args + tuple(kwargs[name] for name in sorted(kwargs)))
+
+
+def cached(cache: TwoTierCache, key=None, generation=None):
+    """Decorator for sync or async functions; `None` results are not cached.
+
+    With `generation`, keys are prefixed by that generation's current value.
+    """
+    build_key = key or _default_key
+
+    def make_key(*args, **kwargs):
+        if generation is None:
+            return build_key(*args, **kwargs)
+        return f"g{current_generation(generation)}:{build_key(*args, **kwargs)}"
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                cache_key = make_key(*args, **kwargs)
+                value = cache.get(cache_key)
+                if value is MISSING:
+                    value = await fn(*args, **kwargs)
+                    if value is not None:
+                        cache.set(cache_key, value, broadcast=False)
+                return value
+            async_wrapper.cache = cache
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache_key = make_key(*args, **kwargs)
+            return cache.get(cache_key, loader=lambda: fn(*args, **kwargs))
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+# ✅ Invalidation Bus: "worker|cache|key" on one channel; each worker drops its local copy
+def _broadcast(name, key):
+    try:
+        redis_client.publish(INVALIDATION_CHANNEL, f"{WORKER_ID}|{name}|{key}")
+    except Exception as e:  # ✅ Local TTL still bounds staleness
+        logger.warning("⚠️ Cache invalidation publish failed for %s:%s: %s", name, key, e)
+
+
+def _on_invalidate(message):
+    data = message["data"]
+    if isinstance(data, bytes):
+        data = data.decode()
+    origin, name, key = data.split("|", 2)
+    if origin == WORKER_ID:
+        return
+    cache = _caches.get(name)
+    if cache is not None:
+        cache.drop_local(key)
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def _ensure_listener():
+    global _listener
+    if _listener is not None and _listener.is_alive():
+        return
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{INVALIDATION_CHANNEL: _on_invalidate})
+                _listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+            except Exception as e:  # ✅ Redis down: serve with TTL-bounded staleness, retry on the next read
+                log_sampled(logger, logging.WARNING, "cache-listener", "⚠️ Cache invalidation listener unavailable: %s", e)
+
+
+@register_warmup("cache invalidation listener")
+def start_listener():
+    _ensure_listener()
+
+
+@register_shutdown("cache invalidation listener")
+def stop_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+# ✅ API Route: hit / miss statistics for this worker
+@router.get("/cache/stats/")
+def cache_stats():
+    return {"worker": WORKER_ID, "caches": {name: cache.snapshot() for name, cache in sorted(_caches.items())}}
@@ -0,0 +1,83 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from fastapi import Query
+
+
+# ✅ Which strikes / columns of a chain a client wants (hashable: used as a frame-cache key)
+@dataclass(frozen=True)
+class ChainProjection:
+    window: Optional[int] = None         # ✅ Strikes on each side of ATM
+    min_strike: Optional[float] = None
+    max_strike: Optional[float] = None
+    fields: Optional[Tuple[str, ...]] = None  # ✅ CE/PE keys to keep (None = all)
+
+    @property
+    def is_identity(self) -> bool:
+        return self == FULL_CHAIN
+
+
+FULL_CHAIN = ChainProjection()
+
+
+def projection_params(
+    window: Optional[int] = Query(None, ge=0, le=200, description="Strikes on each side of ATM"),
+    min_strike: Optional[float] = Query(None, description="Lowest strike to include"),
+    max_strike: Optional[float] = Query(None, description="Highest strike to include"),
+    fields: Optional[str] = Query(None, description="Comma-separated CE/PE fields, e.g. last_price,oi,volume"),
+) -> ChainProjection:
+    """FastAPI dependency shared by the REST and WebSocket option chain routes."""
+    names = tuple(sorted({name.strip() for name in fields.split(",") if name.strip()})) if fields else None
+    return ChainProjection(window, min_strike, max_strike, names or None)
+
+
+# ✅ Parsed chain with strikes sorted and the ATM position found once per snapshot
+class IndexedChain:
+    def __init__(self, chain: dict):
+        self.chain = chain
+        pairs = sorted((float(key), key) for key in chain.get("oc", {}))
+        self.strikes = [strike for strike, _ in pairs]
+        self.keys = [key for _, key in pairs]
+        self.atm = self._atm_index(chain.get("last_price"))
+
+    def _atm_index(self, spot):
+        if spot is None or not self.strikes:
+            return None
+        index = bisect_left(self.strikes, spot)
+        if index == len(self.strikes):
+            return index - 1
+        if index > 0 and spot - self.strikes[index - 1] <= self.strikes[index] - spot:
+            return index - 1
+        return index
+
+    def bounds(self, projection: ChainProjection):
+        """[lo, hi) positions in `self.keys` selected by the strike filters."""
+        lo, hi = 0, len(self.strikes)
+        if projection.min_strike is not None:
+            lo = bisect_left(self.strikes, projection.min_strike)
+        if projection.max_strike is not None:
+            hi = bisect_right(self.strikes, projection.max_strike)
+        if projection.window is not None and self.atm is not None:
+            lo = max(lo, self.atm - projection.window)
+            hi = min(hi, self.atm + projection.window + 1)
+        return lo, max(lo, hi)
+
+    def project(self, projection: ChainProjection) -> dict:
+        if projection.is_identity:
+            return self.chain
+        lo, hi = self.bounds(projection)
+        oc = self.chain["oc"] if self.keys else {}
+        fields = projection.fields
+        selected = {}
+        for key in self.keys[lo:hi]:
+            legs = oc[key]
+            if fields is None:
+                selected[key] = legs
+            else:
+                selected[key] = {leg: {name: data[name] for name in fields if name in data} for leg, data in legs.items()}
+
+        projected = {key: value for key, value in self.chain.items() if key != "oc"}
+        projected["oc"] = selected
+        if self.atm is not None:
+            projected["atm_strike"] = self.keys[self.atm]
+        return projected
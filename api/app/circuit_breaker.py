@@ -0,0 +1,106 @@
+import time
+from api.app.redis_config import redis_client
+from api.app.logger import get_logger
+from api.app.metrics import counter, gauge
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ Metrics
+BREAKER_OPEN = gauge("circuit_breaker_open", "1 while the breaker rejects calls (open or probing)", ("breaker",))
+BREAKER_REJECTED = counter("circuit_breaker_rejected_total", "Calls failed fast by an open breaker", ("breaker",))
+BREAKER_TRIPS = counter("circuit_breaker_trips_total", "Times the breaker opened", ("breaker",))
+
+
+class CircuitOpenError(Exception):
+    """The upstream is considered down; callers should fail fast (and serve cached data)."""
+
+
+# ✅ Circuit Breaker shared by every worker and tracker process through Redis
+class CircuitBreaker:
+    """closed → open after `failures` errors within `window` s → half-open after `cooldown` s.
+
+    Keys: breaker:{name}:failures (counter, expires with the window),
+    breaker:{name}:open (present while open), breaker:{name}:tripped (present
+    until a probe succeeds) and breaker:{name}:probe (the one caller allowed
+    through while half-open).
+    """
+
+    def __init__(self, name: str, failures: int = 5, window: float = 30, cooldown: float = 30, probe_timeout: float = 15):
+        self.name = name
+        self.failures = failures
+        self.window = window
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+        self._keys = {part: f"breaker:{name}:{part}" for part in ("failures", "open", "tripped", "probe")}
+
+    def allow(self) -> bool:
+        """May this caller hit the upstream now?"""
+        pipe = redis_client.pipeline()
+        pipe.exists(self._keys["open"])
+        pipe.exists(self._keys["tripped"])
+        is_open, tripped = pipe.execute()
+        if is_open:
+            return self._reject()
+        if tripped:
+            # ✅ Half-open: exactly one probe at a time, everyone else keeps failing fast
+            if redis_client.set(self._keys["probe"], "1", nx=True, px=int(self.probe_timeout * 1000)):
+                return True
+            return self._reject()
+        BREAKER_OPEN.set(0, breaker=self.name)
+        return True
+
+    def open_for(self) -> float:
+        """Seconds left in the cooldown (0 when closed or half-open). Never claims the probe."""
+        remaining_ms = redis_client.pttl(self._keys["open"])
+        return remaining_ms / 1000 if remaining_ms and remaining_ms > 0 else 0.0
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit open")
+
+    def _reject(self):
+        BREAKER_OPEN.set(1, breaker=self.name)
+        BREAKER_REJECTED.inc(breaker=self.name)
+        return False
+
+    def record_success(self):
+        pipe = redis_client.pipeline()
+        pipe.exists(self._keys["tripped"])
+        pipe.delete(self._keys["failures"], self._keys["tripped"], self._keys["probe"])
+        was_tripped = pipe.execute()[0]
+        if was_tripped:
+            logger.info("✅ %s circuit closed (probe succeeded)", self.name)
+        BREAKER_OPEN.set(0, breaker=self.name)
+
+    def record_failure(self):
+        pipe = redis_client.pipeline()
+        pipe.incr(self._keys["failures"])
+        pipe.expire(self._keys["failures"], int(self.window))
+        pipe.exists(self._keys["tripped"])
+        count, _, tripped = pipe.execute()
+        if tripped or count >= self.failures:
+            self.trip()
+
+    def trip(self):
+        pipe = redis_client.pipeline()
+        pipe.set(self._keys["open"], "1", px=int(self.cooldown * 1000))
+        pipe.set(self._keys["tripped"], "1")
+        pipe.delete(self._keys["failures"], self._keys["probe"])
+        pipe.execute()
+        BREAKER_OPEN.set(1, breaker=self.name)
+        BREAKER_TRIPS.inc(breaker=self.name)
+        logger.warning("⚠️ %s circuit opened for %.0f s", self.name, self.cooldown)
+
+
+# ✅ Deadline: one time budget for a whole request (attempts, backoff and queueing included)
+class Deadline:
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
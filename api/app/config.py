@@ -0,0 +1,37 @@
+import os
+from dotenv import load_dotenv
+
+# ✅ Load environment variables once, from this package's .env regardless of the working directory
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(dotenv_path=ENV_FILE)
+
+# ✅ Database
+DB_HOST = os.getenv("DB_HOST")
+DB_NAME = os.getenv("DB_NAME")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD") or os.getenv("DB_PASS")  # ✅ Older modules read DB_PASS
+DB_PORT = os.getenv("DB_PORT")
+DATABASE_URL = os.getenv("DATABASE_URL")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+
+# ✅ Redis
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+
+# ✅ Dhan API
+ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
+CLIENT_ID = os.getenv("CLIENT_ID")
+DHAN_TIMEOUT = float(os.getenv("DHAN_TIMEOUT", 10))
+DHAN_OPTIONCHAIN_PER_SEC = int(os.getenv("DHAN_OPTIONCHAIN_PER_SEC", 5))  # ✅ Shared by every worker & tracker
+DHAN_DEADLINE = float(os.getenv("DHAN_DEADLINE", 8))                     # ✅ Whole-request budget incl. retries
+DHAN_BREAKER_FAILURES = int(os.getenv("DHAN_BREAKER_FAILURES", 5))       # ✅ Errors within the window that open it
+DHAN_BREAKER_WINDOW = float(os.getenv("DHAN_BREAKER_WINDOW", 30))
+DHAN_BREAKER_COOLDOWN = float(os.getenv("DHAN_BREAKER_COOLDOWN", 30))    # ✅ Upstream left alone this long
+
+# ✅ Auth — guard data routers with session tokens
+REQUIRE_SESSION = os.getenv("REQUIRE_SESSION") == "1"
+
+# ✅ Background jobs — enable in exactly one process (e.g. a dedicated worker), not in every uvicorn worker
+RUN_SCHEDULER = os.getenv("RUN_SCHEDULER") == "1"
+RUN_MIGRATIONS = os.getenv("RUN_MIGRATIONS") == "1"  # ✅ Apply TimescaleDB schema migrations at startup
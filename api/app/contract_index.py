@@ -0,0 +1,246 @@
+import threading
+from bisect import bisect_left
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Query, HTTPException
+from api.app import db
+from api.app.cache import current_generation, SCRIP_DATA
+from api.app.lifecycle import register_warmup
+from api.app.logger import get_logger
+from api.analysis.market_calendar import now_ist
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ FastAPI Router
+router = APIRouter()
+
+# ✅ Derivatives only: equities and indices resolve through search_table
+DERIVATIVE_INSTRUMENTS = ("OPTIDX", "OPTSTK", "FUTIDX", "FUTSTK")
+OPTION_TYPES = ("CE", "PE")
+
+# ✅ Same column order as CONTRACT_QUERY, so a csv_loader DataFrame feeds the same builder
+CONTRACT_COLUMNS = [
+    "sem_exm_exch_id", "sem_segment", "sem_smst_security_id", "sem_instrument_name", "sem_trading_symbol",
+    "sem_lot_units", "sem_expiry_date", "sem_strike_price", "sem_option_type",
+]
+CONTRACT_QUERY = f"""
+    SELECT {", ".join(CONTRACT_COLUMNS)}
+    FROM scrip_master
+    WHERE sem_instrument_name IN %s AND sem_expiry_date IS NOT NULL;
+"""
+
+
+class Contract:
+    __slots__ = ("security_id", "exchange", "segment", "instrument", "underlying",
+                 "trading_symbol", "lot_size", "expiry", "strike", "option_type")
+
+    def __init__(self, security_id, exchange, segment, instrument, underlying, trading_symbol, lot_size, expiry, strike, option_type):
+        self.security_id = security_id
+        self.exchange = exchange
+        self.segment = segment
+        self.instrument = instrument
+        self.underlying = underlying
+        self.trading_symbol = trading_symbol
+        self.lot_size = lot_size
+        self.expiry = expiry
+        self.strike = strike
+        self.option_type = option_type
+
+    def to_dict(self):
+        return {
+            "security_id": self.security_id,
+            "exchange": self.exchange,
+            "segment": self.segment,
+            "instrument": self.instrument,
+            "underlying": self.underlying,
+            "trading_symbol": self.trading_symbol,
+            "lot_size": self.lot_size,
+            "expiry": self.expiry.isoformat(),
+            "strike": self.strike,
+            "option_type": self.option_type,
+        }
+
+
+def underlying_of(trading_symbol: str) -> str:
+    """"NIFTY-Jan2025-24000-CE" / "NIFTY-Jan2025-FUT" → "NIFTY"."""
+    return trading_symbol.split("-", 1)[0].upper()
+
+
+def _as_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+# ✅ Contract Index: built once per scrip master load, read without locks
+class ContractIndex:
+    """In-memory derivatives index.
+
+    Options are grouped by (exchange, underlying, expiry, option type) into
+    strike-sorted lists, so the nearest strike is one bisect; expiries per
+    underlying are kept sorted for "nearest / next" resolution.
+    """
+
+    def __init__(self, rows, generation=None):
+        self.generation = generation
+        self.by_security_id = {}
+        self._chains = {}    # ✅ (exchange, underlying, expiry, option_type) → (strikes, contracts)
+        self._futures = {}   # ✅ (exchange, underlying) → [contract] by expiry
+        self._expiries = {}  # ✅ (exchange, underlying) → sorted option expiries
+        self.option_underlyings = {}  # ✅ (exchange, underlying) → "OPTIDX" / "OPTSTK"
+
+        chains = {}
+        for exchange, segment, security_id, instrument, trading_symbol, lot_size, expiry, strike, option_type in rows:
+            expiry = _as_date(expiry)
+            if expiry is None or not isinstance(trading_symbol, str):  # ✅ NaN from pandas, NULL from SQL
+                continue
+            option_type = option_type if option_type in OPTION_TYPES else None
+            contract = Contract(
+                int(security_id), exchange, segment, instrument, underlying_of(trading_symbol),
+                trading_symbol, int(lot_size or 0), expiry, float(strike or 0), option_type,
+            )
+            self.by_security_id[contract.security_id] = contract
+            if option_type:
+                chains.setdefault((exchange, contract.underlying, expiry, option_type), []).append(contract)
+                self.option_underlyings[(exchange, contract.underlying)] = instrument
+            elif instrument.startswith("FUT"):
+                self._futures.setdefault((exchange, contract.underlying), []).append(contract)
+
+        for key, contracts in chains.items():
+            contracts.sort(key=lambda contract: contract.strike)
+            self._chains[key] = ([contract.strike for contract in contracts], contracts)
+            self._expiries.setdefault(key[:2], set()).add(key[2])
+        self._expiries = {key: sorted(expiries) for key, expiries in self._expiries.items()}
+        for contracts in self._futures.values():
+            contracts.sort(key=lambda contract: contract.expiry)
+
+    def __len__(self):
+        return len(self.by_security_id)
+
+    def get(self, security_id: int) -> Optional[Contract]:
+        return self.by_security_id.get(int(security_id))
+
+    def lot_size(self, security_id: int) -> Optional[int]:
+        contract = self.get(security_id)
+        return contract.lot_size if contract else None
+
+    def expiries(self, underlying: str, exchange="NSE", on_or_after: date = None):
+        """Upcoming option expiries, nearest first."""
+        expiries = self._expiries.get((exchange, underlying.upper()), [])
+        on_or_after = on_or_after or now_ist().date()
+        return expiries[bisect_left(expiries, on_or_after):]
+
+    def future_expiries(self, underlying: str, exchange="NSE", on_or_after: date = None):
+        """Futures expiries (= the monthly option expiries), nearest first."""
+        on_or_after = on_or_after or now_ist().date()
+        return [contract.expiry for contract in self._futures.get((exchange, underlying.upper()), []) if contract.expiry >= on_or_after]
+
+    def resolve_expiry(self, underlying: str, expiry: date = None, offset: int = 0, exchange="NSE") -> Optional[date]:
+        """`expiry` if listed, else the `offset`-th upcoming one (0 = nearest, 1 = next)."""
+        expiries = self.expiries(underlying, exchange)
+        if expiry is not None:
+            return expiry if expiry in expiries else None
+        return expiries[offset] if 0 <= offset < len(expiries) else None
+
+    def strikes(self, underlying: str, expiry: date, option_type="CE", exchange="NSE"):
+        chain = self._chains.get((exchange, underlying.upper(), expiry, option_type.upper()))
+        return chain[0] if chain else []
+
+    def nearest(self, underlying: str, strike: float, option_type: str, expiry: date = None, offset: int = 0,
+                exchange="NSE") -> Optional[Contract]:
+        """Contract at the listed strike closest to `strike` (ties go to the lower strike)."""
+        expiry = self.resolve_expiry(underlying, expiry, offset, exchange)
+        chain = self._chains.get((exchange, underlying.upper(), expiry, option_type.upper()))
+        if not chain:
+            return None
+        strikes, contracts = chain
+        index = bisect_left(strikes, strike)
+        if index == len(strikes) or (index > 0 and strike - strikes[index - 1] <= strikes[index] - strike):
+            index -= 1
+        return contracts[index]
+
+
+# ✅ Builders: from a freshly loaded DataFrame (csv_loader) or from scrip_master (every other process)
+def build_from_frame(df, generation=None) -> ContractIndex:
+    derivatives = df[df["sem_instrument_name"].isin(DERIVATIVE_INSTRUMENTS)]
+    return _publish(ContractIndex(derivatives[CONTRACT_COLUMNS].itertuples(index=False, name=None), generation))
+
+
+def build_from_db(generation=None) -> ContractIndex:
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(CONTRACT_QUERY, (DERIVATIVE_INSTRUMENTS,))
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+    return _publish(ContractIndex(rows, generation))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _publish(index):
+    global _index
+    _index = index  # ✅ Readers keep whichever index they already hold; swaps are atomic
+    logger.info("✅ Contract index built: %d contracts (generation %s)", len(index), index.generation)
+    return index
+
+
+def get_index() -> ContractIndex:
+    """The current index, rebuilt when scrip_master has been reloaded anywhere (generation bump)."""
+    generation = current_generation(SCRIP_DATA)
+    index = _index
+    if index is not None and index.generation == generation:
+        return index
+    with _index_lock:
+        if _index is not None and _index.generation == generation:
+            return _index
+        return build_from_db(generation)
+
+
+@register_warmup("contract index")
+def warm_index():
+    get_index()
+
+
+# ✅ API Routes
+@router.get("/contracts/expiries/")
+def contract_expiries(
+    underlying: str = Query(..., description="e.g. NIFTY, RELIANCE"),
+    exchange: str = Query("NSE", description="NSE or BSE"),
+):
+    index = get_index()
+    return {
+        "underlying": underlying.upper(),
+        "expiries": [expiry.isoformat() for expiry in index.expiries(underlying, exchange)],
+        "monthly": [expiry.isoformat() for expiry in index.future_expiries(underlying, exchange)],
+    }
+
+
+@router.get("/contracts/resolve/")
+def resolve_contract(
+    underlying: str = Query(..., description="e.g. NIFTY"),
+    strike: float = Query(..., description="Target strike; the nearest listed strike is returned"),
+    option_type: str = Query(..., description="CE or PE"),
+    expiry: Optional[date] = Query(None, description="Expiry date (default: by offset)"),
+    offset: int = Query(0, ge=0, description="0 = nearest expiry, 1 = next, ..."),
+    exchange: str = Query("NSE", description="NSE or BSE"),
+):
+    """e.g. "NIFTY 24000 CE next expiry" → underlying=NIFTY&strike=24000&option_type=CE&offset=1"""
+    if option_type.upper() not in OPTION_TYPES:
+        raise HTTPException(status_code=400, detail="option_type must be CE or PE")
+    contract = get_index().nearest(underlying, strike, option_type, expiry, offset, exchange)
+    if contract is None:
+        raise HTTPException(status_code=404, detail="No matching contract")
+    return contract.to_dict()
+
+
+@router.get("/contracts/{security_id}/")
+def contract_details(security_id: int):
+    contract = get_index().get(security_id)
+    if contract is None:
+        raise HTTPException(status_code=404, detail="Unknown derivative security_id")
+    return contract.to_dict()
@@ -1,21 +1,14 @@
 import pandas as pd
-import psycopg2
-import os
 import requests
 import csv
-from dotenv import load_dotenv
 from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime
+from api.app import db
+from api.app.logger import get_logger
+from api.app.cache import bump_generation, SCRIP_DATA
+from api.app import contract_index
 
-# ✅ Load environment variables from .env
-load_dotenv()
-
-# ✅ Database connection details from .env
-DB_HOST = os.getenv("DB_HOST")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASS = os.getenv("DB_PASS")
-DB_PORT = os.getenv("DB_PORT")
+# ✅ Module Logger
+logger = get_logger(__name__)
 
 # ✅ CSV Source URL
 CSV_URL = "https://images.dhan.co/api-data/api-scrip-master.csv"
@@ -24,24 +17,24 @@ CSV_FILE_PATH = "api/app/temp_scrip_master.csv"  # ✅ Temporary Storage Path
 # ✅ Step 1: Fetch CSV from URL
 def fetch_csv():
     try:
-        print(f"🔄 Fetching CSV from {CSV_URL} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}...")
+        logger.info("🔄 Fetching CSV from %s...", CSV_URL)
         response = requests.get(CSV_URL, timeout=30)  # ✅ Timeout added for stability
         if response.status_code == 200:
             with open(CSV_FILE_PATH, "wb") as f:
                 f.write(response.content)
-            print("✅ CSV file downloaded successfully!")
+            logger.info("✅ CSV file downloaded successfully!")
         else:
-            print(f"❌ Failed to download CSV. HTTP Status: {response.status_code}")
+            logger.error("❌ Failed to download CSV. HTTP Status: %s", response.status_code)
             return False
     except Exception as e:
-        print(f"❌ Error fetching CSV: {e}")
+        logger.error("❌ Error fetching CSV: %s", e)
         return False
     return True
 
 # ✅ Step 2: Load and Process CSV Data
 def load_csv():
     try:
-        print("🔍 Loading and processing CSV data...")
+        logger.info("🔍 Loading and processing CSV data...")
         df = pd.read_csv(CSV_FILE_PATH, encoding='utf-8', low_memory=False)
 
         # Convert all column names to lowercase and strip spaces
@@ -70,25 +63,18 @@ def load_csv():
         df["sem_expiry_code"] = pd.to_numeric(df["sem_expiry_code"], errors='coerce').fillna(0).astype(int)
         df["sem_strike_price"] = pd.to_numeric(df["sem_strike_price"], errors='coerce').fillna(0)
 
-        print(f"✅ Loaded {len(df)} rows and applied final fixes.")
+        logger.info("✅ Loaded %s rows and applied final fixes.", len(df))
         return df
     except Exception as e:
-        print(f"❌ Error loading CSV: {e}")
+        logger.error("❌ Error loading CSV: %s", e)
         return None
 
 # ✅ Step 3: Connect to Database
 def connect_db():
     try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASS,
-            port=DB_PORT
-        )
-        return conn
+        return db.get_connection()
     except Exception as e:
-        print(f"❌ Database connection failed: {e}")
+        logger.error("❌ Database connection failed: %s", e)
         return None
 
 # ✅ Step 4: Bulk Insert Data Using `COPY` into `scrip_master`
@@ -103,7 +89,7 @@ def insert_data(df):
         # ✅ Step 1: Truncate `scrip_master` to prevent duplicates
         cursor.execute("TRUNCATE TABLE scrip_master RESTART IDENTITY;")
         conn.commit()
-        print("✅ Old data cleared from scrip_master.")
+        logger.info("✅ Old data cleared from scrip_master.")
 
         # ✅ Step 2: Save Data to Temporary CSV File
         df = df[[
@@ -128,10 +114,13 @@ def insert_data(df):
             cursor.copy_expert(copy_sql, f)
 
         conn.commit()
-        print(f"✅ Successfully inserted {len(df)} rows into scrip_master.")
+        logger.info("✅ Successfully inserted %s rows into scrip_master.", len(df))
+
+        # ✅ Every cached scrip lookup / search / filter result is now stale — one INCR retires them all
+        return bump_generation(SCRIP_DATA)
 
     except Exception as e:
-        print(f"❌ Error inserting data using COPY: {e}")
+        logger.error("❌ Error inserting data using COPY: %s", e)
     finally:
         cursor.close()
         conn.close()
@@ -141,13 +130,29 @@ def schedule_csv_update():
     if fetch_csv():
         df = load_csv()
         if df is not None:
-            insert_data(df)
-            print("✅ CSV update completed.")
-
-# ✅ Scheduler for Auto Update at 8:30 AM
-scheduler = BackgroundScheduler()
-scheduler.add_job(schedule_csv_update, "cron", hour=8, minute=30)  # Runs daily at 08:30 AM
-scheduler.start()
+            generation = insert_data(df)
+            if generation:
+                # ✅ Built from the frame already in memory; other processes rebuild on the generation bump
+                contract_index.build_from_frame(df, generation)
+            logger.info("✅ CSV update completed.")
+
+# ✅ Scheduler for Auto Update at 8:30 AM (started explicitly — never at import, so workers don't each spawn one)
+scheduler = None
+
+def start_scheduler():
+    global scheduler
+    if scheduler is None:
+        scheduler = BackgroundScheduler()
+        scheduler.add_job(schedule_csv_update, "cron", hour=8, minute=30)  # Runs daily at 08:30 AM
+        scheduler.start()
+        logger.info("✅ Scrip master scheduler started (daily 08:30)")
+    return scheduler
+
+def stop_scheduler():
+    global scheduler
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+        scheduler = None
 
 # ✅ Step 6: Manually Trigger CSV Fetch & Store
 def fetch_and_store_csv():
@@ -1,37 +1,21 @@
 from fastapi import APIRouter, Query
-import psycopg2
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv(dotenv_path="api/app/.env")
-
-# Database connection details
-DB_HOST = os.getenv("DB_HOST")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_PORT = os.getenv("DB_PORT")
+from api.app import db
+from api.app.serialization import FastJSONResponse
+from api.app.cache import get_cache, cached, SCRIP_DATA
 
 # ✅ Use APIRouter to properly register routes
 router = APIRouter()
 
+# ✅ Result cache for scrip_master / search_table queries (also used by /search/)
+results_cache = get_cache("scrip_queries", redis_ttl=86400, local_ttl=300)
+
 def get_db_connection():
-    """Creates and returns a database connection."""
-    return psycopg2.connect(
-        host=DB_HOST,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        port=DB_PORT
-    )
+    """Borrow a pooled database connection (close() returns it to the pool)."""
+    return db.get_connection()
 
-@router.get("/get-data/")
-def get_data(
-    instrument: str = Query(None, description="Filter by instrument"),
-    exchange: str = Query(None, description="Filter by exchange")
-):
-    """Fetch filtered data from the database."""
+# ✅ Filter results change only when scrip_master reloads: cached per (generation, filters)
+@cached(results_cache, key=lambda instrument, exchange: f"get-data:{instrument}:{exchange}", generation=SCRIP_DATA)
+def query_scrip_master(instrument, exchange):
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -58,7 +42,7 @@ def get_data(
     cursor.close()
     conn.close()
 
-    response = [
+    return [
         {
             "exchange": row[0],
             "instrument": row[1],
@@ -69,4 +53,15 @@ def get_data(
         for row in data
     ]
 
-    return {"data": response}
+@router.get("/get-data/")
+def get_data(
+    instrument: str = Query(None, description="Filter by instrument"),
+    exchange: str = Query(None, description="Filter by exchange")
+):
+    """Fetch filtered data from the database."""
+    # ✅ Normalized so "optidx", " OPTIDX " and "OPTIDX" share one cache entry
+    instrument = instrument.strip().upper() if instrument else None
+    exchange = exchange.strip().upper() if exchange else None
+
+    # ✅ Rendered directly (dates included) — skips FastAPI's generic encoder pass
+    return FastJSONResponse({"data": query_scrip_master(instrument, exchange)})
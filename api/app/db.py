@@ -0,0 +1,105 @@
+import threading
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import ThreadedConnectionPool
+from api.app import config
+from api.app.logger import get_logger
+from api.app.lifecycle import register_warmup, register_shutdown
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(config.DB_POOL_MAX)  # ✅ Wait for a free connection instead of PoolError
+
+
+def _connect_kwargs():
+    if config.DATABASE_URL:
+        return {"dsn": config.DATABASE_URL}
+    return {
+        "host": config.DB_HOST,
+        "dbname": config.DB_NAME,
+        "user": config.DB_USER,
+        "password": config.DB_PASSWORD,
+        "port": config.DB_PORT,
+    }
+
+
+def get_pool():
+    """Create the per-process connection pool on first use (never at import)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(config.DB_POOL_MIN, config.DB_POOL_MAX, **_connect_kwargs())
+                logger.info("✅ Database pool ready (%d-%d connections)", config.DB_POOL_MIN, config.DB_POOL_MAX)
+    return _pool
+
+
+@register_warmup("database pool")
+def warm_pool():
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    finally:
+        conn.close()
+
+
+@register_shutdown("database pool")
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+# ✅ Pooled Connection: same API as a psycopg2 connection, but close() returns it to the pool
+class PooledConnection:
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self._raw.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._raw.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        if self._raw is None:
+            return
+        raw, self._raw = self._raw, None
+        broken = bool(raw.closed)
+        if not broken and raw.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                raw.rollback()  # ✅ Never hand the next caller a half-finished transaction
+            except psycopg2.Error:
+                broken = True
+        self._pool.putconn(raw, close=broken)
+        _slots.release()
+
+    def __del__(self):
+        if self._raw is not None:
+            self.close()
+
+
+def direct_connection():
+    """Unpooled connection for maintenance work (autocommit DDL, migrations)."""
+    return psycopg2.connect(**_connect_kwargs())
+
+
+def get_connection():
+    """Borrow a connection from the pool; call `close()` to give it back."""
+    pool = get_pool()
+    _slots.acquire()
+    try:
+        return PooledConnection(pool, pool.getconn())
+    except Exception:
+        _slots.release()
+        raise
@@ -1,40 +1,24 @@
 from fastapi import APIRouter, HTTPException, Query
-import psycopg2
-import os
-from dotenv import load_dotenv
-
-# ✅ Load environment variables
-load_dotenv(dotenv_path="api/app/.env")
-
-# ✅ Database connection details
-DB_HOST = os.getenv("DB_HOST")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_PORT = os.getenv("DB_PORT")
+from api.app import db
+from api.app.logger import get_logger
+from api.app.cache import get_cache, cached, SCRIP_DATA
 
 # ✅ Create FastAPI router
 router = APIRouter()
 
-# ✅ Function to establish a database connection
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ search_table rarely changes: keep lookups in-process, shared via Redis, keyed by the scrip data generation
+scrip_cache = get_cache("scrip_details", redis_ttl=86400, local_ttl=300)
+
+# ✅ Function to borrow a pooled database connection
 def get_db_connection():
-    return psycopg2.connect(
-        host=DB_HOST,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        port=DB_PORT
-    )
+    return db.get_connection()
 
-# ✅ API Route to Get Scrip Details
-@router.get("/get-scrip-details/")
-def get_scrip_details(
-    security_id: int = Query(..., description="Security ID"),
-    exchange: str = Query(..., description="Exchange"),
-    segment: str = Query(..., description="Segment")
-):
-    """Fetch scrip details from `search_table` based on `security_id`, `exchange`, and `segment`"""
-    
+# ✅ Cached search_table lookup (None when the scrip is unknown — not cached)
+@cached(scrip_cache, generation=SCRIP_DATA)
+def lookup_scrip_details(security_id: int, exchange: str, segment: str):
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -44,9 +28,8 @@ def get_scrip_details(
         WHERE sem_smst_security_id = %s AND exchange = %s AND segment = %s
         LIMIT 1;
     """
-    
-    print(f"📌 Running Query: {query}")
-    print(f"📌 Query Params: security_id={security_id}, exchange={exchange}, segment={segment}")
+
+    logger.debug("📌 Scrip details lookup: security_id=%s, exchange=%s, segment=%s", security_id, exchange, segment)
 
     cursor.execute(query, (security_id, exchange, segment))
     result = cursor.fetchone()
@@ -55,10 +38,7 @@ def get_scrip_details(
     conn.close()
 
     if not result:
-        print(f"❌ Scrip {security_id} not found in search_table!")
-        raise HTTPException(status_code=404, detail="Scrip not found in search_table")
-
-    print(f"✅ Found Scrip: {result}")
+        return None
 
     return {
         "security_id": result[0],
@@ -66,3 +46,21 @@ def get_scrip_details(
         "enum": result[2],       # ✅ Enum ID
         "alias": result[3]       # ✅ Trading Symbol Alias
     }
+
+# ✅ API Route to Get Scrip Details
+@router.get("/get-scrip-details/")
+def get_scrip_details(
+    security_id: int = Query(..., description="Security ID"),
+    exchange: str = Query(..., description="Exchange"),
+    segment: str = Query(..., description="Segment")
+):
+    """Fetch scrip details from `search_table` based on `security_id`, `exchange`, and `segment`"""
+    details = lookup_scrip_details(security_id, exchange, segment)
+
+    if not details:
+        logger.warning("❌ Scrip %s not found in search_table!", security_id)
+        raise HTTPException(status_code=404, detail="Scrip not found in search_table")
+
+    logger.debug("✅ Found Scrip: %s", details)
+
+    return details
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from starlette.concurrency import run_in_threadpool
+from api.app import config
+from api.app.lifecycle import register_warmup, register_shutdown
+from api.app.rate_limit import RateLimiter
+from api.app.circuit_breaker import CircuitBreaker, CircuitOpenError, Deadline
+from api.app.logger import get_logger, log_sampled
+from api.app.metrics import UPSTREAM_LATENCY, UPSTREAM_RESPONSES, UPSTREAM_RATE_LIMITED
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ API URLs
+OPTION_CHAIN_URL = "https://api.dhan.co/v2/optionchain"
+EXPIRY_LIST_URL = "https://api.dhan.co/v2/optionchain/expirylist"
+
+# ✅ Headers for API requests
+HEADERS = {
+    "access-token": config.ACCESS_TOKEN,
+    "client-id": config.CLIENT_ID,
+    "Content-Type": "application/json",
+}
+
+# ✅ Cluster-wide upstream budget for /optionchain calls
+OPTION_CHAIN_BUDGET = RateLimiter("dhan:optionchain", config.DHAN_OPTIONCHAIN_PER_SEC, 1)
+
+# ✅ One breaker for the whole Dhan API, shared by every worker & tracker process
+BREAKER = CircuitBreaker(
+    "dhan",
+    failures=config.DHAN_BREAKER_FAILURES,
+    window=config.DHAN_BREAKER_WINDOW,
+    cooldown=config.DHAN_BREAKER_COOLDOWN,
+    probe_timeout=config.DHAN_TIMEOUT,
+)
+
+
+class UpstreamUnavailable(Exception):
+    """Dhan did not answer within the deadline (or the breaker is open)."""
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared keep-alive session, created on first use (saves a TLS handshake per request)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(HEADERS)
+                session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+                _session = session
+    return _session
+
+
+@register_warmup("dhan http session")
+def warm_session():
+    get_session()
+
+
+@register_shutdown("dhan http session")
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def post(url, payload, timeout=None):
+    return get_session().post(url, json=payload, timeout=timeout or config.DHAN_TIMEOUT)
+
+
+# ✅ Guarded call: breaker → budget → bounded attempts, all inside one deadline
+async def fetch_data(url, payload, endpoint, deadline: Deadline = None, retries=3, budget=None, backoff=1.0):
+    """POST to Dhan and return the response's `data`.
+
+    Raises `UpstreamUnavailable` on an open breaker, an exhausted deadline or
+    repeated failures. 429s back off without counting against the breaker;
+    connection errors, timeouts and 5xx count as failures.
+    """
+    deadline = deadline or Deadline(config.DHAN_DEADLINE)
+    status = None
+    for attempt in range(retries):
+        try:
+            BREAKER.check()
+        except CircuitOpenError as e:
+            raise UpstreamUnavailable(str(e)) from e
+
+        if budget is not None and not await budget.acquire(timeout=deadline.remaining()):
+            raise UpstreamUnavailable("rate budget exhausted within deadline")
+        if deadline.expired:
+            break
+
+        try:
+            with UPSTREAM_LATENCY.time(endpoint=endpoint):
+                response = await run_in_threadpool(post, url, payload, min(config.DHAN_TIMEOUT, deadline.remaining()))
+            status = response.status_code
+        except requests.RequestException as e:
+            status = 0  # ✅ Connection error / timeout: no response object at all
+            log_sampled(logger, logging.WARNING, f"conn:{endpoint}", "⚠️ Dhan %s connection error: %s", endpoint, e)
+        UPSTREAM_RESPONSES.inc(endpoint=endpoint, status=status)
+
+        if status == 429:
+            UPSTREAM_RATE_LIMITED.inc(endpoint=endpoint)
+        elif status == 0 or status >= 500:
+            BREAKER.record_failure()
+        else:
+            BREAKER.record_success()  # ✅ Upstream answered; 4xx is the request's fault, not an outage
+            response.raise_for_status()
+            return response.json().get("data")
+
+        delay = min(backoff * 2 ** attempt, deadline.remaining())
+        if delay <= 0:
+            break
+        await asyncio.sleep(delay)
+
+    raise UpstreamUnavailable(f"Dhan {endpoint} unavailable (last status {status})")
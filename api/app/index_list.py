@@ -1,17 +1,11 @@
-import os
-import psycopg2
 import pandas as pd
 from fastapi import FastAPI, HTTPException
-from dotenv import load_dotenv
+from api.app import db
+from api.app.logger import get_logger
+from api.app.cache import bump_generation, SCRIP_DATA
 
-# ✅ Load environment variables
-load_dotenv()
-
-# ✅ Database connection details
-DB_HOST = os.getenv("DB_HOST")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
+# ✅ Module Logger
+logger = get_logger(__name__)
 
 # ✅ CSV File Path
 CSV_FILE_PATH = "data/Index-list.csv"
@@ -25,7 +19,7 @@ app = FastAPI()
 
 # ✅ Function to establish database connection
 def get_db_connection():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD)
+    return db.get_connection()
 
 # ✅ API Endpoint: Create `index_list` Table
 @app.post("/api/index-list/create-table/")
@@ -70,9 +64,9 @@ def create_index_list_table():
                     cur.execute(add_constraint_query)
 
                 conn.commit()
-        print(f"✅ Table '{INDEX_LIST_TABLE}' created and unique constraint ensured.")
+        logger.info("✅ Table '%s' created and unique constraint ensured.", INDEX_LIST_TABLE)
     except Exception as e:
-        print(f"⚠️ Error in table creation: {e}")
+        logger.warning("⚠️ Error in table creation: %s", e)
 
 # ✅ API Endpoint: Load CSV Data
 @app.post("/api/index-list/load-data/")
@@ -90,6 +84,7 @@ def load_csv_to_table():
                     """
                     cur.execute(insert_query, (row["Index"], row["attribute"], row["Name"], row["trading_symbol"], row["Weightage (%)"]))
                 conn.commit()
+        bump_generation(SCRIP_DATA)
         return {"message": f"✅ Data from {CSV_FILE_PATH} loaded successfully into '{INDEX_LIST_TABLE}'."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"⚠️ Error in loading CSV data: {e}")
@@ -111,6 +106,7 @@ def update_index_list_table():
             with conn.cursor() as cur:
                 cur.execute(update_query)
                 conn.commit()
+        bump_generation(SCRIP_DATA)
         return {"message": f"✅ '{INDEX_LIST_TABLE}' updated with data from '{SEARCH_TABLE}'."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"⚠️ Error in updating index list: {e}")
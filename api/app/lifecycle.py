@@ -0,0 +1,53 @@
+import time
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from api.app.logger import get_logger
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ Hook registries — modules add their own warm-up / shutdown steps
+_warmup_hooks = []
+_shutdown_hooks = []
+
+
+def register_warmup(name):
+    """Decorator: run `fn()` once at startup, after every router is imported."""
+    def decorator(fn):
+        _warmup_hooks.append((name, fn))
+        return fn
+    return decorator
+
+
+def register_shutdown(name):
+    def decorator(fn):
+        _shutdown_hooks.append((name, fn))
+        return fn
+    return decorator
+
+
+async def _run_hook(name, fn):
+    started = time.perf_counter()
+    try:
+        await run_in_threadpool(fn)
+        logger.info("✅ %s ready in %.0f ms", name, (time.perf_counter() - started) * 1000)
+    except Exception as e:  # ✅ A cold dependency must not stop the worker from serving
+        logger.warning("⚠️ %s failed: %s", name, e)
+
+
+async def run_warmup():
+    for name, fn in _warmup_hooks:
+        await _run_hook(f"warm-up: {name}", fn)
+
+
+async def run_shutdown():
+    for name, fn in reversed(_shutdown_hooks):
+        await _run_hook(f"shutdown: {name}", fn)
+
+
+# ✅ FastAPI Lifespan: explicit warm-up before serving, orderly teardown after
+@asynccontextmanager
+async def lifespan(app):
+    await run_warmup()
+    yield
+    await run_shutdown()
@@ -1,8 +1,16 @@
-import json
+import time
 import asyncio
 import websockets
-import redis
-from api.app.redis_config import redis_client
+from http import HTTPStatus
+from api.app.redis_config import async_redis_client
+from api.app.subscribers import registry as subscribers
+from api.app.logger import get_logger
+from api.app.metrics import (
+    CONTENT_TYPE_LATEST, WS_CONNECTIONS, WS_MESSAGES, WS_FANOUT_LATENCY, render_metrics
+)
+
+# ✅ Module Logger
+logger = get_logger(__name__)
 
 # ✅ WebSocket Clients
 clients = set()
@@ -10,19 +18,35 @@ clients = set()
 # ✅ Function to Broadcast Live Data
 async def broadcast_live_data():
     """Listen to Redis Pub/Sub and push live data to WebSocket clients."""
-    pubsub = redis_client.pubsub()
-    pubsub.subscribe("option_chain_live")
-
-    async for message in pubsub.listen():
-        if message["type"] == "message":
-            data = message["data"].decode("utf-8")
-            if clients:
-                await asyncio.gather(*[client.send(data) for client in clients])
+    while True:
+        pubsub = async_redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe("option_chain_live")
+            async for message in pubsub.listen():
+                if message["type"] != "message" or not clients:
+                    continue
+                data = message["data"]
+                if isinstance(data, bytes):
+                    data = data.decode("utf-8")
+                # ✅ One frame for every client, written without a coroutine per socket
+                started = time.perf_counter()
+                websockets.broadcast(clients, data)
+                WS_FANOUT_LATENCY.observe(time.perf_counter() - started, server="live_stream")
+                WS_MESSAGES.inc(len(clients), server="live_stream")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:  # ✅ Redis blip: resubscribe
+            logger.warning("⚠️ Live broadcast subscription failed, retrying: %s", e)
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.close()
 
 # ✅ WebSocket Connection Handler
 async def websocket_handler(websocket, path):
     """Handle new WebSocket connections."""
     clients.add(websocket)
+    WS_CONNECTIONS.set(len(clients), server="live_stream")
+    subscribers.add_all()  # ✅ Broadcast clients see every chain: keep all tracked chains polled
     try:
         async for message in websocket:
             pass
@@ -30,12 +54,22 @@ async def websocket_handler(websocket, path):
         pass
     finally:
         clients.remove(websocket)
+        WS_CONNECTIONS.set(len(clients), server="live_stream")
+        subscribers.remove_all()
+
+# ✅ Serve Prometheus Metrics on the same port (plain HTTP GET /metrics)
+async def serve_metrics(path, request_headers):
+    """Answer `/metrics` scrapes before the WebSocket handshake; let everything else upgrade."""
+    if path == "/metrics":
+        body = render_metrics().encode("utf-8")
+        return HTTPStatus.OK, [("Content-Type", CONTENT_TYPE_LATEST)], body
+    return None
 
 # ✅ Run WebSocket Server
 async def run_websocket_server():
     """Start WebSocket server for real-time streaming."""
-    server = await websockets.serve(websocket_handler, "0.0.0.0", 8765)
-    print("✅ WebSocket Server Running on ws://0.0.0.0:8765")
+    server = await websockets.serve(websocket_handler, "0.0.0.0", 8765, process_request=serve_metrics)
+    logger.info("✅ WebSocket Server Running on ws://0.0.0.0:8765")
     await asyncio.gather(server.wait_closed(), broadcast_live_data())
 
 if __name__ == "__main__":
@@ -1,5 +1,7 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 
 # ✅ Import existing routers
 from api.app.auth import router as auth_router
@@ -7,12 +9,47 @@ from api.app.data_api import router as data_router
 from api.app.search import router as search_router
 from api.app.option_chain import router as option_chain_router
 from api.app.dhan_api_input import router as dhan_router
+from api.app.snapshot_stream import router as snapshot_router
+from api.app.cache import router as cache_router
+from api.app.contract_index import router as contract_router
+
+from api.app.metrics import CONTENT_TYPE_LATEST, render_metrics
+from api.app.session import require_session
+from api.app.lifecycle import lifespan, register_warmup, register_shutdown
+from api.app.serialization import FastJSONResponse, COMPRESS_MIN_BYTES
+from api.app import config
 
 # ✅ Fix Import for `oca_live_tracker`
 from api.analysis.oca_live_tracker import router as live_tracker_router
+from api.analysis.strike_series import router as strike_series_router
+from api.analysis.fo_scanner import router as screener_router
+from api.analysis.alert_engine import router as alert_router
+
+# ✅ Scrip master scheduler: only in the process started with RUN_SCHEDULER=1 (pandas/apscheduler load lazily)
+if config.RUN_SCHEDULER:
+    @register_warmup("scrip master scheduler")
+    def start_csv_scheduler():
+        from api.app.csv_loader import start_scheduler
+        from api.analysis.parquet_archive import schedule_export
+        schedule_export(start_scheduler())  # ✅ Nightly Parquet archive shares the scheduler
+
+    @register_shutdown("scrip master scheduler")
+    def stop_csv_scheduler():
+        from api.app.csv_loader import stop_scheduler
+        stop_scheduler()
+
+# ✅ TimescaleDB schema: only in the process started with RUN_MIGRATIONS=1 (or run `python -m api.app.timescale_schema`)
+if config.RUN_MIGRATIONS:
+    @register_warmup("timescale schema")
+    def apply_migrations():
+        from api.app.timescale_schema import migrate
+        migrate()
 
-# ✅ Initialize FastAPI App
-app = FastAPI()
+# ✅ Initialize FastAPI App (lifespan runs warm-up before the first request)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# ✅ Compress large responses (option chains) — small ones aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
 
 # ✅ Enable CORS for API Requests
 app.add_middleware(
@@ -23,15 +60,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ✅ Session Guard (opt-in until the frontend sends tokens): REQUIRE_SESSION=1
+protected = [Depends(require_session)] if config.REQUIRE_SESSION else []
+
 # ✅ Register API Routers
 app.include_router(auth_router, prefix="/api")
-app.include_router(data_router, prefix="/api")
-app.include_router(search_router, prefix="/api")
-app.include_router(option_chain_router, prefix="/api")
-app.include_router(live_tracker_router, prefix="/api")  # ✅ Ensure this works
-app.include_router(dhan_router, prefix="/api")
+app.include_router(data_router, prefix="/api", dependencies=protected)
+app.include_router(search_router, prefix="/api", dependencies=protected)
+app.include_router(option_chain_router, prefix="/api", dependencies=protected)
+app.include_router(live_tracker_router, prefix="/api", dependencies=protected)  # ✅ Ensure this works
+app.include_router(dhan_router, prefix="/api", dependencies=protected)
+app.include_router(snapshot_router, prefix="/api", dependencies=protected)
+app.include_router(cache_router, prefix="/api", dependencies=protected)
+app.include_router(strike_series_router, prefix="/api", dependencies=protected)
+app.include_router(contract_router, prefix="/api", dependencies=protected)
+app.include_router(screener_router, prefix="/api", dependencies=protected)
+app.include_router(alert_router, prefix="/api", dependencies=protected)
 
 # ✅ API Health Check Route
 @app.get("/api/status")
 def status():
     return {"message": "✅ ANJNI Backend Running!"}
+
+# ✅ Prometheus Metrics (per worker process)
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,229 @@
+import time
+import threading
+from bisect import bisect_left
+
+# ✅ Default latency buckets (seconds) — tuned for upstream calls, DB inserts & WebSocket fan-out
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# ✅ Content type expected by Prometheus scrapers
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    """Render a `{a="x",b="y"}` label block (empty string when there are no labels)."""
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(value):
+    """Render numbers the way Prometheus expects (`+Inf`, integers without `.0`)."""
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+# ✅ Base Metric (label handling shared by every type)
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+# ✅ Counter: monotonically increasing totals (requests, 429s, rows inserted)
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+# ✅ Gauge: point-in-time values (active connections, tracked scrips)
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+# ✅ Histogram: latency distributions with fixed cumulative buckets
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts..., +Inf count], sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def time(self, **labels):
+        """Context manager that observes the elapsed wall time of its block."""
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            items = [(key, (list(state[0]), state[1])) for key, state in self._values.items()]
+        for labelvalues, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, labelvalues, ("le", _format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+# ✅ Process-wide Registry (each uvicorn worker exposes its own numbers)
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing  # ✅ Re-imports (reloader, tests) reuse the same metric
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render_metrics():
+    """Return every registered metric in Prometheus text exposition format."""
+    return REGISTRY.render()
+
+
+# ✅ Shared Hot-Path Metrics
+UPSTREAM_LATENCY = histogram(
+    "dhan_request_duration_seconds", "Latency of Dhan API requests", ("endpoint",)
+)
+UPSTREAM_RESPONSES = counter(
+    "dhan_responses_total", "Dhan API responses by HTTP status (0 = connection error)", ("endpoint", "status")
+)
+UPSTREAM_RATE_LIMITED = counter(
+    "dhan_rate_limited_total", "Dhan API 429 responses", ("endpoint",)
+)
+CACHE_REQUESTS = counter(
+    "redis_cache_requests_total", "Redis cache lookups by result (hit/miss)", ("cache", "result")
+)
+CACHE_WRITES = counter(
+    "redis_cache_writes_total", "Redis cache writes", ("cache",)
+)
+DB_INSERT_LATENCY = histogram(
+    "option_chain_insert_duration_seconds", "Duration of insert_option_chain batches"
+)
+DB_INSERT_ROWS = counter(
+    "option_chain_insert_rows_total", "Strikes written to option_data"
+)
+DB_ERRORS = counter(
+    "db_errors_total", "Database errors by operation", ("operation",)
+)
+SEARCH_LATENCY = histogram(
+    "search_duration_seconds", "Latency of /search/ by match type", ("match",)
+)
+TRACKED_SCRIPS = gauge(
+    "live_tracker_tracked_scrips", "Scrips currently in the tracked_scrips set"
+)
+LIVE_PUBLISHES = counter(
+    "live_option_chain_publishes_total", "Snapshots published on option_chain_live"
+)
+WS_CONNECTIONS = gauge(
+    "websocket_active_connections", "Open WebSocket connections", ("server",)
+)
+WS_MESSAGES = counter(
+    "websocket_messages_sent_total", "WebSocket frames sent", ("server",)
+)
+WS_FANOUT_LATENCY = histogram(
+    "websocket_fanout_duration_seconds", "Time to push one update to every client", ("server",)
+)
@@ -1,33 +1,35 @@
-import os
+import time
 import asyncio
 import requests
-import json
-from dotenv import load_dotenv
-from fastapi import APIRouter, Query, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Query, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from api.app.redis_config import redis_client
+from api.app import dhan_client
 from api.app.option_database import insert_option_chain  # ✅ Importing DB insert function
 from api.app.dhan_api_input import get_scrip_details  # ✅ Fetch alias directly
-
-# ✅ Load environment variables
-load_dotenv(dotenv_path="api/app/.env")
-
-# ✅ Fetch credentials from .env
-ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
-CLIENT_ID = os.getenv("CLIENT_ID")
+from api.app.contract_index import get_index
+from api.app.dhan_client import UpstreamUnavailable
+from api.app.circuit_breaker import Deadline
+from api.app.config import DHAN_DEADLINE
+from api.app.logger import get_logger
+from api.app.serialization import dumps, loads, raw_object, RawJSONResponse
+from api.app.chain_projection import ChainProjection, IndexedChain, projection_params
+from api.app.metrics import counter, CACHE_WRITES
 
 # ✅ FastAPI Router
 router = APIRouter()
 
-# ✅ API URLs
-OPTION_CHAIN_URL = "https://api.dhan.co/v2/optionchain"
-EXPIRY_LIST_URL = "https://api.dhan.co/v2/optionchain/expirylist"
+# ✅ Module Logger
+logger = get_logger(__name__)
 
-# ✅ Headers for API requests
-HEADERS = {
-    "access-token": ACCESS_TOKEN,
-    "client-id": CLIENT_ID,
-    "Content-Type": "application/json",
-}
+# ✅ Metrics
+STALE_SERVED = counter("option_chain_stale_served_total", "Expiries answered from the last good chain", ("endpoint",))
+
+# ✅ API URLs (credentials & keep-alive session live in dhan_client)
+OPTION_CHAIN_URL = dhan_client.OPTION_CHAIN_URL
+EXPIRY_LIST_URL = dhan_client.EXPIRY_LIST_URL
 
 # ✅ Segment Mapping (Fixes Incorrect Querying)
 SEGMENT_MAPPING = {
@@ -40,139 +42,277 @@ SEGMENT_MAPPING = {
     "OPTSTK": "D",
 }
 
+# ✅ Last good copies, served (flagged stale) while Dhan is failing or the breaker is open
+LAST_GOOD_TTL = 24 * 3600
+LAST_GOOD_CHAIN_KEY = "option_chain:last_good:{}:{}"
+LAST_GOOD_EXPIRIES_KEY = "expiry_list:last_good:{}:{}"
+
+# ✅ Streaming formats for /get_option_chain/stream/
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
 # ✅ Fetch Expiry List
-async def fetch_expiry_list(security_id: int, exchange_segment: str):
-    """Retrieve all expiry dates for a given instrument."""
+async def fetch_expiry_list(security_id: int, exchange_segment: str, deadline: Deadline = None):
+    """Retrieve all expiry dates for a given instrument.
+
+    Falls back to the last list seen for the instrument while Dhan is down;
+    raises `UpstreamUnavailable` when there is none.
+    """
     payload = {"UnderlyingScrip": security_id, "UnderlyingSeg": exchange_segment}
+    last_good_key = LAST_GOOD_EXPIRIES_KEY.format(security_id, exchange_segment)
 
-    # 🔹 Print Payload for Debugging
-    print(f"\n📌 Fetch Expiry List Payload:\n{json.dumps(payload, indent=4)}\n")
+    logger.debug("📌 Fetch Expiry List Payload: %s", payload)
 
     try:
-        response = requests.post(EXPIRY_LIST_URL, headers=HEADERS, json=payload)
-        response.raise_for_status()
-        expiry_list = response.json().get("data", [])
-
-        if not expiry_list:
-            print(f"⚠️ No expiries received for {security_id}-{exchange_segment}")
-            return []
-
-        print(f"✅ Expiry List Fetched for {security_id}-{exchange_segment}: {expiry_list}")
-        return expiry_list
+        expiry_list = await dhan_client.fetch_data(EXPIRY_LIST_URL, payload, "expirylist", deadline) or []
+    except UpstreamUnavailable as e:
+        cached = redis_client.get(last_good_key)
+        if cached is None:
+            logger.error("❌ Expiry list unavailable for %s-%s: %s", security_id, exchange_segment, e)
+            raise
+        STALE_SERVED.inc(endpoint="expirylist")
+        logger.warning("⚠️ Serving last known expiry list for %s-%s: %s", security_id, exchange_segment, e)
+        return loads(cached)
     except requests.RequestException as e:
-        print(f"❌ Error fetching expiry list for {security_id}-{exchange_segment}: {e}")
+        logger.error("❌ Error fetching expiry list for %s-%s: %s", security_id, exchange_segment, e)
         return []
 
+    if not expiry_list:
+        logger.warning("⚠️ No expiries received for %s-%s", security_id, exchange_segment)
+        return []
+
+    redis_client.setex(last_good_key, LAST_GOOD_TTL, dumps(expiry_list))
+    logger.debug("✅ Expiry List Fetched for %s-%s: %s", security_id, exchange_segment, expiry_list)
+    return expiry_list
+
+# ✅ Underlying Alias (search_table), e.g. "NIFTY"
+def underlying_alias(security_id: int, exchange_segment: str) -> str:
+    corrected_segment = SEGMENT_MAPPING.get(exchange_segment, "E")
+    scrip_details = get_scrip_details(security_id, "NSE", corrected_segment)
+    return scrip_details.get("alias", f"Scrip-{security_id}")
+
+# ✅ Monthly Expiries from the Contract Index
+def monthly_expiries(underlying_symbol: str) -> set:
+    """ISO dates of the upcoming monthly contracts for an underlying (empty if scrip master has none).
+
+    Futures are only listed for monthly expiries, so their expiry dates are the monthly set.
+    """
+    return {expiry.isoformat() for expiry in get_index().future_expiries(underlying_symbol)}
+
 # ✅ Select Expiries to Prioritize
-def select_relevant_expiries(expiry_list):
+def select_relevant_expiries(expiry_list, monthly=None):
     """Select nearest expiry + monthly expiry for reduced API calls."""
     expiry_list = sorted(expiry_list)  # Sort to get nearest expiry first
     nearest_expiry = expiry_list[0] if expiry_list else None
     monthly_expiry = None
 
-    for expiry in expiry_list:
-        if expiry[-2:] == "27":  # ✅ Assuming monthly expiry ends in "27"
-            monthly_expiry = expiry
-            break
+    if monthly:
+        monthly_expiry = next((expiry for expiry in expiry_list if expiry in monthly), None)
+    elif nearest_expiry:
+        # ✅ No scrip master data: the last expiry in the nearest expiry's month is that month's contract
+        monthly_expiry = [expiry for expiry in expiry_list if expiry[:7] == nearest_expiry[:7]][-1]
+
+    selected_expiries = list(dict.fromkeys(filter(None, [nearest_expiry, monthly_expiry])))  # ✅ Valid & unique
+
+    logger.debug("📌 Selected Expiries for Option Chain Fetch: %s", selected_expiries)
+
+    return selected_expiries
+
+# ✅ Resolve the expiries a request asks for (explicit list, or nearest + monthly)
+async def resolve_expiries(security_id: int, exchange_segment: str, requested: Optional[str] = None, deadline: Deadline = None):
+    try:
+        expiry_list = await fetch_expiry_list(security_id, exchange_segment, deadline)
+    except UpstreamUnavailable:
+        raise HTTPException(status_code=503, detail="Dhan API unavailable, no cached expiries for this scrip")
+    if not expiry_list:
+        raise HTTPException(status_code=404, detail="No expiry dates found for given scrip")
 
-    selected_expiries = list(filter(None, [nearest_expiry, monthly_expiry]))  # ✅ Only return valid expiries
+    if requested:
+        wanted = [expiry.strip() for expiry in requested.split(",") if expiry.strip()]
+        unknown = [expiry for expiry in wanted if expiry not in expiry_list]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown expiries: {', '.join(unknown)}")
+        return list(dict.fromkeys(wanted))
 
-    # 🔹 Print Selected Expiries
-    print(f"\n📌 Selected Expiries for Option Chain Fetch:\n{selected_expiries}\n")
+    try:
+        alias = await run_in_threadpool(underlying_alias, security_id, exchange_segment)
+        monthly = await run_in_threadpool(monthly_expiries, alias)
+    except Exception as e:  # ✅ Scrip master unavailable: fall back to the calendar rule
+        logger.warning("⚠️ Monthly expiry lookup failed for %s-%s: %s", security_id, exchange_segment, e)
+        monthly = None
 
+    selected_expiries = select_relevant_expiries(expiry_list, monthly)
+    if not selected_expiries:
+        raise HTTPException(status_code=500, detail="No valid expiries found.")
     return selected_expiries
 
 # ✅ Fetch Option Chain Data for One Expiry
-async def fetch_option_chain(security_id: int, exchange_segment: str, expiry: str, retries=5, delay=5):
-    """Retrieve Option Chain Data for a given expiry with retry logic on 429 errors."""
+async def fetch_option_chain(security_id: int, exchange_segment: str, expiry: str, deadline: Deadline = None, encoded=False):
+    """Retrieve Option Chain Data for a given expiry within `deadline`.
+
+    With `encoded=True` the JSON bytes cached in Redis are returned instead of the dict.
+    Raises `UpstreamUnavailable` when Dhan cannot answer in time.
+    """
     payload = {
         "UnderlyingScrip": security_id,
         "UnderlyingSeg": exchange_segment,
         "Expiry": expiry  # ✅ Single expiry request
     }
 
-    # 🔹 Debugging API Calls
-    print(f"\n📌 DEBUG: Sending Option Chain API Request...\n"
-          f"🔹 Endpoint: {OPTION_CHAIN_URL}\n"
-          f"🔹 Headers: {HEADERS}\n"
-          f"🔹 Payload:\n{json.dumps(payload, indent=4)}\n")
-
-    for attempt in range(retries):
-        try:
-            response = requests.post(OPTION_CHAIN_URL, headers=HEADERS, json=payload)
-            response.raise_for_status()
-            option_chain_data = response.json().get("data", {})
-
-            if not option_chain_data:
-                print(f"⚠️ No option chain data received for {security_id}-{exchange_segment} Expiry: {expiry}")
-                return {}
-
-            # ✅ Corrected segment before fetching alias
-            corrected_segment = SEGMENT_MAPPING.get(exchange_segment, "E")
-
-            # ✅ Get alias directly from dhan_api_input.py
-            scrip_details = get_scrip_details(security_id, "NSE", corrected_segment)
-            underlying_symbol = scrip_details.get("alias", f"Scrip-{security_id}")
-
-            print(f"✅ Using Alias as Underlying Symbol: {underlying_symbol}")
-
-            # 🔹 Print Response Structure for Debugging
-            print(f"\n📌 Option Chain Response Structure ({expiry}):\n{json.dumps(option_chain_data, indent=4)}\n")
-
-            # ✅ Cache expiry data in Redis (5 minutes)
-            redis_key = f"option_chain:{security_id}:{expiry}"
-            redis_client.setex(redis_key, 300, json.dumps(option_chain_data))
-            print(f"✅ Option Chain Data Cached: {redis_key}")
-
-            # ✅ Save to TimescaleDB
-            insert_option_chain(underlying_symbol, expiry, option_chain_data)
-
-            return option_chain_data
-
-        except requests.exceptions.RequestException as e:
-            if response.status_code == 429:
-                print(f"⚠️ Rate limit hit for {security_id}-{exchange_segment} Expiry: {expiry}, retrying in {delay} sec...")
-                await asyncio.sleep(delay)
-                delay *= 2  # ✅ Exponential backoff
-            else:
-                print(f"❌ Error fetching option chain for {security_id}-{exchange_segment} Expiry: {expiry}: {e}")
-                break
-
-    print(f"❌ Failed to fetch option chain for {security_id}-{exchange_segment} Expiry: {expiry} after {retries} retries.")
-    return {}
+    # 🔹 Headers carry the access token — only the payload is ever logged
+    logger.debug("📌 Sending Option Chain API Request to %s: %s", OPTION_CHAIN_URL, payload)
+
+    # ✅ Shared upstream budget paces concurrent expiries; the breaker fails fast during outages
+    option_chain_data = await dhan_client.fetch_data(
+        OPTION_CHAIN_URL, payload, "optionchain", deadline, budget=dhan_client.OPTION_CHAIN_BUDGET,
+    )
+
+    if not option_chain_data:
+        logger.warning("⚠️ No option chain data received for %s-%s Expiry: %s", security_id, exchange_segment, expiry)
+        return b"" if encoded else {}
+
+    # ✅ Get alias directly from dhan_api_input.py (corrected segment)
+    underlying_symbol = await run_in_threadpool(underlying_alias, security_id, exchange_segment)
+
+    logger.debug("✅ Using Alias as Underlying Symbol: %s", underlying_symbol)
+
+    # 🔹 Summary only — dumping the full chain costs megabytes per minute at live polling rates
+    logger.debug("📌 Option Chain Response (%s): %d strikes", expiry, len(option_chain_data.get("oc", {})))
+
+    # ✅ Cache expiry data in Redis (5 minutes) + last good copy (1 day) for outages
+    redis_key = f"option_chain:{security_id}:{expiry}"
+    payload = dumps(option_chain_data)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.setex(redis_key, 300, payload)
+    pipe.hset(LAST_GOOD_CHAIN_KEY.format(security_id, expiry), mapping={"data": payload, "fetched_at": time.time()})
+    pipe.expire(LAST_GOOD_CHAIN_KEY.format(security_id, expiry), LAST_GOOD_TTL)
+    pipe.execute()
+    CACHE_WRITES.inc(cache="option_chain")
+    logger.debug("✅ Option Chain Data Cached: %s", redis_key)
+
+    # ✅ Save to TimescaleDB
+    await run_in_threadpool(insert_option_chain, underlying_symbol, expiry, option_chain_data)
+
+    return payload if encoded else option_chain_data
+
+# ✅ Last Good Chain: (JSON bytes, age in seconds), or (b"", None) if never fetched
+def last_good_chain(security_id: int, expiry: str):
+    data, fetched_at = redis_client.hmget(LAST_GOOD_CHAIN_KEY.format(security_id, expiry), "data", "fetched_at")
+    if not data:
+        return b"", None
+    return data, round(max(time.time() - float(fetched_at), 0.0), 1)
+
+# ✅ One expiry as JSON bytes (projected if asked) → (expiry, payload, age)
+async def fetch_expiry_payload(security_id: int, exchange_segment: str, expiry: str, projection: ChainProjection,
+                               deadline: Deadline = None):
+    """`age` is None for a fresh chain, or the seconds since the stale copy served instead
+    was fetched. `payload` is b"" when neither is available."""
+    try:
+        if projection.is_identity:
+            return expiry, await fetch_option_chain(security_id, exchange_segment, expiry, deadline, encoded=True), None
+        option_chain_data = await fetch_option_chain(security_id, exchange_segment, expiry, deadline)
+        return expiry, dumps(IndexedChain(option_chain_data).project(projection)) if option_chain_data else b"", None
+    except (UpstreamUnavailable, requests.RequestException) as e:
+        payload, age = await run_in_threadpool(last_good_chain, security_id, expiry)
+        logger.warning(
+            "⚠️ Option chain %s-%s Expiry %s unavailable (%s), %s",
+            security_id, exchange_segment, expiry, e, f"serving copy from {age:.0f} s ago" if payload else "no cached copy",
+        )
+        if payload:
+            STALE_SERVED.inc(endpoint="optionchain")
+    except HTTPException as e:  # ✅ e.g. scrip missing from search_table
+        logger.warning("⚠️ Option chain %s-%s Expiry %s unavailable: %s", security_id, exchange_segment, expiry, e.detail)
+        return expiry, b"", None
+
+    if payload and not projection.is_identity:  # ✅ Stale copies are stored full; project on the way out
+        payload = dumps(IndexedChain(loads(payload)).project(projection))
+    return expiry, payload, age
 
 # ✅ API Route to Fetch Option Chain Data
 @router.get("/get_option_chain/")
 async def get_option_chain(
     security_id: int = Query(..., description="Security ID of the instrument"),
     exchange_segment: str = Query(..., description="Exchange segment of the instrument"),
+    expiries: Optional[str] = Query(None, description="Comma-separated expiries (default: nearest + monthly)"),
+    projection: ChainProjection = Depends(projection_params),
 ):
-    """Fetch option chain data for the nearest expiry and next monthly expiry."""
-
-    expiry_list = await fetch_expiry_list(security_id, exchange_segment)
-    if not expiry_list:
-        raise HTTPException(status_code=404, detail="No expiry dates found for given scrip")
-
-    selected_expiries = select_relevant_expiries(expiry_list)
-    if not selected_expiries:
-        raise HTTPException(status_code=500, detail="No valid expiries found.")
-
-    option_chain_results = {}
-
-    for expiry in selected_expiries:
-        option_chain_data = await fetch_option_chain(security_id, exchange_segment, expiry)
-        if option_chain_data:
-            option_chain_results[expiry] = option_chain_data
-        await asyncio.sleep(3)  # ✅ Wait 3 sec before next API call (to avoid rate limits)
+    """Fetch option chain data for the nearest expiry and next monthly expiry.
+
+    Expiries are fetched concurrently, paced by the shared upstream budget,
+    within one DHAN_DEADLINE. `window` (strikes around ATM), `min_strike` /
+    `max_strike` and `fields` trim each chain before it is serialized.
+    Expiries served from the last good copy are listed in `stale` with their age in seconds.
+    """
+    deadline = Deadline(DHAN_DEADLINE)
+    selected_expiries = await resolve_expiries(security_id, exchange_segment, expiries, deadline)
+
+    results = await asyncio.gather(*[
+        fetch_expiry_payload(security_id, exchange_segment, expiry, projection, deadline) for expiry in selected_expiries
+    ])
+    option_chain_results = {expiry: payload for expiry, payload, _ in results if payload}
+    stale = {expiry: age for expiry, payload, age in results if payload and age is not None}
 
     if not option_chain_results:
         raise HTTPException(status_code=500, detail="Failed to fetch option chain data.")
 
-    # 🔹 Print Final Response Structure
-    print(f"\n📌 Final Response Structure:\n{json.dumps(option_chain_results, indent=4)}\n")
+    logger.info("📌 Option chain served for %s-%s: expiries %s", security_id, exchange_segment, list(option_chain_results))
 
-    return {
-        "security_id": security_id,
-        "exchange_segment": exchange_segment,
-        "option_chain": option_chain_results
-    }
+    # ✅ Chains were encoded once for Redis; splice those bytes straight into the response
+    return RawJSONResponse(raw_object([
+        ("security_id", dumps(security_id)),
+        ("exchange_segment", dumps(exchange_segment)),
+        ("option_chain", raw_object(option_chain_results.items())),
+        ("stale", dumps(stale)),
+    ]))
+
+# ✅ API Route to Stream Option Chains Expiry by Expiry
+@router.get("/get_option_chain/stream/")
+async def stream_option_chain(
+    security_id: int = Query(..., description="Security ID of the instrument"),
+    exchange_segment: str = Query(..., description="Exchange segment of the instrument"),
+    expiries: Optional[str] = Query(None, description="Comma-separated expiries (default: nearest + monthly)"),
+    stream_format: str = Query("ndjson", alias="format", description="ndjson or sse"),
+    projection: ChainProjection = Depends(projection_params),
+):
+    """Fetch expiries concurrently and stream each one as soon as it arrives.
+
+    NDJSON: one `{"expiry": ..., "data": {...}}` line per expiry.
+    SSE: one `expiry` event per expiry, then a `done` event.
+    Stale copies add `"stale": true, "age": <seconds>`; failed expiries are
+    sent with `"data": null, "error": ...`.
+    """
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    deadline = Deadline(DHAN_DEADLINE)
+    selected_expiries = await resolve_expiries(security_id, exchange_segment, expiries, deadline)
+
+    def frame(body: bytes) -> bytes:
+        if stream_format == "sse":
+            return b"event: expiry\ndata: " + body + b"\n\n"
+        return body + b"\n"
+
+    async def body():
+        pending = [
+            asyncio.ensure_future(fetch_expiry_payload(security_id, exchange_segment, expiry, projection, deadline))
+            for expiry in selected_expiries
+        ]
+        try:
+            for next_done in asyncio.as_completed(pending):
+                expiry, payload, age = await next_done
+                if payload and age is not None:
+                    yield frame(raw_object([
+                        ("expiry", dumps(expiry)), ("data", payload), ("stale", b"true"), ("age", dumps(age)),
+                    ]))
+                elif payload:
+                    yield frame(raw_object([("expiry", dumps(expiry)), ("data", payload)]))
+                else:
+                    yield frame(dumps({"expiry": expiry, "data": None, "error": "Failed to fetch option chain data."}))
+            if stream_format == "sse":
+                yield b"event: done\ndata: {}\n\n"
+        finally:
+            for task in pending:  # ✅ Client went away: stop remaining upstream calls
+                task.cancel()
+
+    # ✅ identity encoding keeps GZipMiddleware from buffering the stream
+    headers = {"Cache-Control": "no-cache", "Content-Encoding": "identity"}
+    return StreamingResponse(body(), media_type=STREAM_MEDIA_TYPES[stream_format], headers=headers)
@@ -1,66 +1,66 @@
-import psycopg2
-import os
-import json
-from dotenv import load_dotenv
 from fastapi import APIRouter, HTTPException
 from datetime import datetime
-
-# ✅ Load environment variables
-load_dotenv(dotenv_path="api/app/.env")
-
-# ✅ Fetch database credentials
-DB_CONN = os.getenv("DATABASE_URL")
+from api.app import db
+from api.app.logger import get_logger
+from api.app.metrics import DB_INSERT_LATENCY, DB_INSERT_ROWS, DB_ERRORS
 
 # ✅ Initialize FastAPI Router
 router = APIRouter()
 
+# ✅ Module Logger
+logger = get_logger(__name__)
+
 # ✅ Establish a connection function
 def get_db_connection():
-    """Create and return a database connection."""
+    """Borrow a pooled database connection."""
     try:
-        conn = psycopg2.connect(DB_CONN)
-        return conn
+        return db.get_connection()
     except Exception as e:
-        print(f"❌ Database Connection Error: {e}")
+        logger.error("❌ Database Connection Error: %s", e)
         return None
 
 # ✅ Function to insert option chain data into TimescaleDB
-def insert_option_chain(underlying, expiry, option_chain_data):
-    """Insert option chain data into TimescaleDB with batch processing."""
+def insert_option_chain(underlying, expiry, option_chain_data, timestamp=None, table="option_data"):
+    """Insert option chain data into TimescaleDB with batch processing.
+
+    `timestamp` defaults to now(); replays pass the snapshot's own time (and usually their own `table`).
+    """
     if not option_chain_data:
-        print(f"⚠️ No data to insert for {underlying} - {expiry}")
+        logger.warning("⚠️ No data to insert for %s - %s", underlying, expiry)
         return
 
     conn = get_db_connection()
     if not conn:
-        print("❌ Skipping database insertion due to connection failure.")
+        DB_ERRORS.inc(operation="connect")
+        logger.error("❌ Skipping database insertion due to connection failure.")
         return
 
     cursor = conn.cursor()
 
-    print(f"🔄 Inserting data for {underlying} - Expiry {expiry}")
+    logger.debug("🔄 Inserting data for %s - Expiry %s", underlying, expiry)
 
-    insert_query = """
-        INSERT INTO option_data 
+    insert_query = f"""
+        INSERT INTO {table} 
         (timestamp, underlying, expiry, strike, ce_oi, pe_oi, ce_iv, pe_iv, ce_price, pe_price, 
          ce_delta, pe_delta, ce_theta, pe_theta, ce_gamma, pe_gamma, ce_vega, pe_vega, 
          ce_top_ask_price, pe_top_ask_price, ce_top_ask_quantity, pe_top_ask_quantity, 
          ce_top_bid_price, pe_top_bid_price, ce_top_bid_quantity, pe_top_bid_quantity, 
          ce_previous_close_price, pe_previous_close_price, ce_previous_oi, pe_previous_oi, 
          ce_previous_volume, pe_previous_volume, volume)
-        VALUES (now(), %s, %s, %s, %s, %s, %s, %s, %s, %s, 
+        VALUES ({"%s" if timestamp else "now()"}, %s, %s, %s, %s, %s, %s, %s, %s, %s, 
                 %s, %s, %s, %s, %s, %s, %s, %s, 
                 %s, %s, %s, %s, %s, %s, %s, %s, 
                 %s, %s, %s, %s, %s, %s, %s)
     """
 
     batch_data = []
+    prefix = (timestamp,) if timestamp else ()
 
     for strike, data in option_chain_data.get("oc", {}).items():
         ce = data.get("ce", {})
         pe = data.get("pe", {})
 
-        batch_data.append((
+        batch_data.append(prefix + (
             underlying, expiry, float(strike),
             ce.get("oi", 0), pe.get("oi", 0),
             ce.get("implied_volatility", 0), pe.get("implied_volatility", 0),
@@ -80,13 +80,16 @@ def insert_option_chain(underlying, expiry, option_chain_data):
         ))
 
     try:
-        cursor.executemany(insert_query, batch_data)  # ✅ Batch insert for efficiency
-        conn.commit()
-        print(f"✅ Successfully inserted {len(batch_data)} strikes for expiry {expiry} ({underlying})")
+        with DB_INSERT_LATENCY.time():
+            cursor.executemany(insert_query, batch_data)  # ✅ Batch insert for efficiency
+            conn.commit()
+        DB_INSERT_ROWS.inc(len(batch_data))
+        logger.debug("✅ Successfully inserted %d strikes for expiry %s (%s)", len(batch_data), expiry, underlying)
 
     except Exception as e:
         conn.rollback()  # ✅ Rollback in case of failure
-        print(f"❌ Database Insertion Error: {e}")
+        DB_ERRORS.inc(operation="insert_option_chain")
+        logger.error("❌ Database Insertion Error: %s", e)
 
     finally:
         cursor.close()
@@ -0,0 +1,90 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from api.app.logger import get_logger
+from api.app.metrics import histogram, counter, gauge
+from api.app.lifecycle import register_warmup, register_shutdown
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ Pool Settings
+#   BCRYPT_WORKERS     — concurrent bcrypt operations per API worker (keep below CPU count)
+#   BCRYPT_MAX_PENDING — verifications allowed to wait for a slot before we shed load with 503
+#   BCRYPT_POOL        — "thread" (default; bcrypt releases the GIL) or "process"
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", 2))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", 32))
+BCRYPT_POOL = os.getenv("BCRYPT_POOL", "thread")
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# ✅ Metrics
+BCRYPT_LATENCY = histogram("bcrypt_duration_seconds", "Time spent in bcrypt hash/verify", ("operation",))
+BCRYPT_QUEUE = gauge("bcrypt_pending", "bcrypt operations running or waiting for the pool")
+BCRYPT_REJECTED = counter("bcrypt_rejected_total", "bcrypt operations shed because the pool was saturated")
+
+_executor = None
+_pending = 0
+
+
+def _get_executor():
+    """Dedicated pool so login bursts never occupy FastAPI's default threadpool."""
+    global _executor
+    if _executor is None:
+        if BCRYPT_POOL == "process":
+            _executor = ProcessPoolExecutor(max_workers=BCRYPT_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+@register_warmup("bcrypt pool")
+def warm_pool():
+    # ✅ Load the bcrypt backend and spin up the executor before the first login arrives
+    pwd_context.handler().get_backend()
+    _get_executor()
+
+
+@register_shutdown("bcrypt pool")
+def shutdown_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _verify(password, password_hash):
+    return pwd_context.verify(password, password_hash)
+
+
+def _hash(password):
+    return pwd_context.hash(password)
+
+
+async def _run(operation, fn, *args):
+    global _pending
+    if _pending >= BCRYPT_WORKERS + BCRYPT_MAX_PENDING:
+        BCRYPT_REJECTED.inc()
+        logger.warning("⚠️ bcrypt pool saturated (%d pending), shedding %s", _pending, operation)
+        raise HTTPException(status_code=503, detail="Login service busy, retry shortly", headers={"Retry-After": "1"})
+
+    _pending += 1
+    BCRYPT_QUEUE.set(_pending)
+    try:
+        loop = asyncio.get_running_loop()
+        with BCRYPT_LATENCY.time(operation=operation):
+            return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+        BCRYPT_QUEUE.set(_pending)
+
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    return await _run("verify", _verify, password, password_hash)
+
+
+async def hash_password(password: str) -> str:
+    return await _run("hash", _hash, password)
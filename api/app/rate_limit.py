@@ -0,0 +1,48 @@
+import time
+import asyncio
+from api.app.redis_config import redis_client
+
+
+# ✅ Fixed-window rate limiter shared by every worker through Redis
+class RateLimiter:
+    """Allow at most `limit` hits per `window` seconds for each key.
+
+    Counters live in Redis (`ratelimit:{name}:{key}:{window index}`), so the
+    budget is shared across uvicorn workers and tracker processes.
+    """
+
+    def __init__(self, name: str, limit: int, window: float):
+        self.name = name
+        self.limit = limit
+        self.window = window
+
+    def _window(self, now):
+        index = int(now // self.window)
+        return index, (index + 1) * self.window - now
+
+    def hit(self, key: str = "global"):
+        """Count one hit. Returns (allowed, seconds until the window resets)."""
+        index, reset_in = self._window(time.time())
+        redis_key = f"ratelimit:{self.name}:{key}:{index}"
+        pipe = redis_client.pipeline()
+        pipe.incr(redis_key)
+        pipe.expire(redis_key, int(self.window) + 1)
+        count = pipe.execute()[0]
+        return count <= self.limit, reset_in
+
+    def allow(self, key: str = "global") -> bool:
+        return self.hit(key)[0]
+
+    async def acquire(self, key: str = "global", timeout: float = None) -> bool:
+        """Wait (without blocking the loop) until a slot in the budget is free.
+
+        Returns False if no slot frees up within `timeout` seconds.
+        """
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            allowed, reset_in = self.hit(key)
+            if allowed:
+                return True
+            if give_up_at is not None and time.monotonic() + reset_in > give_up_at:
+                return False
+            await asyncio.sleep(reset_in)
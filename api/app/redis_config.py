@@ -1,10 +1,27 @@
 import redis
-import os
-from dotenv import load_dotenv
+import redis.asyncio as aioredis
+from api.app import config
+from api.app.lifecycle import register_warmup, register_shutdown
 
-load_dotenv(dotenv_path='api/app/.env')
-
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = os.getenv("REDIS_PORT", 6379)
+REDIS_HOST = config.REDIS_HOST
+REDIS_PORT = config.REDIS_PORT
 
+# ✅ redis-py connects lazily: nothing touches the network until the first command
 redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+
+# ✅ Raw-bytes client for binary values (strike series rings); shares nothing with the text client
+binary_redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=False)
+
+# ✅ Async client for blocking reads (XREAD BLOCK, pub/sub) inside the event loop
+async_redis_client = aioredis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+
+
+@register_warmup("redis")
+def warm_redis():
+    redis_client.ping()
+
+
+@register_shutdown("redis")
+def close_redis():
+    redis_client.close()
+    binary_redis_client.close()
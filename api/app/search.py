@@ -1,51 +1,59 @@
 from fastapi import APIRouter, HTTPException
-import psycopg2
-import os
 import re
-from dotenv import load_dotenv
+import time
 from rapidfuzz import fuzz, process
-
-# ✅ Load environment variables
-load_dotenv()
-
-# ✅ Database connection details
-DB_HOST = os.getenv("DB_HOST")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASS = os.getenv("DB_PASS")
-DB_PORT = os.getenv("DB_PORT")
+from api.app import db
+from api.app.logger import get_logger
+from api.app.metrics import SEARCH_LATENCY, DB_ERRORS
+from api.app.cache import get_cache, cached, SCRIP_DATA
 
 # ✅ Initialize FastAPI Router
 router = APIRouter()
 
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ Result cache for scrip_master / search_table queries (shared with /get-data/)
+results_cache = get_cache("scrip_queries", redis_ttl=86400, local_ttl=300)
+
 # ✅ Connect to PostgreSQL
 def connect_db():
-    """Establish a connection to the database."""
+    """Borrow a pooled database connection."""
     try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASS,
-            port=DB_PORT
-        )
-        return conn
+        return db.get_connection()
     except Exception as e:
-        print(f"❌ Database connection failed: {e}")
+        logger.error("❌ Database connection failed: %s", e)
         return None
 
-# ✅ Search API Endpoint (Retaining Output Format)
-@router.get("/search/")
-async def search_scrip(query: str):
-    """Search for a scrip based on a query and return compatible output."""
+# ✅ Search Results: search_table changes only on reloads, so results are cached per (generation, query)
+class SearchUnavailable(Exception):
+    pass
+
+def _rows_to_scrips(rows):
+    return [
+        {
+            "security_id": row[0],
+            "symbol_name": row[1] if row[1] else "N/A",
+            "trading_symbol": row[2] if row[2] else "N/A",
+            "exchange": row[3],
+            "segment": row[4],
+            "attribute": row[5],
+            "enum": row[6],
+            "alias": row[7],
+        }
+        for row in rows
+    ]
+
+@cached(results_cache, key=lambda query: f"search:{query}", generation=SCRIP_DATA)
+def run_search(query: str):
+    """Exact match first, then pattern match. Returns {"match": ..., "scrips": [...]}."""
     conn = connect_db()
     if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
+        DB_ERRORS.inc(operation="connect")
+        raise SearchUnavailable("Database connection failed")
 
     cursor = conn.cursor()
     try:
-        query = query.strip().upper()
-
         # ✅ Prioritize Exact Match First
         exact_match_sql = """
         SELECT sem_smst_security_id, COALESCE(symbol_name, 'N/A'), 
@@ -70,19 +78,7 @@ async def search_scrip(query: str):
         exact_results = cursor.fetchall()
 
         if exact_results:
-            scrips = []
-            for row in exact_results:
-                scrips.append({
-                    "security_id": row[0],
-                    "symbol_name": row[1] if row[1] else "N/A",
-                    "trading_symbol": row[2] if row[2] else "N/A",
-                    "exchange": row[3],
-                    "segment": row[4],
-                    "attribute": row[5],
-                    "enum": row[6],
-                    "alias": row[7],
-                })
-            return scrips  # ✅ Return immediately if we find exact matches
+            return {"match": "exact", "scrips": _rows_to_scrips(exact_results)}  # ✅ Return immediately if we find exact matches
 
         # ✅ If No Exact Match, Use Pattern Matching
         search_sql = """
@@ -106,28 +102,25 @@ async def search_scrip(query: str):
         """
         query_param = f"%{query}%"
         cursor.execute(search_sql, (query_param, query_param, query_param))
-        results = cursor.fetchall()
-
-        scrips = []
-        for row in results:
-            scrips.append({
-                "security_id": row[0],
-                "symbol_name": row[1] if row[1] else "N/A",
-                "trading_symbol": row[2] if row[2] else "N/A",
-                "exchange": row[3],
-                "segment": row[4],
-                "attribute": row[5],
-                "enum": row[6],
-                "alias": row[7],
-            })
+        return {"match": "pattern", "scrips": _rows_to_scrips(cursor.fetchall())}
 
-        conn.close()
-
-        return scrips  # ✅ Return pattern-matched results
+    finally:
+        cursor.close()
+        conn.close()  # ✅ Ensure DB connection is always closed
 
+# ✅ Search API Endpoint (Retaining Output Format)
+@router.get("/search/")
+async def search_scrip(query: str):
+    """Search for a scrip based on a query and return compatible output."""
+    started = time.perf_counter()
+    try:
+        result = run_search(query.strip().upper())
+    except SearchUnavailable as e:
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
-        print(f"❌ Error executing search: {e}")
+        DB_ERRORS.inc(operation="search")
+        logger.exception("❌ Error executing search: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        conn.close()  # ✅ Ensure DB connection is always closed
+    SEARCH_LATENCY.observe(time.perf_counter() - started, match=result["match"])
+    return result["scrips"]
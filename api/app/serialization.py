@@ -0,0 +1,62 @@
+import os
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi.responses import JSONResponse, Response
+
+# ✅ orjson when installed (several times faster, returns bytes); stdlib json otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ✅ Responses at least this large are gzip-compressed (GZipMiddleware in main.py)
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+
+
+def _default(value):
+    """Types psycopg2 hands back that neither encoder handles on its own."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    """Encode to compact UTF-8 JSON bytes, ready for Redis, HTTP bodies and WebSocket frames."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def raw_object(items) -> bytes:
+    """JSON object from (key, already-encoded value) pairs — cached payloads are embedded, never re-parsed."""
+    return b"{" + b",".join(dumps(str(key)) + b":" + _as_bytes(value) for key, value in items) + b"}"
+
+
+def raw_array(values) -> bytes:
+    return b"[" + b",".join(_as_bytes(value) for value in values) + b"]"
+
+
+def _as_bytes(value) -> bytes:
+    return value.encode("utf-8") if isinstance(value, str) else value
+
+
+# ✅ Default response class: skips the stdlib encoder for every route returning plain data
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+# ✅ Body is already JSON (cached payload / composed bytes): written as-is
+class RawJSONResponse(Response):
+    media_type = "application/json"
@@ -0,0 +1,146 @@
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+import threading
+from typing import Optional
+from dataclasses import dataclass
+from fastapi import Header, HTTPException, Query
+from api.app.redis_config import redis_client
+from api.app.logger import get_logger
+from api.app import config  # noqa: F401 — loads .env before SESSION_* are read
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ Session Settings
+SESSION_TTL = int(os.getenv("SESSION_TTL", 12 * 3600))  # ✅ One trading day
+SESSION_STATE_CACHE_SECONDS = float(os.getenv("SESSION_STATE_CACHE_SECONDS", 2))  # ✅ Max revocation lag per worker
+SESSION_SECRET = os.getenv("SESSION_SECRET")
+if not SESSION_SECRET:
+    # ⚠️ Tokens would not verify across workers/restarts — set SESSION_SECRET in production
+    SESSION_SECRET = secrets.token_urlsafe(32)
+    logger.warning("⚠️ SESSION_SECRET not set; using a random per-process secret")
+_SECRET_BYTES = SESSION_SECRET.encode()
+
+# ✅ Redis Keys
+#   session:user:{anjni_id}  → "<not_before epoch ms>" — present only for activated users with a live login
+#   session:revoked:{sid}    → "1" until the token would have expired anyway
+USER_KEY = "session:user:{}"
+REVOKED_KEY = "session:revoked:{}"
+
+
+@dataclass(frozen=True)
+class SessionClaims:
+    anjni_id: str
+    sid: str
+    issued_at: int   # ✅ epoch milliseconds (compared against the user's not-before)
+    expires_at: int  # ✅ epoch seconds
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(body: str) -> str:
+    return _b64encode(hmac.new(_SECRET_BYTES, body.encode(), hashlib.sha256).digest())
+
+
+# ✅ Issue a signed, expiring token (called once per successful login)
+def issue_session(anjni_id: str) -> dict:
+    now = time.time()
+    claims = {"sub": anjni_id, "sid": secrets.token_urlsafe(12), "iat": int(now * 1000), "exp": int(now) + SESSION_TTL}
+    body = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    token = f"{body}.{_sign(body)}"
+
+    # ✅ Cache activation state; keep an existing not-before so "logout everywhere" survives re-login
+    user_key = USER_KEY.format(anjni_id)
+    redis_client.set(user_key, redis_client.get(user_key) or "0", ex=SESSION_TTL)
+
+    return {"token": token, "token_type": "bearer", "expires_in": SESSION_TTL}
+
+
+def decode_token(token: str) -> Optional[SessionClaims]:
+    """Check signature and expiry only (pure CPU, no I/O)."""
+    try:
+        body, signature = token.split(".", 1)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(signature, _sign(body)):
+        return None
+    try:
+        claims = json.loads(_b64decode(body))
+    except ValueError:
+        return None
+    if claims.get("exp", 0) <= time.time():
+        return None
+    return SessionClaims(claims["sub"], claims["sid"], claims["iat"], claims["exp"])
+
+
+# ✅ Short-lived per-worker cache of Redis session state (sid → (checked_at, valid))
+_state_cache = {}
+_state_lock = threading.Lock()
+_STATE_CACHE_MAX = 50_000
+
+
+def _session_active(claims: SessionClaims) -> bool:
+    now = time.monotonic()
+    with _state_lock:
+        cached = _state_cache.get(claims.sid)
+    if cached and now - cached[0] < SESSION_STATE_CACHE_SECONDS:
+        return cached[1]
+
+    # ✅ One round-trip: revocation flag + user activation / not-before
+    revoked, not_before = redis_client.mget(REVOKED_KEY.format(claims.sid), USER_KEY.format(claims.anjni_id))
+    valid = not revoked and not_before is not None and claims.issued_at >= int(not_before)
+
+    with _state_lock:
+        if len(_state_cache) >= _STATE_CACHE_MAX:
+            _state_cache.clear()
+        _state_cache[claims.sid] = (now, valid)
+    return valid
+
+
+def verify_token(token: str) -> Optional[SessionClaims]:
+    """Signature + expiry + cached Redis state. No database query, no bcrypt."""
+    claims = decode_token(token)
+    if claims is None or not _session_active(claims):
+        return None
+    return claims
+
+
+def revoke_session(claims: SessionClaims):
+    ttl = max(claims.expires_at - int(time.time()), 1)
+    redis_client.set(REVOKED_KEY.format(claims.sid), "1", ex=ttl)
+    with _state_lock:
+        _state_cache.pop(claims.sid, None)
+
+
+def revoke_user(anjni_id: str):
+    """Invalidate every token issued to `anjni_id` so far (logout everywhere / deactivation)."""
+    redis_client.set(USER_KEY.format(anjni_id), str(int(time.time() * 1000) + 1), ex=SESSION_TTL)
+    with _state_lock:
+        _state_cache.clear()
+
+
+# ✅ FastAPI Dependency: `Authorization: Bearer <token>` (or `?token=` for WebSocket handshakes)
+def require_session(
+    authorization: Optional[str] = Header(None),
+    token: Optional[str] = Query(None, include_in_schema=False),
+) -> SessionClaims:
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing session token", headers={"WWW-Authenticate": "Bearer"})
+
+    claims = verify_token(token)
+    if claims is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired session", headers={"WWW-Authenticate": "Bearer"})
+    return claims
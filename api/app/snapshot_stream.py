@@ -0,0 +1,209 @@
+import os
+import re
+import time
+import asyncio
+from fastapi import APIRouter, Query, HTTPException, Depends
+from api.app.redis_config import redis_client, async_redis_client
+from api.app.serialization import dumps, loads, raw_array, raw_object, RawJSONResponse
+from api.app.chain_projection import ChainProjection, IndexedChain, projection_params
+from api.app.logger import get_logger
+from api.app.metrics import counter
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ FastAPI Router
+router = APIRouter()
+
+# ✅ Stream Settings: one capped stream per (security_id, expiry)
+STREAM_KEY = "snapshots:{}:{}"
+STREAM_MAXLEN = int(os.getenv("SNAPSHOT_STREAM_MAXLEN", 600))       # ✅ ~30 min at a 3 s cadence
+STREAM_IDLE_TTL = int(os.getenv("SNAPSHOT_STREAM_IDLE_TTL", 86400))  # ✅ Drop streams nobody writes to for a day
+HUB_QUEUE_SIZE = int(os.getenv("SNAPSHOT_HUB_QUEUE_SIZE", 32))       # ✅ Frames buffered per slow WebSocket client
+STREAM_ID = re.compile(r"\d+(-\d+)?", re.ASCII)                      # ✅ "ms-seq" or bare "ms"
+
+# ✅ Metrics
+STREAM_APPENDS = counter("snapshot_stream_appends_total", "Snapshots appended to Redis Streams")
+STREAM_READS = counter("snapshot_stream_reads_total", "Snapshot stream reads by kind", ("kind",))
+HUB_DROPS = counter("snapshot_hub_dropped_total", "Frames dropped from slow clients' queues (backfilled from the stream)")
+
+
+def stream_key(security_id, expiry) -> str:
+    return STREAM_KEY.format(security_id, expiry)
+
+
+# ✅ Writer side (tracker)
+def append_snapshot(pipe, security_id, expiry, payload):
+    """Queue XADD (approximately capped) on a pipeline; the stream id is in the pipeline result."""
+    key = stream_key(security_id, expiry)
+    pipe.xadd(key, {"data": payload}, maxlen=STREAM_MAXLEN, approximate=True)
+    pipe.expire(key, STREAM_IDLE_TTL)
+    STREAM_APPENDS.inc()
+
+
+# ✅ Reader side (WebSocket resume, analytics)
+def read_after(security_id, expiry, last_id, count=None, before=None):
+    """Entries strictly after `last_id` (and strictly before `before`), oldest first: [(stream_id, payload), ...]."""
+    STREAM_READS.inc(kind="after")
+    upper = f"({before}" if before else "+"
+    entries = redis_client.xrange(stream_key(security_id, expiry), min=f"({last_id}", max=upper, count=count)
+    return [(stream_id, fields["data"]) for stream_id, fields in entries]
+
+
+def read_window(security_id, expiry, seconds):
+    """Entries from the last `seconds` (stream ids start with the epoch-ms insert time)."""
+    STREAM_READS.inc(kind="window")
+    start = int((time.time() - seconds) * 1000)
+    entries = redis_client.xrange(stream_key(security_id, expiry), min=str(start), max="+")
+    return [(stream_id, fields["data"]) for stream_id, fields in entries]
+
+
+def latest(security_id, expiry):
+    """(stream_id, payload) of the newest snapshot, or None."""
+    STREAM_READS.inc(kind="latest")
+    entries = redis_client.xrevrange(stream_key(security_id, expiry), count=1)
+    if not entries:
+        return None
+    stream_id, fields = entries[0]
+    return stream_id, fields["data"]
+
+
+def first_id(security_id, expiry):
+    entries = redis_client.xrange(stream_key(security_id, expiry), count=1)
+    return entries[0][0] if entries else None
+
+
+def normalize_id(stream_id) -> str:
+    """Client-supplied stream id → "ms-seq" ("ms" alone means "ms-0"); ValueError if malformed."""
+    if not isinstance(stream_id, str) or not STREAM_ID.fullmatch(stream_id):
+        raise ValueError(f"Invalid stream id: {stream_id!r}")
+    return stream_id if "-" in stream_id else f"{stream_id}-0"
+
+
+def id_before(a, b) -> bool:
+    """Stream id ordering ("ms-seq")."""
+    a_ms, a_seq = (int(part) for part in a.split("-"))
+    b_ms, b_seq = (int(part) for part in b.split("-"))
+    return (a_ms, a_seq) < (b_ms, b_seq)
+
+
+def has_gap(security_id, expiry, last_id) -> bool:
+    """True when `last_id` itself was already trimmed, so entries after it may be missing too."""
+    oldest = first_id(security_id, expiry)
+    return oldest is not None and id_before(last_id, oldest)
+
+
+async def follow(security_id, expiry, last_id="$", block_ms=5000):
+    """Yield (stream_id, payload) forever, starting after `last_id`, using XREAD BLOCK."""
+    key = stream_key(security_id, expiry)
+    while True:
+        response = await async_redis_client.xread({key: last_id}, block=block_ms, count=100)
+        for _, entries in response or []:
+            for stream_id, fields in entries:
+                last_id = stream_id
+                yield stream_id, fields["data"]
+
+
+def envelope(stream_id, payload) -> str:
+    """WebSocket frame: the stored JSON is embedded as-is, never re-parsed."""
+    return f'{{"stream_id":"{stream_id}","data":{payload}}}'
+
+
+# ✅ One stream entry; frames are built lazily per projection and shared by every client that asks for it
+class Snapshot:
+    __slots__ = ("stream_id", "payload", "_indexed", "_frames")
+
+    def __init__(self, stream_id, payload):
+        self.stream_id = stream_id
+        self.payload = payload
+        self._indexed = None
+        self._frames = {}
+
+    def frame(self, projection: ChainProjection) -> str:
+        frame = self._frames.get(projection)
+        if frame is None:
+            if projection.is_identity:
+                frame = envelope(self.stream_id, self.payload)
+            else:
+                if self._indexed is None:
+                    self._indexed = IndexedChain(loads(self.payload))  # ✅ Parsed + indexed once per snapshot
+                frame = envelope(self.stream_id, dumps(self._indexed.project(projection)).decode("utf-8"))
+            self._frames[projection] = frame
+        return frame
+
+
+# ✅ Per-worker fan-out: one XREAD per chain, each Snapshot shared by every local socket
+class SnapshotHub:
+    def __init__(self, queue_size=HUB_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._queues = {}  # ✅ stream key → set of subscriber queues
+        self._pumps = {}   # ✅ stream key → asyncio.Task running follow()
+        self._dropped = set()  # ✅ Queues that lost a frame since their reader last checked
+
+    def subscribe(self, security_id, expiry) -> asyncio.Queue:
+        key = stream_key(security_id, expiry)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues.setdefault(key, set()).add(queue)
+        if key not in self._pumps or self._pumps[key].done():
+            self._pumps[key] = asyncio.ensure_future(self._pump(security_id, expiry))
+        return queue
+
+    def unsubscribe(self, security_id, expiry, queue):
+        key = stream_key(security_id, expiry)
+        queues = self._queues.get(key, set())
+        queues.discard(queue)
+        self._dropped.discard(queue)
+        if not queues:
+            self._queues.pop(key, None)
+            pump = self._pumps.pop(key, None)
+            if pump:
+                pump.cancel()
+
+    async def _pump(self, security_id, expiry):
+        key = stream_key(security_id, expiry)
+        last_id = "$"
+        while True:
+            try:
+                async for stream_id, payload in follow(security_id, expiry, last_id):
+                    last_id = stream_id
+                    snapshot = Snapshot(stream_id, payload)
+                    for queue in list(self._queues.get(key, ())):
+                        if queue.full():
+                            queue.get_nowait()  # ✅ Slow client: drop its oldest frame, latest chain wins
+                            self._dropped.add(queue)
+                            HUB_DROPS.inc()
+                        queue.put_nowait(snapshot)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # ✅ Redis blip: resume from the last delivered id
+                logger.warning("⚠️ Snapshot follower for %s failed, retrying: %s", key, e)
+                await asyncio.sleep(1)
+
+    def take_dropped(self, queue) -> bool:
+        """True (once) when frames were dropped from `queue`; the reader must backfill from the stream."""
+        if queue in self._dropped:
+            self._dropped.discard(queue)
+            return True
+        return False
+
+
+hub = SnapshotHub()
+
+
+# ✅ API Route: recent window straight from memory (no Postgres)
+@router.get("/option-chain/history/")
+def option_chain_history(
+    security_id: int = Query(..., description="Security ID of the underlying"),
+    expiry: str = Query(..., description="Expiry date (YYYY-MM-DD)"),
+    minutes: float = Query(15, gt=0, le=120, description="Window length in minutes"),
+    projection: ChainProjection = Depends(projection_params),
+):
+    entries = read_window(security_id, expiry, minutes * 60)
+    if not entries:
+        raise HTTPException(status_code=404, detail="No recent snapshots for this chain")
+    # ✅ Stored payloads are spliced into the body as-is
+    return RawJSONResponse(raw_object([
+        ("security_id", dumps(security_id)),
+        ("expiry", dumps(expiry)),
+        ("snapshots", raw_array(Snapshot(stream_id, payload).frame(projection) for stream_id, payload in entries)),
+    ]))
@@ -0,0 +1,98 @@
+import os
+import uuid
+import socket
+import asyncio
+from collections import Counter
+from api.app.redis_config import redis_client
+from api.app.logger import get_logger
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ Each WebSocket worker publishes its own counts under a short TTL, so a crashed
+#    worker's subscribers disappear on their own instead of pinning chains "hot" forever.
+SNAPSHOT_KEY = "ws:subscribers:{}"
+SNAPSHOT_PATTERN = "ws:subscribers:*"
+SNAPSHOT_INTERVAL = float(os.getenv("WS_SUBSCRIBER_SNAPSHOT_INTERVAL", 5))
+SNAPSHOT_TTL = int(SNAPSHOT_INTERVAL * 3)
+ALL_CHAINS = "*"  # ✅ Topic for clients that receive every chain (legacy live_stream broadcaster)
+ALERT_DEMAND_KEY = "alerts:demand"  # ✅ {"security_id:expiry": pending alerts}, kept by alert_engine
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def topic(security_id, expiry) -> str:
+    return f"{security_id}:{expiry}"
+
+
+# ✅ Worker-local counts (writer side: websocket servers)
+class SubscriberRegistry:
+    def __init__(self):
+        self.counts = Counter()
+        self._task = None
+
+    def add(self, security_id, expiry):
+        self._add(topic(security_id, expiry))
+
+    def remove(self, security_id, expiry):
+        self._remove(topic(security_id, expiry))
+
+    def add_all(self):
+        """A client that is sent every chain: counts as one subscriber of each tracked chain."""
+        self._add(ALL_CHAINS)
+
+    def remove_all(self):
+        self._remove(ALL_CHAINS)
+
+    def _add(self, key):
+        self.counts[key] += 1
+        self._ensure_publisher()
+
+    def _remove(self, key):
+        self.counts[key] -= 1
+        if self.counts[key] <= 0:
+            del self.counts[key]
+
+    def _ensure_publisher(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._publish_forever())
+
+    def publish(self):
+        key = SNAPSHOT_KEY.format(WORKER_ID)
+        pipe = redis_client.pipeline()
+        pipe.delete(key)
+        if self.counts:
+            pipe.hset(key, mapping=dict(self.counts))
+            pipe.expire(key, SNAPSHOT_TTL)
+        pipe.execute()
+
+    async def _publish_forever(self):
+        while True:
+            try:
+                self.publish()
+            except Exception as e:
+                logger.warning("⚠️ Could not publish subscriber counts: %s", e)
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+
+
+registry = SubscriberRegistry()
+
+
+# ✅ Cluster-wide counts (reader side: tracker / poll scheduler)
+def subscriber_counts() -> Counter:
+    """Sum every live worker's snapshot: {"security_id:expiry": clients}.
+
+    Pending alerts count as subscribers too, so a chain with alerts keeps being
+    polled (and evaluated) even when nobody has it open.
+    """
+    totals = Counter()
+    keys = list(redis_client.scan_iter(match=SNAPSHOT_PATTERN, count=100))
+    pipe = redis_client.pipeline()
+    for key in keys:
+        pipe.hgetall(key)
+    pipe.hgetall(ALERT_DEMAND_KEY)
+    for snapshot in pipe.execute():
+        for key, count in snapshot.items():
+            if int(count) > 0:
+                totals[key] += int(count)
+    return totals
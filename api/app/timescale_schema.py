@@ -0,0 +1,227 @@
+import os
+import argparse
+from datetime import timedelta
+from api.app import db
+from api.app.logger import get_logger
+
+# ✅ Module Logger
+logger = get_logger(__name__)
+
+# ✅ Sizing Inputs (chunk interval is derived from these unless set explicitly)
+ROWS_PER_DAY = int(os.getenv("OPTION_DATA_ROWS_PER_DAY", 20_000_000))  # ✅ ~10 scrips × 2 expiries × 150 strikes every 3 s
+BYTES_PER_ROW = int(os.getenv("OPTION_DATA_BYTES_PER_ROW", 400))       # ✅ Heap row + indexes, uncompressed
+MEMORY_GB = float(os.getenv("TIMESCALE_MEMORY_GB", 8))
+CHUNK_INTERVAL = os.getenv("OPTION_DATA_CHUNK_INTERVAL")                # ✅ e.g. "6 hours" overrides the estimate
+
+# ✅ Lifecycle Policies
+COMPRESS_AFTER = os.getenv("OPTION_DATA_COMPRESS_AFTER", "2 days")
+RETENTION = os.getenv("OPTION_DATA_RETENTION", "90 days")
+AGGREGATE_RETENTION = os.getenv("OPTION_DATA_AGGREGATE_RETENTION", "2 years")
+REPLAY_RETENTION = os.getenv("OPTION_DATA_REPLAY_RETENTION", "14 days")
+
+MIGRATIONS_TABLE = "schema_migrations"
+ADVISORY_LOCK_ID = 720_391  # ✅ Only one process migrates at a time
+
+
+def recommended_chunk_interval(rows_per_day=ROWS_PER_DAY, bytes_per_row=BYTES_PER_ROW, memory_gb=MEMORY_GB) -> timedelta:
+    """Size chunks so the chunk being written (plus its indexes) fits in ~25% of memory."""
+    bytes_per_hour = max(rows_per_day * bytes_per_row / 24, 1)
+    hours = int(memory_gb * 1024 ** 3 * 0.25 // bytes_per_hour)
+    return timedelta(hours=min(max(hours, 1), 24 * 7))
+
+
+def chunk_interval_sql() -> str:
+    if CHUNK_INTERVAL:
+        return CHUNK_INTERVAL
+    return f"{int(recommended_chunk_interval().total_seconds() // 3600)} hours"
+
+
+# ✅ Migrations: (version, name, statements). Every statement is idempotent, so a
+#    migration interrupted half-way is simply re-run on the next start.
+def migrations():
+    chunk = chunk_interval_sql()
+    return [
+        (1, "timescaledb extension", [
+            "CREATE EXTENSION IF NOT EXISTS timescaledb;",
+        ]),
+        (2, "option_data hypertable", [
+            """
+            CREATE TABLE IF NOT EXISTS option_data (
+                timestamp               TIMESTAMPTZ      NOT NULL,
+                underlying              TEXT             NOT NULL,
+                expiry                  DATE             NOT NULL,
+                strike                  DOUBLE PRECISION NOT NULL,
+                ce_oi                   BIGINT,
+                pe_oi                   BIGINT,
+                ce_iv                   DOUBLE PRECISION,
+                pe_iv                   DOUBLE PRECISION,
+                ce_price                DOUBLE PRECISION,
+                pe_price                DOUBLE PRECISION,
+                ce_delta                DOUBLE PRECISION,
+                pe_delta                DOUBLE PRECISION,
+                ce_theta                DOUBLE PRECISION,
+                pe_theta                DOUBLE PRECISION,
+                ce_gamma                DOUBLE PRECISION,
+                pe_gamma                DOUBLE PRECISION,
+                ce_vega                 DOUBLE PRECISION,
+                pe_vega                 DOUBLE PRECISION,
+                ce_top_ask_price        DOUBLE PRECISION,
+                pe_top_ask_price        DOUBLE PRECISION,
+                ce_top_ask_quantity     BIGINT,
+                pe_top_ask_quantity     BIGINT,
+                ce_top_bid_price        DOUBLE PRECISION,
+                pe_top_bid_price        DOUBLE PRECISION,
+                ce_top_bid_quantity     BIGINT,
+                pe_top_bid_quantity     BIGINT,
+                ce_previous_close_price DOUBLE PRECISION,
+                pe_previous_close_price DOUBLE PRECISION,
+                ce_previous_oi          BIGINT,
+                pe_previous_oi          BIGINT,
+                ce_previous_volume      BIGINT,
+                pe_previous_volume      BIGINT,
+                volume                  BIGINT
+            );
+            """,
+            f"""
+            SELECT create_hypertable('option_data', 'timestamp',
+                chunk_time_interval => INTERVAL '{chunk}',
+                if_not_exists => TRUE, migrate_data => TRUE);
+            """,
+        ]),
+        (3, "option_data contract index", [
+            # ✅ Chain / strike history lookups: WHERE underlying, expiry [, strike] ORDER BY timestamp DESC
+            """
+            CREATE INDEX IF NOT EXISTS option_data_contract_idx
+                ON option_data (underlying, expiry, strike, timestamp DESC);
+            """,
+        ]),
+        (4, "option_data compression and retention", [
+            """
+            ALTER TABLE option_data SET (
+                timescaledb.compress,
+                timescaledb.compress_segmentby = 'underlying, expiry',
+                timescaledb.compress_orderby = 'strike, timestamp DESC'
+            );
+            """,
+            f"SELECT add_compression_policy('option_data', INTERVAL '{COMPRESS_AFTER}', if_not_exists => TRUE);",
+            f"SELECT add_retention_policy('option_data', INTERVAL '{RETENTION}', if_not_exists => TRUE);",
+        ]),
+        (5, "option_data continuous aggregates", [
+            # ✅ Minute bars per strike: charts and analytics stop scanning raw 3 s snapshots
+            """
+            CREATE MATERIALIZED VIEW IF NOT EXISTS option_data_1m
+            WITH (timescaledb.continuous) AS
+            SELECT time_bucket(INTERVAL '1 minute', timestamp) AS bucket,
+                   underlying, expiry, strike,
+                   last(ce_price, timestamp) AS ce_price,
+                   last(pe_price, timestamp) AS pe_price,
+                   last(ce_oi, timestamp)    AS ce_oi,
+                   last(pe_oi, timestamp)    AS pe_oi,
+                   last(ce_iv, timestamp)    AS ce_iv,
+                   last(pe_iv, timestamp)    AS pe_iv,
+                   max(volume)               AS volume
+            FROM option_data
+            GROUP BY bucket, underlying, expiry, strike
+            WITH NO DATA;
+            """,
+            """
+            SELECT add_continuous_aggregate_policy('option_data_1m',
+                start_offset => INTERVAL '1 hour', end_offset => INTERVAL '1 minute',
+                schedule_interval => INTERVAL '1 minute', if_not_exists => TRUE);
+            """,
+            # ✅ Daily per-expiry summary, kept after raw rows expire
+            """
+            CREATE MATERIALIZED VIEW IF NOT EXISTS option_data_1d
+            WITH (timescaledb.continuous) AS
+            SELECT time_bucket(INTERVAL '1 day', timestamp) AS bucket,
+                   underlying, expiry,
+                   max(ce_oi) AS max_ce_oi,
+                   max(pe_oi) AS max_pe_oi,
+                   max(volume) AS max_volume,
+                   count(*) AS samples
+            FROM option_data
+            GROUP BY bucket, underlying, expiry
+            WITH NO DATA;
+            """,
+            """
+            SELECT add_continuous_aggregate_policy('option_data_1d',
+                start_offset => INTERVAL '3 days', end_offset => INTERVAL '1 hour',
+                schedule_interval => INTERVAL '1 hour', if_not_exists => TRUE);
+            """,
+            f"SELECT add_retention_policy('option_data_1m', INTERVAL '{AGGREGATE_RETENTION}', if_not_exists => TRUE);",
+        ]),
+        (6, "option_data_replay hypertable", [
+            # ✅ Replays persist here so research runs never mix with recorded market data
+            "CREATE TABLE IF NOT EXISTS option_data_replay (LIKE option_data INCLUDING DEFAULTS);",
+            f"""
+            SELECT create_hypertable('option_data_replay', 'timestamp',
+                chunk_time_interval => INTERVAL '{chunk}', if_not_exists => TRUE);
+            """,
+            f"SELECT add_retention_policy('option_data_replay', INTERVAL '{REPLAY_RETENTION}', if_not_exists => TRUE);",
+        ]),
+    ]
+
+
+def _applied_versions(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            version    INT PRIMARY KEY,
+            name       TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """)
+    cursor.execute(f"SELECT version FROM {MIGRATIONS_TABLE};")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate():
+    """Apply pending migrations, then re-apply the chunk interval (it only affects new chunks)."""
+    conn = db.direct_connection()
+    conn.autocommit = True  # ✅ Continuous aggregates cannot be created inside a transaction
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s);", (ADVISORY_LOCK_ID,))
+            try:
+                applied = _applied_versions(cursor)
+                for version, name, statements in migrations():
+                    if version in applied:
+                        continue
+                    logger.info("🔄 Applying migration %d: %s", version, name)
+                    for statement in statements:
+                        cursor.execute(statement)
+                    cursor.execute(
+                        f"INSERT INTO {MIGRATIONS_TABLE} (version, name) VALUES (%s, %s) ON CONFLICT DO NOTHING;",
+                        (version, name),
+                    )
+                    logger.info("✅ Migration %d applied", version)
+
+                cursor.execute("SELECT set_chunk_time_interval('option_data', %s::interval);", (chunk_interval_sql(),))
+                logger.info("✅ option_data chunk interval: %s", chunk_interval_sql())
+            finally:
+                cursor.execute("SELECT pg_advisory_unlock(%s);", (ADVISORY_LOCK_ID,))
+    finally:
+        conn.close()
+
+
+def status():
+    """[(version, name, applied)] for every known migration."""
+    conn = db.direct_connection()
+    try:
+        with conn.cursor() as cursor:
+            applied = _applied_versions(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+    return [(version, name, version in applied) for version, name, _ in migrations()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TimescaleDB schema manager for option_data")
+    parser.add_argument("--status", action="store_true", help="List migrations without applying them")
+    args = parser.parse_args()
+
+    if args.status:
+        for version, name, applied in status():
+            logger.info("%3d  %-8s %s", version, "applied" if applied else "pending", name)
+    else:
+        migrate()
@@ -1,11 +1,22 @@
-import asyncio
-import json
-import redis
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import time
+from typing import Optional
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from api.app.lifecycle import lifespan
+from api.app.subscribers import registry as subscribers
+from api.app import snapshot_stream
+from api.app.snapshot_stream import Snapshot
+from api.app.chain_projection import ChainProjection, projection_params
+from api.app.session import verify_token
+from api.analysis.alert_engine import feed as alert_feed
+from api.app.logger import get_logger
+from api.app.metrics import (
+    CONTENT_TYPE_LATEST, CACHE_REQUESTS, WS_CONNECTIONS, WS_MESSAGES, WS_FANOUT_LATENCY, render_metrics
+)
 
 # ✅ Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # ✅ Enable CORS for WebSockets
 app.add_middleware(
@@ -16,35 +27,124 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ✅ Redis Client
-redis_client = redis.Redis(host="localhost", port=6379, db=0)
+# ✅ Module Logger
+logger = get_logger(__name__)
 
 # ✅ Track connected WebSockets
 active_connections = set()
 
 # ✅ WebSocket Route
 @app.websocket("/ws/option_chain/{security_id}/{expiry}")
-async def websocket_endpoint(websocket: WebSocket, security_id: int, expiry: str):
-    """Handles WebSocket connections for live option chain updates."""
+async def websocket_endpoint(
+    websocket: WebSocket,
+    security_id: int,
+    expiry: str,
+    last_id: Optional[str] = None,
+    projection: ChainProjection = Depends(projection_params),
+):
+    """Stream live option chain snapshots from the Redis Stream for this chain.
+
+    Frames are `{"stream_id": ..., "data": {...}}`. A client that reconnects
+    with `?last_id=<stream_id>` first receives every snapshot it missed, then
+    live ones, with no gaps (or a `{"type": "gap"}` notice if they were trimmed).
+    `window` / `min_strike` / `max_strike` / `fields` trim each frame server-side.
+    """
+    if last_id:
+        try:
+            last_id = snapshot_stream.normalize_id(last_id)
+        except ValueError:
+            logger.warning("⚠️ Rejected WebSocket resume with invalid last_id %r from %s", last_id, websocket.client)
+            await websocket.close(code=1008)  # ✅ Policy violation: malformed resume cursor
+            return
     await websocket.accept()
     active_connections.add(websocket)
-    print(f"✅ WebSocket Connected: {websocket.client}")
+    WS_CONNECTIONS.set(len(active_connections), server="websocket_server")
+    subscribers.add(security_id, expiry)  # ✅ Drives the tracker's demand-based polling
+    logger.info("✅ WebSocket Connected: %s", websocket.client)
 
-    try:
-        while True:
-            # ✅ Fetch latest option chain from Redis
-            redis_key = f"live_option_chain:{security_id}:{expiry}"
-            data = redis_client.get(redis_key)
+    async def send(frame):
+        started = time.perf_counter()
+        await websocket.send_text(frame)
+        WS_FANOUT_LATENCY.observe(time.perf_counter() - started, server="websocket_server")
+        WS_MESSAGES.inc(server="websocket_server")
 
-            if data:
-                option_chain_data = json.loads(data)
-                await websocket.send_json(option_chain_data)
+    # ✅ Join the worker's shared follower first so nothing appended during the replay is lost
+    queue = snapshot_stream.hub.subscribe(security_id, expiry)
+    try:
+        if last_id:
+            # ✅ Resume: replay everything after the client's last snapshot
+            if snapshot_stream.has_gap(security_id, expiry, last_id):
+                await websocket.send_json({"type": "gap", "last_id": last_id})
+            backlog = snapshot_stream.read_after(security_id, expiry, last_id)
+            for stream_id, payload in backlog:
+                await send(Snapshot(stream_id, payload).frame(projection))
+            cursor = backlog[-1][0] if backlog else last_id
+        else:
+            # ✅ Fresh connection: newest snapshot first, then follow
+            newest = snapshot_stream.latest(security_id, expiry)
+            if newest:
+                CACHE_REQUESTS.inc(cache="live_option_chain", result="hit")
+                await send(Snapshot(*newest).frame(projection))
+                cursor = newest[0]
             else:
+                CACHE_REQUESTS.inc(cache="live_option_chain", result="miss")
                 await websocket.send_json({"message": "No live data available"})
+                cursor = "0-0"
+
+        caught_up = False
+        while True:
+            snapshot = await queue.get()
+            stream_id = snapshot.stream_id
+            if not snapshot_stream.id_before(cursor, stream_id):
+                continue  # ✅ Already sent during the replay
+            if snapshot_stream.hub.take_dropped(queue):
+                # ✅ This client fell behind and the hub dropped frames: backfill them after `cursor`
+                if snapshot_stream.has_gap(security_id, expiry, cursor):
+                    await websocket.send_json({"type": "gap", "last_id": cursor})
+                caught_up = False
+            if not caught_up:
+                # ✅ Close the window between the replay read (or last sent frame) and this one
+                for missed_id, payload in snapshot_stream.read_after(security_id, expiry, cursor, before=stream_id):
+                    await send(Snapshot(missed_id, payload).frame(projection))
+                caught_up = True
+            await send(snapshot.frame(projection))  # ✅ Encoded once per (snapshot, projection) in this worker
+            cursor = stream_id
 
-            await asyncio.sleep(2)  # ✅ Poll every 2 seconds
+    except WebSocketDisconnect:
+        logger.warning("⚠️ WebSocket Disconnected: %s", websocket.client)
+
+    finally:
+        snapshot_stream.hub.unsubscribe(security_id, expiry, queue)
+        active_connections.discard(websocket)
+        WS_CONNECTIONS.set(len(active_connections), server="websocket_server")
+        subscribers.remove(security_id, expiry)
 
+# ✅ WebSocket Route: triggered alerts for the session's user (`?token=<session token>`)
+@app.websocket("/ws/alerts")
+async def alerts_endpoint(websocket: WebSocket, token: Optional[str] = None):
+    """Push `{"type": "alert", ...}` events as the tracker fires them (missed ones: GET /api/alerts/fired/)."""
+    claims = verify_token(token) if token else None
+    if claims is None:
+        await websocket.close(code=1008)  # ✅ Policy violation: missing / invalid / revoked session
+        return
+    owner = claims.anjni_id
+    await websocket.accept()
+    active_connections.add(websocket)
+    WS_CONNECTIONS.set(len(active_connections), server="websocket_server")
+    queue = alert_feed.subscribe(owner)
+    try:
+        while True:
+            await websocket.send_text(await queue.get())
+            WS_MESSAGES.inc(server="websocket_server")
     except WebSocketDisconnect:
-        print(f"⚠️ WebSocket Disconnected: {websocket.client}")
-        active_connections.remove(websocket)
+        logger.info("WebSocket alerts client disconnected: %s", websocket.client)
+    finally:
+        alert_feed.unsubscribe(owner, queue)
+        active_connections.discard(websocket)
+        WS_CONNECTIONS.set(len(active_connections), server="websocket_server")
+
+# ✅ Prometheus Metrics for this process
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
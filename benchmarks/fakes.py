@@ -0,0 +1,508 @@
+import csv
+import json
+import time
+import random
+import sqlite3
+import queue
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.synthetic import make_option_chain, make_expiry_list
+
+
+# ✅ In-memory Redis stand-in (only the commands the app uses)
+class FakeRedis:
+    def __init__(self):
+        self._data = {}
+        self._expiry = {}
+        self._sets = {}
+        self._streams = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self._subscribers = []
+
+    def _alive(self, key):
+        deadline = self._expiry.get(key)
+        if deadline is not None and deadline < time.monotonic():
+            self._data.pop(key, None)
+            self._expiry.pop(key, None)
+        return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key) if self._alive(key) else None
+
+    def set(self, key, value, ex=None, nx=False, px=None):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._data[key] = value
+            self._expiry.pop(key, None)
+            if ex:
+                self._expiry[key] = time.monotonic() + ex
+            if px:
+                self._expiry[key] = time.monotonic() + px / 1000
+            return True
+
+    def setex(self, key, ttl, value):
+        return self.set(key, value, ex=ttl)
+
+    def exists(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._alive(key))
+
+    def pttl(self, key):
+        with self._lock:
+            if not self._alive(key):
+                return -2
+            deadline = self._expiry.get(key)
+            return -1 if deadline is None else int((deadline - time.monotonic()) * 1000)
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        mapping = dict(mapping or {}, **({field: value} if field is not None else {}))
+        with self._lock:
+            self._data.setdefault(key, {}).update(mapping)
+            return len(mapping)
+
+    def hvals(self, key):
+        with self._lock:
+            return list(self._data.get(key, {}).values()) if self._alive(key) else []
+
+    def hget(self, key, field):
+        return self.hmget(key, field)[0]
+
+    def setrange(self, key, offset, value):
+        with self._lock:
+            current = bytearray(self._data.get(key, b"") if self._alive(key) else b"")
+            if len(current) < offset + len(value):
+                current.extend(b"\0" * (offset + len(value) - len(current)))
+            current[offset:offset + len(value)] = value
+            self._data[key] = bytes(current)
+            return len(current)
+
+    def hmget(self, key, *fields):
+        with self._lock:
+            values = self._data.get(key, {}) if self._alive(key) else {}
+            return [values.get(field) for field in fields]
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            value = int(self._data.get(key, 0)) + amount
+            self._data[key] = value
+            return value
+
+    def sadd(self, key, *members):
+        with self._lock:
+            self._sets.setdefault(key, set()).update(members)
+
+    def srem(self, key, *members):
+        with self._lock:
+            self._sets.get(key, set()).difference_update(members)
+
+    def smembers(self, key):
+        with self._lock:
+            return set(self._sets.get(key, set()))
+
+    def expire(self, key, ttl):
+        with self._lock:
+            if key in self._data or key in self._streams:
+                self._expiry[key] = time.monotonic() + ttl
+                return True
+            return False
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        with self._lock:
+            entries = self._streams.setdefault(key, [])
+            ms = int(time.time() * 1000)
+            last_ms, last_seq = (int(part) for part in entries[-1][0].split("-")) if entries else (0, -1)
+            stream_id = f"{ms}-0" if ms > last_ms else f"{last_ms}-{last_seq + 1}"
+            entries.append((stream_id, dict(fields)))
+            if maxlen is not None and len(entries) > maxlen:
+                del entries[:len(entries) - maxlen]
+            return stream_id
+
+    def xrevrange(self, key, max="+", min="-", count=None):
+        with self._lock:
+            entries = list(reversed(self._streams.get(key, [])))
+            return entries[:count] if count else entries
+
+    def xrange(self, key, min="-", max="+", count=None):
+        low, high = _stream_bound(min, upper=False), _stream_bound(max, upper=True)
+        with self._lock:
+            entries = [entry for entry in self._streams.get(key, []) if _in_bounds(_stream_id(entry[0]), low, high)]
+        return entries[:count] if count else entries
+
+    def xread(self, streams, count=None, block=None):
+        """Non-blocking XREAD ("$" = the stream's current last id); FakeAsyncRedis adds BLOCK."""
+        response = []
+        with self._lock:
+            for key, last_id in streams.items():
+                entries = self._streams.get(key, [])
+                if last_id == "$":
+                    continue
+                after = _stream_id(last_id)
+                newer = [entry for entry in entries if _stream_id(entry[0]) > after]
+                if newer:
+                    response.append((key, newer[:count] if count else newer))
+        return response
+
+    def last_stream_id(self, key):
+        with self._lock:
+            entries = self._streams.get(key, [])
+            return entries[-1][0] if entries else "0-0"
+
+    def publish(self, channel, message):
+        self.published += 1
+        receivers = [pubsub for pubsub in list(self._subscribers) if channel in pubsub.channels]
+        for pubsub in receivers:
+            pubsub._deliver({"type": "message", "channel": channel, "data": message})
+        return len(receivers)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self, ignore_subscribe_messages)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def _stream_id(stream_id):
+    ms, _, seq = stream_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def _stream_bound(bound, upper):
+    """XRANGE bound → (exclusive, (ms, seq)); "-" / "+" are open, "ms" alone spans every seq."""
+    if bound in ("-", "+"):
+        return False, None
+    exclusive = bound.startswith("(")
+    bound = bound.lstrip("(")
+    ms, _, seq = bound.partition("-")
+    return exclusive, (int(ms), int(seq) if seq else (float("inf") if upper else 0))
+
+
+def _in_bounds(stream_id, low, high):
+    (low_exclusive, low_id), (high_exclusive, high_id) = low, high
+    if low_id is not None and (stream_id < low_id or (low_exclusive and stream_id == low_id)):
+        return False
+    if high_id is not None and (stream_id > high_id or (high_exclusive and stream_id == high_id)):
+        return False
+    return True
+
+
+# ✅ asyncio Redis stand-in sharing a FakeRedis (XREAD BLOCK is emulated by polling)
+class FakeAsyncRedis:
+    def __init__(self, redis_client, poll_interval=0.005):
+        self._redis = redis_client
+        self._poll_interval = poll_interval
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakeAsyncPubSub(self._redis, ignore_subscribe_messages)
+
+    async def xread(self, streams, count=None, block=None):
+        streams = {key: self._redis.last_stream_id(key) if last_id == "$" else last_id for key, last_id in streams.items()}
+        deadline = time.monotonic() + (block or 0) / 1000
+        while True:
+            response = self._redis.xread(streams, count=count)
+            if response or time.monotonic() >= deadline:
+                return response
+            await asyncio.sleep(self._poll_interval)
+
+
+class FakePipeline:
+    def __init__(self, redis_client):
+        self._redis = redis_client
+        self._calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        return [getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+# ✅ Pub/Sub stand-ins mirror the real clients: redis.Redis().pubsub() is synchronous
+#    (blocking listen() generator), redis.asyncio's is awaited — a mismatch fails here too
+class FakePubSub:
+    def __init__(self, redis_client, ignore_subscribe_messages=False):
+        self._redis = redis_client
+        self._ignore_subscribe_messages = ignore_subscribe_messages
+        self._messages = self._new_queue()
+        self.channels = set()
+
+    def _new_queue(self):
+        return queue.Queue()
+
+    def _deliver(self, message):
+        self._messages.put_nowait(message)
+
+    def _subscribe(self, channels):
+        for channel in channels:
+            self.channels.add(channel)
+            if not self._ignore_subscribe_messages:
+                self._deliver({"type": "subscribe", "channel": channel, "data": len(self.channels)})
+        if self not in self._redis._subscribers:
+            self._redis._subscribers.append(self)
+
+    def _close(self):
+        self.channels.clear()
+        if self in self._redis._subscribers:
+            self._redis._subscribers.remove(self)
+
+    def subscribe(self, *channels):
+        self._subscribe(channels)
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self._messages.get(timeout=timeout) if timeout else self._messages.get_nowait()
+        except queue.Empty:
+            return None
+
+    def listen(self):
+        while self.channels:
+            yield self._messages.get()
+
+    def close(self):
+        self._close()
+
+
+class FakeAsyncPubSub(FakePubSub):
+    def _new_queue(self):
+        return asyncio.Queue()
+
+    async def subscribe(self, *channels):
+        self._subscribe(channels)
+
+    async def get_message(self, timeout=0.0):
+        try:
+            return await asyncio.wait_for(self._messages.get(), timeout) if timeout else self._messages.get_nowait()
+        except (asyncio.TimeoutError, asyncio.QueueEmpty):
+            return None
+
+    async def listen(self):
+        while self.channels:
+            yield await self._messages.get()
+
+    async def close(self):
+        self._close()
+
+
+# ✅ Postgres stand-in backed by in-memory SQLite (translates the few dialect differences we use)
+def _translate(sql):
+    return (sql.replace("%s", "?")
+               .replace("ILIKE", "LIKE")
+               .replace("now()", "CURRENT_TIMESTAMP")
+               .replace("RESTART IDENTITY", "")
+               .replace("TRUNCATE TABLE", "DELETE FROM"))
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self._cursor = conn._db.cursor()
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(_translate(sql), tuple(params or ()))
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(_translate(sql), rows)
+
+    def copy_expert(self, sql, f):
+        table = sql.split("COPY", 1)[1].split("(", 1)[0].strip()
+        columns = sql.split("(", 1)[1].split(")", 1)[0]
+        columns = [c.strip() for c in columns.split(",")]
+        rows = [[None if v == "NULL" else v for v in row] for row in csv.reader(f, delimiter="|")]
+        placeholders = ",".join("?" * len(columns))
+        self._cursor.executemany(f"INSERT INTO {table} ({','.join(columns)}) VALUES ({placeholders})", rows)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self._db = db
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def close(self):
+        pass  # ✅ Shared in-memory DB lives for the whole benchmark
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+OPTION_DATA_COLUMNS = [
+    "timestamp", "underlying", "expiry", "strike", "ce_oi", "pe_oi", "ce_iv", "pe_iv", "ce_price", "pe_price",
+    "ce_delta", "pe_delta", "ce_theta", "pe_theta", "ce_gamma", "pe_gamma", "ce_vega", "pe_vega",
+    "ce_top_ask_price", "pe_top_ask_price", "ce_top_ask_quantity", "pe_top_ask_quantity",
+    "ce_top_bid_price", "pe_top_bid_price", "ce_top_bid_quantity", "pe_top_bid_quantity",
+    "ce_previous_close_price", "pe_previous_close_price", "ce_previous_oi", "pe_previous_oi",
+    "ce_previous_volume", "pe_previous_volume", "volume",
+]
+
+SCRIP_MASTER_SCHEMA = """
+CREATE TABLE scrip_master (
+    sem_exm_exch_id TEXT, sem_segment TEXT, sem_smst_security_id INTEGER, sem_instrument_name TEXT,
+    sem_expiry_code INTEGER, sem_trading_symbol TEXT, sem_lot_units INTEGER, sem_custom_symbol TEXT,
+    sem_expiry_date TEXT, sem_strike_price REAL, sem_option_type TEXT, sem_tick_size REAL,
+    sem_expiry_flag TEXT, sem_exch_instrument_type TEXT, sem_series TEXT, sm_symbol_name TEXT,
+    fetch_timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+SEARCH_TABLE_SCHEMA = """
+CREATE TABLE search_table (
+    sem_smst_security_id INTEGER, symbol_name TEXT, trading_symbol TEXT, exchange TEXT,
+    segment TEXT, attribute TEXT, enum INTEGER, alias TEXT
+)
+"""
+
+
+class FakePostgres:
+    """Single in-memory database; `connect()` hands out connections sharing it."""
+
+    def __init__(self):
+        self._db = sqlite3.connect(":memory:", check_same_thread=False)
+        cursor = self._db.cursor()
+        cursor.execute(f"CREATE TABLE option_data ({', '.join(OPTION_DATA_COLUMNS)})")
+        cursor.execute(SCRIP_MASTER_SCHEMA)
+        cursor.execute(SEARCH_TABLE_SCHEMA)
+        cursor.execute("CREATE INDEX idx_search_symbol ON search_table (symbol_name)")
+        self._db.commit()
+
+    def connect(self, *args, **kwargs):
+        return FakeConnection(self._db)
+
+    def load_search_table(self, rows):
+        self._db.executemany("INSERT INTO search_table VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self._db.commit()
+
+    def count(self, table):
+        return self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+# ✅ Local Dhan HTTP API stand-in
+class FakeDhanServer:
+    """Serves /v2/optionchain and /v2/optionchain/expirylist on localhost with optional latency & 429s."""
+
+    def __init__(self, num_strikes=100, latency=0.0, rate_limit_ratio=0.0, seed=0):
+        chain = {"data": make_option_chain(num_strikes, seed=seed)}
+        self._chain_body = json.dumps(chain).encode()
+        self._expiry_body = json.dumps({"data": make_expiry_list()}).encode()
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self._rng = random.Random(seed)
+        self.requests = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                fake.requests += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fake.rate_limit_ratio and fake._rng.random() < fake.rate_limit_ratio:
+                    self.send_response(429)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = fake._expiry_body if self.path.endswith("expirylist") else fake._chain_body
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        return False
+
+
+# ✅ WebSocket client stand-in for fan-out benchmarks
+class FakeWebSocketClient:
+    def __init__(self, send_delay=0.0):
+        self.send_delay = send_delay
+        self.received = 0
+        self.bytes = 0
+
+    async def send(self, data):
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        self.write(data)
+
+    def write(self, data):
+        self.received += 1
+        self.bytes += len(data)
+
+    async def send_text(self, data):
+        await self.send(data)
+
+    async def send_bytes(self, data):
+        await self.send(data)
+
+    async def send_json(self, data):
+        await self.send(json.dumps(data))
+
+
+
+def broadcast(clients, message):
+    """Stand-in for websockets.broadcast (synchronous write to every client)."""
+    for client in clients:
+        client.write(message)
@@ -0,0 +1,320 @@
+"""Offline benchmark suite for the ANJNI hot paths.
+
+Runs entirely on localhost: Dhan, Redis and Postgres are replaced by the
+stand-ins in `benchmarks.fakes`, and inputs come from `benchmarks.synthetic`.
+
+    python -m benchmarks.run_benchmarks                      # all cases, default sizes
+    python -m benchmarks.run_benchmarks --only search_scrip --iterations 500
+    python -m benchmarks.run_benchmarks --output new.json --compare bench_results.json
+"""
+import os
+import gc
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from statistics import mean
+from contextlib import ExitStack
+from datetime import datetime
+from unittest import mock
+
+from benchmarks.fakes import FakeRedis, FakeAsyncRedis, FakePostgres, FakeDhanServer, FakeWebSocketClient, broadcast
+from benchmarks.synthetic import make_option_chain, write_scrip_master_csv, search_table_rows
+
+CASES = {}
+
+
+def case(name):
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+# ✅ Timing Helpers
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies, units_per_op=1):
+    """Latency percentiles (ms) and throughput (ops/s and units/s)."""
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    return {
+        "iterations": len(latencies),
+        "mean_ms": round(mean(latencies) * 1000, 4),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4),
+        "ops_per_sec": round(len(latencies) / total, 2) if total else None,
+        "units_per_sec": round(len(latencies) * units_per_op / total, 2) if total else None,
+    }
+
+
+def measure(fn, iterations, warmup=3):
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run_async(coro_fn):
+    """Wrap an async callable so `measure` can time it with a persistent loop."""
+    loop = asyncio.new_event_loop()
+    return (lambda: loop.run_until_complete(coro_fn())), loop
+
+
+def unlimited_budget():
+    """A Dhan budget that never waits (the 5 req/s live pacing would dominate fetch timings)."""
+    from api.app.rate_limit import RateLimiter
+    return RateLimiter("bench:unlimited", float("inf"), 1)
+
+
+# ✅ Benchmark Cases
+@case("insert_option_chain")
+def bench_insert_option_chain(args):
+    from api.app import option_database
+
+    db = FakePostgres()
+    chain = make_option_chain(args.strikes)
+    with mock.patch.object(option_database, "get_db_connection", db.connect):
+        latencies = measure(lambda: option_database.insert_option_chain("NIFTY", "2025-01-30", chain), args.iterations)
+    result = summarize(latencies, units_per_op=args.strikes)
+    result["rows_written"] = db.count("option_data")
+    return result
+
+
+@case("search_scrip")
+def bench_search_scrip(args):
+    from api.app import search
+
+    db = FakePostgres()
+    db.load_search_table(search_table_rows(args.rows))
+    queries = ["NIFTY5", "BANK", "reliance", "TCS1", "ZZZ", "INFY12", "sbin"]
+    state = {"i": 0}
+
+    async def one_query():
+        query = queries[state["i"] % len(queries)]
+        state["i"] += 1
+        await search.search_scrip(query)
+
+    # ✅ Cold path: every query reaches the database (result cache bypassed)
+    with mock.patch.object(search, "connect_db", db.connect), \
+            mock.patch.object(search, "run_search", search.run_search.__wrapped__):
+        fn, loop = run_async(one_query)
+        try:
+            latencies = measure(fn, args.iterations)
+        finally:
+            loop.close()
+    return summarize(latencies)
+
+
+@case("search_scrip.cached")
+def bench_search_scrip_cached(args):
+    """Repeated popular queries served by the generation-keyed result cache."""
+    from api.app import search
+
+    db = FakePostgres()
+    db.load_search_table(search_table_rows(args.rows))
+    redis_client = FakeRedis()
+    queries = ["NIFTY5", "BANK", "reliance", "TCS1", "ZZZ", "INFY12", "sbin"]
+    state = {"i": 0}
+
+    async def one_query():
+        query = queries[state["i"] % len(queries)]
+        state["i"] += 1
+        await search.search_scrip(query)
+
+    with mock.patch.object(search, "connect_db", db.connect), \
+            mock.patch("api.app.cache.redis_client", redis_client), \
+            mock.patch("api.app.cache._ensure_listener", lambda: None):
+        search.results_cache.local.clear()
+        fn, loop = run_async(one_query)
+        try:
+            latencies = measure(fn, args.iterations)
+        finally:
+            loop.close()
+    return summarize(latencies)
+
+
+@case("csv_loader.load_csv")
+def bench_load_csv(args):
+    from api.app import csv_loader
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_scrip_master_csv(os.path.join(tmp, "scrip_master.csv"), args.rows)
+        with mock.patch.object(csv_loader, "CSV_FILE_PATH", path):
+            latencies = measure(csv_loader.load_csv, max(args.iterations // 20, 3), warmup=1)
+    return summarize(latencies, units_per_op=args.rows)
+
+
+@case("option_chain.fetch_cycle")
+def bench_fetch_cycle(args):
+    """fetch_option_chain: HTTP fetch → alias lookup → Redis cache → DB insert."""
+    from api.app import option_chain, dhan_api_input, dhan_client
+
+    db = FakePostgres()
+    db.load_search_table([(13, "NIFTY", "NIFTY", "NSE", "I", "IDX_I", 0, "NIFTY")])
+    redis_client = FakeRedis()
+    with FakeDhanServer(num_strikes=args.strikes, latency=args.upstream_latency) as server, ExitStack() as stack:
+        stack.enter_context(mock.patch.object(option_chain, "OPTION_CHAIN_URL", f"{server.base_url}/v2/optionchain"))
+        stack.enter_context(mock.patch.object(option_chain, "redis_client", redis_client))
+        stack.enter_context(mock.patch("api.app.rate_limit.redis_client", redis_client))
+        stack.enter_context(mock.patch.object(dhan_client, "OPTION_CHAIN_BUDGET", unlimited_budget()))  # ✅ Time the code, not pacing sleeps
+        stack.enter_context(mock.patch("api.app.circuit_breaker.redis_client", redis_client))  # ✅ Dhan breaker
+        stack.enter_context(mock.patch.object(dhan_api_input, "get_db_connection", db.connect))
+        stack.enter_context(mock.patch("api.app.cache.redis_client", redis_client))  # ✅ Scrip details cache
+        stack.enter_context(mock.patch("api.app.cache._ensure_listener", lambda: None))
+        stack.enter_context(mock.patch("api.app.option_database.get_db_connection", db.connect))
+        fn, loop = run_async(lambda: option_chain.fetch_option_chain(13, "IDX_I", "2025-01-30"))
+        try:
+            latencies = measure(fn, max(args.iterations // 5, 5))
+        finally:
+            loop.close()
+        upstream_requests = server.requests
+    result = summarize(latencies, units_per_op=args.strikes)
+    result["upstream_requests"] = upstream_requests
+    return result
+
+
+@case("live_tracker.fetch_publish_cycle")
+def bench_live_cycle(args):
+    """fetch_live_option_chain: HTTP fetch → Redis cache → DB insert → publish."""
+    from api.app import dhan_api_input, dhan_client
+    from api.analysis import oca_live_tracker
+
+    db = FakePostgres()
+    db.load_search_table([(13, "NIFTY", "NIFTY", "NSE", "I", "IDX_I", 0, "NIFTY")])
+    redis_client = FakeRedis()
+    with FakeDhanServer(num_strikes=args.strikes, latency=args.upstream_latency) as server, ExitStack() as stack:
+        stack.enter_context(mock.patch.object(oca_live_tracker, "OPTION_CHAIN_URL", f"{server.base_url}/v2/optionchain"))
+        stack.enter_context(mock.patch.object(oca_live_tracker, "redis_client", redis_client))
+        stack.enter_context(mock.patch("api.analysis.strike_series.redis_client", redis_client))  # ✅ Strike rings
+        stack.enter_context(mock.patch("api.analysis.alert_engine.redis_client", redis_client))  # ✅ Alert registry
+        stack.enter_context(mock.patch("api.app.rate_limit.redis_client", redis_client))
+        stack.enter_context(mock.patch.object(dhan_client, "OPTION_CHAIN_BUDGET", unlimited_budget()))  # ✅ Time the code, not pacing sleeps
+        stack.enter_context(mock.patch("api.app.circuit_breaker.redis_client", redis_client))  # ✅ Dhan breaker
+        stack.enter_context(mock.patch.object(dhan_api_input, "get_db_connection", db.connect))
+        stack.enter_context(mock.patch("api.app.cache.redis_client", redis_client))  # ✅ Scrip details cache
+        stack.enter_context(mock.patch("api.app.cache._ensure_listener", lambda: None))
+        stack.enter_context(mock.patch("api.app.option_database.get_db_connection", db.connect))
+        fn, loop = run_async(lambda: oca_live_tracker.fetch_live_option_chain(13, "IDX_I", "2025-01-30"))
+        try:
+            latencies = measure(fn, max(args.iterations // 5, 5))
+        finally:
+            loop.close()
+    result = summarize(latencies, units_per_op=args.strikes)
+    result["published"] = redis_client.published
+    return result
+
+
+@case("live_stream.fanout")
+def bench_fanout(args):
+    """broadcast_live_data: one published snapshot → every connected client."""
+    from api.app import live_stream
+
+    redis_client = FakeRedis()
+    clients = {FakeWebSocketClient() for _ in range(args.clients)}
+    payload = json.dumps(make_option_chain(args.strikes)).encode()
+
+    async def run():
+        broadcaster = asyncio.ensure_future(live_stream.broadcast_live_data())
+        while not redis_client._subscribers:  # ✅ Broadcaster subscribed before the first publish
+            await asyncio.sleep(0)
+        latencies = []
+        for i in range(args.iterations):
+            started = time.perf_counter()
+            redis_client.publish("option_chain_live", payload)
+            while any(client.received <= i for client in clients):
+                await asyncio.sleep(0)
+            latencies.append(time.perf_counter() - started)
+        broadcaster.cancel()
+        return latencies
+
+    with mock.patch.object(live_stream, "async_redis_client", FakeAsyncRedis(redis_client)), \
+            mock.patch.object(live_stream, "clients", clients), \
+            mock.patch.object(live_stream.websockets, "broadcast", broadcast):
+        latencies = asyncio.run(run())
+    result = summarize(latencies, units_per_op=args.clients)
+    result["clients"] = args.clients
+    return result
+
+
+# ✅ Reporting
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline_path):
+    """Print p50 / throughput deltas against an earlier results file."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"\n📊 Compared with {baseline_path}")
+    print(f"{'case':36} {'p50 ms':>12} {'Δ p50':>9} {'ops/s':>12} {'Δ ops/s':>9}")
+    for name, result in current.items():
+        old = baseline.get(name)
+        if not old or "error" in result or "error" in old:
+            print(f"{name:36} {'n/a':>12}")
+            continue
+        d_p50 = (result["p50_ms"] / old["p50_ms"] - 1) * 100 if old["p50_ms"] else 0.0
+        d_ops = (result["ops_per_sec"] / old["ops_per_sec"] - 1) * 100 if old["ops_per_sec"] else 0.0
+        print(f"{name:36} {result['p50_ms']:>12.3f} {d_p50:>+8.1f}% {result['ops_per_sec']:>12.1f} {d_ops:>+8.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline ANJNI hot-path benchmarks")
+    parser.add_argument("--only", action="append", choices=sorted(CASES), help="Run only these cases")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--strikes", type=int, default=100, help="Strikes per synthetic option chain")
+    parser.add_argument("--rows", type=int, default=20_000, help="Rows in synthetic scrip master / search_table")
+    parser.add_argument("--clients", type=int, default=500, help="WebSocket clients for fan-out")
+    parser.add_argument("--upstream-latency", type=float, default=0.0, help="Seconds added by the fake Dhan API")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Earlier results file to diff against")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or CASES:
+        print(f"⏱️  {name} ...", flush=True)
+        try:
+            results[name] = CASES[name](args)
+        except Exception as e:  # ✅ One broken case should not hide the others
+            results[name] = {"error": repr(e)}
+        print(f"   {results[name]}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "only")},
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import csv
+import random
+from datetime import date, timedelta
+
+# ✅ Scrip master columns (same order csv_loader.load_csv validates)
+SCRIP_MASTER_COLUMNS = [
+    "SEM_EXM_EXCH_ID", "SEM_SEGMENT", "SEM_SMST_SECURITY_ID", "SEM_INSTRUMENT_NAME",
+    "SEM_EXPIRY_CODE", "SEM_TRADING_SYMBOL", "SEM_LOT_UNITS", "SEM_CUSTOM_SYMBOL",
+    "SEM_EXPIRY_DATE", "SEM_STRIKE_PRICE", "SEM_OPTION_TYPE", "SEM_TICK_SIZE",
+    "SEM_EXPIRY_FLAG", "SEM_EXCH_INSTRUMENT_TYPE", "SEM_SERIES", "SM_SYMBOL_NAME",
+]
+
+UNDERLYINGS = ["NIFTY", "BANKNIFTY", "FINNIFTY", "RELIANCE", "TCS", "INFY", "HDFCBANK", "SBIN", "ITC", "LT"]
+
+
+def _leg(rng, strike, spot, is_call):
+    """One Dhan-shaped CE/PE leg with plausible values."""
+    moneyness = (spot - strike) if is_call else (strike - spot)
+    intrinsic = max(moneyness, 0.0)
+    last_price = round(intrinsic + rng.uniform(1, 120), 2)
+    oi = rng.randint(0, 8_000_000)
+    return {
+        "greeks": {
+            "delta": round(rng.uniform(0, 1) * (1 if is_call else -1), 5),
+            "theta": round(-rng.uniform(0, 25), 5),
+            "gamma": round(rng.uniform(0, 0.002), 6),
+            "vega": round(rng.uniform(0, 15), 5),
+        },
+        "implied_volatility": round(rng.uniform(8, 45), 2),
+        "last_price": last_price,
+        "oi": oi,
+        "previous_close_price": round(last_price * rng.uniform(0.8, 1.2), 2),
+        "previous_oi": max(oi + rng.randint(-500_000, 500_000), 0),
+        "previous_volume": rng.randint(0, 20_000_000),
+        "top_ask_price": round(last_price + 0.05, 2),
+        "top_ask_quantity": rng.randint(0, 5_000),
+        "top_bid_price": round(max(last_price - 0.05, 0.05), 2),
+        "top_bid_quantity": rng.randint(0, 5_000),
+        "volume": rng.randint(0, 30_000_000),
+    }
+
+
+def make_option_chain(num_strikes=100, spot=24000.0, step=50.0, seed=0):
+    """Build a `data` payload shaped like Dhan's /v2/optionchain response."""
+    rng = random.Random(seed)
+    atm = round(spot / step) * step
+    first = atm - step * (num_strikes // 2)
+    oc = {}
+    for i in range(num_strikes):
+        strike = first + i * step
+        oc[f"{strike:.6f}"] = {
+            "ce": _leg(rng, strike, spot, True),
+            "pe": _leg(rng, strike, spot, False),
+        }
+    return {"last_price": spot, "oc": oc}
+
+
+def make_expiry_list(count=6, start=None):
+    """Weekly Thursday expiries as ISO strings (Dhan's expirylist shape)."""
+    day = start or date.today()
+    while day.weekday() != 3:
+        day += timedelta(days=1)
+    return [(day + timedelta(weeks=i)).isoformat() for i in range(count)]
+
+
+def scrip_master_rows(num_rows=10_000, seed=0):
+    """Yield scrip-master rows mixing equities, indices, futures and options."""
+    rng = random.Random(seed)
+    expiries = make_expiry_list(8)
+    security_id = 10_000
+    for i in range(num_rows):
+        security_id += 1
+        symbol = UNDERLYINGS[i % len(UNDERLYINGS)]
+        kind = rng.random()
+        if kind < 0.2:
+            yield ["NSE", "E", security_id, "EQUITY", "", f"{symbol}{i}", 1, f"{symbol} {i}",
+                   "", "", "", 0.05, "", "", "EQ", f"{symbol} LTD"]
+            continue
+        expiry = rng.choice(expiries)
+        if kind < 0.3:
+            yield ["NSE", "D", security_id, "FUTIDX", 0, f"{symbol}-{expiry}-FUT", 25, f"{symbol} FUT",
+                   f"{expiry} 14:30:00", -0.01, "XX", 0.05, "M", "FUT", "", symbol]
+            continue
+        strike = 20000 + 50 * rng.randint(0, 160)
+        option_type = rng.choice(["CE", "PE"])
+        instrument = "OPTIDX" if symbol in ("NIFTY", "BANKNIFTY", "FINNIFTY") else "OPTSTK"
+        yield ["NSE", "D", security_id, instrument, 0, f"{symbol}-{expiry}-{strike}-{option_type}", 25,
+               f"{symbol} {expiry} {strike} {option_type}", f"{expiry} 14:30:00", float(strike),
+               option_type, 0.05, "W", "OP", "", symbol]
+
+
+def write_scrip_master_csv(path, num_rows=10_000, seed=0):
+    """Write a synthetic api-scrip-master.csv with `num_rows` rows."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(SCRIP_MASTER_COLUMNS)
+        writer.writerows(scrip_master_rows(num_rows, seed))
+    return path
+
+
+def search_table_rows(num_rows=10_000, seed=0):
+    """Rows for `search_table` (sem_smst_security_id, symbol_name, trading_symbol, exchange, segment, attribute, enum, alias)."""
+    rng = random.Random(seed)
+    for i in range(num_rows):
+        symbol = UNDERLYINGS[i % len(UNDERLYINGS)]
+        segment = rng.choice(["E", "I", "D"])
+        attribute = {"E": "NSE_EQ", "I": "IDX_I", "D": "NSE_FNO"}[segment]
+        yield (10_000 + i, f"{symbol} {i}", f"{symbol}{i}", rng.choice(["NSE", "BSE"]), segment,
+               attribute, i % 8, f"{symbol}{i}")
@@ -0,0 +1,293 @@
+"""WebSocket load test for live option-chain streaming.
+
+Spawns the target server (`websocket_server` or `live_stream`) in a child
+process with an in-memory Redis and a fake publisher, opens many local
+clients spread over (security_id, expiry) topics, and reports
+publish-to-receive latency, dropped frames and server CPU / memory.
+
+    python -m benchmarks.ws_load_test run --target live_stream --clients 2000 --topics 50 --tick-rate 2
+    python -m benchmarks.ws_load_test run --target websocket_server --clients 1000 --duration 60 --output ws.json
+
+Thousands of clients need a raised file-descriptor limit (`ulimit -n 65536`).
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+
+import websockets
+
+from benchmarks.fakes import FakeRedis, FakeAsyncRedis
+from benchmarks.synthetic import make_option_chain, make_expiry_list
+from benchmarks.run_benchmarks import percentile, git_revision
+
+try:
+    import psutil  # ✅ Optional: more accurate CPU/RSS sampling
+except ImportError:
+    psutil = None
+
+
+def make_topics(count, seed=0):
+    """Deterministic (security_id, expiry) topics."""
+    rng = random.Random(seed)
+    expiries = make_expiry_list(4)
+    security_ids = rng.sample(range(10_000, 99_999), count)
+    return [(security_id, expiries[i % len(expiries)]) for i, security_id in enumerate(security_ids)]
+
+
+# ✅ Server side: target app + fake publisher in one process
+async def publish_ticks(redis_client, topics, tick_rate, strikes, target, seed=0):
+    """Write a fresh snapshot for every topic `tick_rate` times per second, stamped with seq & publish time."""
+    chain = make_option_chain(strikes, seed=seed)
+    if target == "websocket_server":
+        from api.app.snapshot_stream import append_snapshot
+    interval = 1.0 / tick_rate
+    seq = 0
+    next_tick = time.perf_counter()
+    while True:
+        seq += 1
+        for security_id, expiry in topics:
+            chain["_bench"] = {"topic": f"{security_id}:{expiry}", "seq": seq, "ts": time.time()}
+            payload = json.dumps(chain)
+            if target == "websocket_server":
+                # ✅ Same write path as the tracker: capped snapshot stream per chain
+                pipe = redis_client.pipeline(transaction=False)
+                append_snapshot(pipe, security_id, expiry, payload)
+                pipe.execute()
+            else:
+                redis_client.publish("option_chain_live", payload.encode())
+        next_tick += interval
+        await asyncio.sleep(max(next_tick - time.perf_counter(), 0))
+
+
+async def serve(args):
+    redis_client = FakeRedis()
+    topics = make_topics(args.topics, args.seed)
+
+    if args.target == "websocket_server":
+        import uvicorn
+        from api.app import websocket_server, snapshot_stream, subscribers
+        snapshot_stream.redis_client = redis_client                     # ✅ Resume / latest (XRANGE, XREVRANGE)
+        snapshot_stream.async_redis_client = FakeAsyncRedis(redis_client)  # ✅ Hub followers (XREAD BLOCK)
+        subscribers.redis_client = redis_client                         # ✅ Subscriber-count snapshots
+        config = uvicorn.Config(websocket_server.app, host="127.0.0.1", port=args.port, log_level="warning")
+        server_task = uvicorn.Server(config).serve()
+    else:
+        from api.app import live_stream, subscribers
+        live_stream.async_redis_client = FakeAsyncRedis(redis_client)  # ✅ Same asyncio pub/sub API as production
+        subscribers.redis_client = redis_client                         # ✅ Clients register demand for every chain
+        server = await websockets.serve(live_stream.websocket_handler, "127.0.0.1", args.port)
+        server_task = asyncio.gather(server.wait_closed(), live_stream.broadcast_live_data())
+
+    await asyncio.gather(
+        server_task,
+        publish_ticks(redis_client, topics, args.tick_rate, args.strikes, args.target, args.seed),
+    )
+
+
+# ✅ Client side
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.received = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.duplicates = 0
+        self.connect_failures = 0
+        self.disconnects = 0
+        self.connected = 0
+
+
+async def run_client(url, topic, stats, stop_at, sample_every):
+    last_seq = None
+    try:
+        async with websockets.connect(url, max_size=None, open_timeout=30) as ws:
+            stats.connected += 1
+            while time.time() < stop_at:
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=max(stop_at - time.time(), 0.01))
+                except asyncio.TimeoutError:
+                    break
+                received_at = time.time()
+                message = json.loads(raw)
+                meta = message.get("_bench") or (message.get("data") or {}).get("_bench")  # ✅ websocket_server wraps frames
+                if not meta:
+                    continue
+                if meta["topic"] != topic and "/ws/" not in url:
+                    continue  # ✅ live_stream broadcasts every topic; only count ours
+                if last_seq is not None and meta["seq"] <= last_seq:
+                    stats.duplicates += 1  # ✅ Should stay 0: stream cursors never resend a snapshot
+                    continue
+                stats.received += 1
+                stats.bytes += len(raw)
+                if last_seq is not None and meta["seq"] > last_seq + 1:
+                    stats.dropped += meta["seq"] - last_seq - 1
+                last_seq = meta["seq"]
+                if stats.received % sample_every == 0:
+                    stats.latencies.append(received_at - meta["ts"])
+    except (OSError, websockets.exceptions.InvalidHandshake, asyncio.TimeoutError):
+        stats.connect_failures += 1
+    except websockets.exceptions.ConnectionClosed:
+        stats.disconnects += 1
+
+
+def process_usage(pid):
+    """(cpu seconds, rss bytes) for a process, via psutil or /proc."""
+    if psutil:
+        proc = psutil.Process(pid)
+        cpu = proc.cpu_times()
+        return cpu.user + cpu.system, proc.memory_info().rss
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / ticks
+    with open(f"/proc/{pid}/status") as f:
+        rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+    return cpu_seconds, rss
+
+
+async def sample_server(pid, samples, stop_at, interval=1.0):
+    last_cpu, last_time = process_usage(pid)[0], time.perf_counter()
+    while time.time() < stop_at:
+        await asyncio.sleep(interval)
+        cpu, rss = process_usage(pid)
+        now = time.perf_counter()
+        samples.append({"cpu_percent": round((cpu - last_cpu) / (now - last_time) * 100, 1), "rss_mb": round(rss / 2**20, 1)})
+        last_cpu, last_time = cpu, now
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError(f"Server did not open port {port} within {timeout}s")
+
+
+async def drive(args, server_pid):
+    topics = make_topics(args.topics, args.seed)
+    stats = Stats()
+    samples = []
+    stop_at = time.time() + args.ramp + args.duration
+    ramp_delay = args.ramp / args.clients if args.clients else 0
+
+    sampler = asyncio.ensure_future(sample_server(server_pid, samples, stop_at))
+    clients = []
+    for i in range(args.clients):
+        security_id, expiry = topics[i % len(topics)]
+        if args.target == "websocket_server":
+            url = f"ws://127.0.0.1:{args.port}/ws/option_chain/{security_id}/{expiry}"
+        else:
+            url = f"ws://127.0.0.1:{args.port}"
+        clients.append(asyncio.ensure_future(
+            run_client(url, f"{security_id}:{expiry}", stats, stop_at, args.sample_every)
+        ))
+        if ramp_delay:
+            await asyncio.sleep(ramp_delay)
+    await asyncio.gather(*clients)
+    await sampler
+    return stats, samples
+
+
+def report(args, stats, samples):
+    latencies = sorted(stats.latencies)
+    expected = stats.received + stats.dropped
+    cpu = [s["cpu_percent"] for s in samples]
+    rss = [s["rss_mb"] for s in samples]
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("command", "output")},
+        },
+        "results": {
+            "clients_connected": stats.connected,
+            "connect_failures": stats.connect_failures,
+            "disconnects": stats.disconnects,
+            "frames_received": stats.received,
+            "frames_dropped": stats.dropped,
+            "frames_duplicated": stats.duplicates,
+            "drop_ratio": round(stats.dropped / expected, 5) if expected else 0.0,
+            "mb_received": round(stats.bytes / 2**20, 2),
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50) * 1000, 2),
+                "p90": round(percentile(latencies, 90) * 1000, 2),
+                "p99": round(percentile(latencies, 99) * 1000, 2),
+                "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+                "samples": len(latencies),
+            },
+            "server": {
+                "cpu_percent_avg": round(sum(cpu) / len(cpu), 1) if cpu else None,
+                "cpu_percent_max": max(cpu) if cpu else None,
+                "rss_mb_max": max(rss) if rss else None,
+                "samples": samples,
+            },
+        },
+    }
+
+
+def run(args):
+    command = [
+        sys.executable, "-m", "benchmarks.ws_load_test", "serve",
+        "--target", args.target, "--port", str(args.port), "--topics", str(args.topics),
+        "--tick-rate", str(args.tick_rate), "--strikes", str(args.strikes), "--seed", str(args.seed),
+    ]
+    server = subprocess.Popen(command)
+    try:
+        wait_for_port(args.port)
+        stats, samples = asyncio.run(drive(args, server.pid))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    result = report(args, stats, samples)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    summary = {k: v for k, v in result["results"].items() if k != "server"}
+    print(json.dumps(summary, indent=2))
+    print(f"✅ Results written to {args.output}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WebSocket load test for live option-chain streaming")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p):
+        p.add_argument("--target", choices=["live_stream", "websocket_server"], default="live_stream")
+        p.add_argument("--port", type=int, default=18765)
+        p.add_argument("--topics", type=int, default=20, help="Distinct (security_id, expiry) topics")
+        p.add_argument("--tick-rate", type=float, default=1.0, help="Snapshots per topic per second")
+        p.add_argument("--strikes", type=int, default=60, help="Strikes per snapshot")
+        p.add_argument("--seed", type=int, default=0)
+
+    serve_parser = sub.add_parser("serve", help="(internal) run the target server + fake publisher")
+    common(serve_parser)
+
+    run_parser = sub.add_parser("run", help="Spawn the server and drive clients against it")
+    common(run_parser)
+    run_parser.add_argument("--clients", type=int, default=500)
+    run_parser.add_argument("--ramp", type=float, default=5.0, help="Seconds to open all clients")
+    run_parser.add_argument("--duration", type=float, default=30.0, help="Steady-state seconds after ramp")
+    run_parser.add_argument("--sample-every", type=int, default=1, help="Record latency for every Nth frame")
+    run_parser.add_argument("--output", default="bench_results_ws.json")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        asyncio.run(serve(args))
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()